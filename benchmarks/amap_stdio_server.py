@@ -0,0 +1,148 @@
+"""Local stdio stand-in for amap_mcp_server.
+
+Serves the AMap tools the assistant uses (text search, search detail,
+geocode, reverse geocode, around search, weather, distance and directions)
+from the fixture dataset, with no network or API key. Latency, error rate,
+hangs and payload size are configurable, so MCP pooling, the result cache and
+call timeouts can be load-tested offline.
+
+Point the app at it through the usual environment variables:
+
+    AMAP_MCP_CMD=python
+    AMAP_MCP_ARGS="benchmarks/amap_stdio_server.py --latency lognormal:0.05:0.5 \
+        --error-rate 0.02"
+
+Options:
+    --latency SPEC       Per-call latency: fixed:S, uniform:LO:HI or
+                         lognormal:MEDIAN:SIGMA
+    --error-rate P       Fraction of calls that fail with a tool error
+    --hang-rate P        Fraction of calls that never answer (to exercise call timeouts)
+    --payload-pois N     Max POIs per search response
+    --padding-bytes N    Extra bytes added to every response
+    --route-points N     Points per direction polyline
+    --fixtures PATH      Fixture dataset (default fixtures/amap.json)
+    --seed N             Seed for latency and fault injection
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fakes import FIXTURES_PATH, AmapFixtures, Latency, load_fixtures  # noqa: E402
+from mcp.server.fastmcp import FastMCP  # noqa: E402
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", default="fixed:0")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--payload-pois", type=int, default=10)
+    parser.add_argument("--padding-bytes", type=int, default=0)
+    parser.add_argument("--route-points", type=int, default=50)
+    parser.add_argument("--fixtures", default=FIXTURES_PATH)
+    # Each pooled server process gets its own seed unless one is given
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def create_server(args) -> FastMCP:
+    fixtures = AmapFixtures(
+        load_fixtures(args.fixtures),
+        payload_pois=args.payload_pois,
+        padding_bytes=args.padding_bytes,
+        route_points=args.route_points,
+    )
+    seed = args.seed if args.seed is not None else os.getpid()
+    latency = Latency(args.latency, seed=seed)
+    rng = random.Random(seed)
+    server = FastMCP("amap-fixtures", log_level="WARNING")
+
+    async def respond(tool_name: str, tool_args: dict) -> str:
+        await asyncio.sleep(latency.sample())
+        roll = rng.random()
+        if roll < args.hang_rate:
+            await asyncio.Event().wait()
+        if roll < args.hang_rate + args.error_rate:
+            raise RuntimeError(f"Injected failure in {tool_name}")
+        return json.dumps(fixtures.respond(tool_name, tool_args), ensure_ascii=False)
+
+    @server.tool()
+    async def maps_text_search(
+        keywords: str, city: str = "", citylimit: str = "false"
+    ) -> str:
+        """Search POIs by keyword, optionally within a city."""
+        return await respond(
+            "maps_text_search",
+            {"keywords": keywords, "city": city, "citylimit": citylimit},
+        )
+
+    @server.tool()
+    async def maps_search_detail(id: str) -> str:
+        """Details (location, address) of a POI by id."""
+        return await respond("maps_search_detail", {"id": id})
+
+    @server.tool()
+    async def maps_geo(address: str, city: str = "") -> str:
+        """Geocode an address or place name to "lng,lat"."""
+        return await respond("maps_geo", {"address": address, "city": city})
+
+    @server.tool()
+    async def maps_regeocode(location: str) -> str:
+        """Reverse geocode a "lng,lat" location."""
+        return await respond("maps_regeocode", {"location": location})
+
+    @server.tool()
+    async def maps_around_search(
+        location: str, radius: str = "1000", keywords: str = ""
+    ) -> str:
+        """Search POIs within a radius (metres) of a "lng,lat" location."""
+        return await respond(
+            "maps_around_search",
+            {"location": location, "radius": radius, "keywords": keywords},
+        )
+
+    @server.tool()
+    async def maps_weather(city: str) -> str:
+        """Weather forecast for a city."""
+        return await respond("maps_weather", {"city": city})
+
+    @server.tool()
+    async def maps_distance(origins: str, destination: str, type: str = "1") -> str:
+        """Distance and duration from "|"-separated origins to a destination."""
+        return await respond(
+            "maps_distance",
+            {"origins": origins, "destination": destination, "type": type},
+        )
+
+    @server.tool()
+    async def maps_direction_walking(origin: str, destination: str) -> str:
+        """Walking route between two "lng,lat" locations."""
+        return await respond(
+            "maps_direction_walking", {"origin": origin, "destination": destination}
+        )
+
+    @server.tool()
+    async def maps_direction_driving(origin: str, destination: str) -> str:
+        """Driving route between two "lng,lat" locations."""
+        return await respond(
+            "maps_direction_driving", {"origin": origin, "destination": destination}
+        )
+
+    @server.tool()
+    async def maps_direction_bicycling(origin: str, destination: str) -> str:
+        """Cycling route between two "lng,lat" locations."""
+        return await respond(
+            "maps_direction_bicycling", {"origin": origin, "destination": destination}
+        )
+
+    return server
+
+
+if __name__ == "__main__":
+    create_server(parse_args()).run()
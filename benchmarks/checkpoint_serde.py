@@ -0,0 +1,203 @@
+"""Checkpoint size and load time: plain vs compact encoding.
+
+Replays a planning conversation through a graph with the TravelState schema
+(extract, research, plan, refine, reply on every turn, and a plan change on
+later turns) once with LangGraph's plain msgpack checkpoints and once with the
+compact encoding, then reports storage per checkpoint and the time to load the
+latest state.
+
+Usage:
+    python benchmarks/checkpoint_serde.py [--turns 6] [--days 5] [--loads 50]
+                                          [--json out.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+from langgraph.graph import END, StateGraph  # noqa: E402
+
+from travel_assistant.backend.memory.checkpointer import open_checkpointer  # noqa: E402
+from travel_assistant.backend.memory.serde import CompactSerializer  # noqa: E402
+from travel_assistant.backend.schemas import (  # noqa: E402
+    CoordinateSchema,
+    DailyItinerarySchema,
+    TripNodeSchema,
+    TripSchema,
+)
+from travel_assistant.backend.state import TravelState  # noqa: E402
+
+
+def make_plan(days: int) -> TripSchema:
+    return TripSchema(
+        destination="Hangzhou",
+        start_date="2026-05-01",
+        end_date=f"2026-05-{days:02d}",
+        interests=["history", "food", "tea"],
+        itinerary=[
+            DailyItinerarySchema(
+                day=d,
+                summary=f"Lakes, temples and tea villages, day {d}",
+                nodes=[
+                    TripNodeSchema(
+                        name=f"Stop {d}-{i}",
+                        description=(
+                            f"Stop {i} of day {d}: walk the old streets, "
+                            "see the pagoda and try local snacks."
+                        ),
+                        start_time=f"{8 + 2 * i:02d}:00",
+                        end_time=f"{9 + 2 * i:02d}:30",
+                        coordinates=CoordinateSchema(
+                            lat=30.25 + d * 0.01,
+                            lng=120.15 + i * 0.01,
+                            address="West Lake District",
+                        ),
+                        cost=f"{20 * i} CNY",
+                        type="restaurant" if i == 2 else "attraction",
+                    )
+                    for i in range(6)
+                ],
+            )
+            for d in range(1, days + 1)
+        ],
+    )
+
+
+def build_graph(saver, days: int):
+    research = "\n".join(
+        f"- Place {i}: rating 4.{i % 10}, open 08:00-17:30, ticket {i * 5} CNY"
+        for i in range(60)
+    )
+
+    def refine(state):
+        plan = state.get("trip_plan") or make_plan(days)
+        turn = len(state["messages"])
+        itinerary = list(plan.itinerary)
+        first = itinerary[turn % len(itinerary)]
+        itinerary[turn % len(itinerary)] = first.model_copy(
+            update={"summary": f"{first.summary} (revised {turn})"}
+        )
+        return {"trip_plan": plan.model_copy(update={"itinerary": itinerary})}
+
+    nodes = [
+        (
+            "process_input",
+            lambda state: {"destination": "Hangzhou", "budget": "8000 CNY"},
+        ),
+        (
+            "gather_info",
+            lambda state: {
+                "attractions_info": research,
+                "weather_info": research[:800],
+                "hotel_info": research[:2000],
+            },
+        ),
+        (
+            "plan_itinerary",
+            lambda state: {"trip_plan": state.get("trip_plan") or make_plan(days)},
+        ),
+        ("refine_itinerary", refine),
+        ("validate_budget", lambda state: {"budget_status": "within budget"}),
+        (
+            "generate_response",
+            lambda state: {
+                "messages": [
+                    AIMessage(content="Here is the updated plan:\n" + research[:1500])
+                ]
+            },
+        ),
+    ]
+    builder = StateGraph(TravelState)
+    for name, fn in nodes:
+        builder.add_node(name, fn)
+    builder.set_entry_point(nodes[0][0])
+    for (a, _), (b, _) in zip(nodes, nodes[1:]):
+        builder.add_edge(a, b)
+    builder.add_edge(nodes[-1][0], END)
+    return builder.compile(checkpointer=saver)
+
+
+async def measure(compact: bool, turns: int, days: int, loads: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite")
+        saver = await open_checkpointer(path, maintenance_interval=0)
+        if not compact:
+            saver.compact, saver.serde = False, CompactSerializer(compress=False)
+        graph = build_graph(saver, days)
+        config = {"configurable": {"thread_id": "bench"}}
+        try:
+            for turn in range(turns):
+                await graph.ainvoke(
+                    {
+                        "messages": [
+                            HumanMessage(content=f"Turn {turn}: adjust the plan please")
+                        ]
+                    },
+                    config,
+                )
+
+            async with saver.conn.execute(
+                "SELECT COUNT(*), SUM(LENGTH(checkpoint)), "
+                "(SELECT COALESCE(SUM(LENGTH(data)), 0) FROM checkpoint_blobs) "
+                "FROM checkpoints"
+            ) as cursor:
+                count, checkpoint_bytes, blob_bytes = await cursor.fetchone()
+
+            # Cold: blobs read from disk; warm: raw blobs still cached from the writes
+            timings = {"cold": [], "warm": []}
+            for kind in ("cold", "warm"):
+                for _ in range(loads):
+                    if kind == "cold":
+                        saver._blob_cache.clear()
+                    started = time.perf_counter()
+                    await saver.aget_tuple(config)
+                    timings[kind].append(time.perf_counter() - started)
+        finally:
+            await saver.close()
+
+    return {
+        "encoding": "compact" if compact else "plain",
+        "checkpoints": count,
+        "bytes_per_checkpoint": round((checkpoint_bytes + blob_bytes) / count),
+        "load_ms_cold_p50": round(statistics.median(timings["cold"]) * 1000, 3),
+        "load_ms_warm_p50": round(statistics.median(timings["warm"]) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--loads", type=int, default=50)
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    results = [
+        asyncio.run(measure(compact, args.turns, args.days, args.loads))
+        for compact in (False, True)
+    ]
+    for result in results:
+        print(
+            f"{result['encoding']:>8}: {result['checkpoints']} checkpoints, "
+            f"{result['bytes_per_checkpoint']} bytes/checkpoint, "
+            f"load p50 {result['load_ms_cold_p50']:.2f} ms cold"
+            f" / {result['load_ms_warm_p50']:.2f} ms warm"
+        )
+    plain, compact = results
+    ratio = plain["bytes_per_checkpoint"] / compact["bytes_per_checkpoint"]
+    print(f"   ratio: {ratio:.1f}x smaller")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
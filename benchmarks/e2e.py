@@ -0,0 +1,306 @@
+"""End-to-end graph benchmark on fake backends.
+
+Runs the compiled travel graph many times with ``FakeChatModel`` and
+``FakeAmapManager`` (see fakes.py) in place of the LLM and the AMap server,
+so results depend only on the graph and its nodes. Each run is a new
+conversation: a planning request, optionally followed by change requests on
+the same thread. Reports p50/p95 of turn time, critical-path time and
+per-node wall time, and compares them against a stored baseline.
+
+With ``--stdio-amap`` the AMap calls go through a real MCPClientManager pool
+to amap_stdio_server.py (given the server's options) instead of the
+in-process fake, and ``--cache`` puts the shared result cache in front.
+
+Usage:
+    python benchmarks/e2e.py [--runs 20] [--turns 1] [--days 3] [--ttft 0.2]
+                             [--tps 200] [--amap-latency fixed:0.02]
+                             [--stdio-amap "--latency fixed:0.02"] [--cache]
+                             [--baseline benchmarks/baseline_e2e.json]
+                             [--update-baseline] [--check] [--json out.json]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import uuid
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fakes import FakeAmapManager, FakeChatModel, Latency, fake_backends  # noqa: E402
+from langchain_core.messages import HumanMessage  # noqa: E402
+from langgraph.checkpoint.memory import InMemorySaver  # noqa: E402
+
+from travel_assistant.backend.graph import create_builder  # noqa: E402
+from travel_assistant.backend.mcp_client import MCPClientManager  # noqa: E402
+from travel_assistant.backend.streaming import stream_turn  # noqa: E402
+from travel_assistant.backend.tools import AMAP_CALL_TIMEOUT, AMAP_POOL_SIZE  # noqa: E402
+from travel_assistant.backend.tools.cache import create_tool_cache  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline_e2e.json")
+SERVER_PATH = os.path.join(os.path.dirname(__file__), "amap_stdio_server.py")
+
+TURNS = [
+    "Plan a trip to Hangzhou from 2026-05-01 to 2026-05-03, budget 5000 CNY. "
+    "I like culture and food.",
+    "Please make the first morning more relaxed.",
+    "Swap the dinner on day 2 for somewhere near the lake.",
+]
+
+# A metric regresses when it is this much slower than the baseline,
+# relative and absolute
+TOLERANCE = 0.2
+MIN_DELTA_SECONDS = 0.02
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "count": len(values),
+    }
+
+
+async def run_benchmark(
+    runs: int = 20,
+    turns: int = 1,
+    llm: Optional[FakeChatModel] = None,
+    amap: Optional[Any] = None,
+    speculative: Optional[bool] = None,
+    quiet: bool = True,
+    cache: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """Run the graph ``runs`` times on fake backends and summarize the timings.
+
+    Args:
+        runs: Number of conversations.
+        turns: Turns per conversation (the planning request, then change requests).
+        llm: Fake chat model (default settings if omitted).
+        amap: AMap manager, fake or stdio (the fake with default settings if omitted).
+        speculative: Graph variant, as for ``create_builder``.
+        quiet: Swallow the nodes' debug output.
+        cache: AMap result cache (none by default).
+
+    Returns:
+        p50/p95 of turn, critical-path and per-node seconds, the most common
+        critical path, and the settings used.
+    """
+    llm = llm or FakeChatModel()
+    amap = amap or FakeAmapManager()
+    turn_seconds: List[float] = []
+    critical: List[float] = []
+    nodes: Dict[str, List[float]] = {}
+    paths: Dict[str, int] = {}
+
+    with fake_backends(llm, amap, cache):
+        graph = create_builder(speculative).compile(checkpointer=InMemorySaver())
+        await amap.start()
+        try:
+            for _ in range(runs):
+                config = {"configurable": {"thread_id": f"bench-{uuid.uuid4().hex}"}}
+                for prompt in TURNS[:turns]:
+                    output = io.StringIO() if quiet else sys.stdout
+                    timing = None
+                    with contextlib.redirect_stdout(output):
+                        async for event in stream_turn(
+                            graph,
+                            {"messages": [HumanMessage(content=prompt)]},
+                            config=config,
+                        ):
+                            if event.kind == "final":
+                                timing = event.timing
+                    if timing is None:
+                        raise RuntimeError(
+                            f"Turn ended without a final event: {prompt!r}"
+                        )
+                    turn_seconds.append(timing["turn_seconds"])
+                    critical.append(timing["critical_path_seconds"])
+                    for node, seconds in timing["nodes"].items():
+                        nodes.setdefault(node, []).append(seconds)
+                    path = " -> ".join(timing["critical_path"])
+                    paths[path] = paths.get(path, 0) + 1
+        finally:
+            await amap.close()
+
+    return {
+        "settings": {
+            "runs": runs,
+            "turns": turns,
+            "days": llm.days,
+            "ttft": llm.ttft,
+            "tokens_per_second": llm.tokens_per_second,
+            "amap": amap.latency.spec
+            if isinstance(amap, FakeAmapManager)
+            else " ".join(amap.args[1:]),
+            "amap_error_rate": getattr(amap, "error_rate", None),
+            "cache": cache is not None,
+        },
+        "turn_seconds": summarize(turn_seconds),
+        "critical_path_seconds": summarize(critical),
+        "critical_path": max(paths, key=paths.get) if paths else "",
+        "nodes": {node: summarize(values) for node, values in sorted(nodes.items())},
+    }
+
+
+def compare(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = TOLERANCE,
+    min_delta: float = MIN_DELTA_SECONDS,
+) -> List[str]:
+    """Metrics that are slower than the baseline beyond the tolerance.
+
+    Compares p50 and p95 of turn time, critical path and every node present in
+    both. A metric regresses when it is both ``tolerance`` (relative) and
+    ``min_delta`` seconds slower, so sub-millisecond noise never trips it.
+
+    Returns:
+        One line per regression, empty if there are none.
+    """
+    metrics = [
+        ("turn_seconds", results["turn_seconds"], baseline.get("turn_seconds")),
+        (
+            "critical_path_seconds",
+            results["critical_path_seconds"],
+            baseline.get("critical_path_seconds"),
+        ),
+    ]
+    for node, stats in results["nodes"].items():
+        metrics.append((f"node {node}", stats, baseline.get("nodes", {}).get(node)))
+
+    regressions = []
+    for name, current, base in metrics:
+        if not base:
+            continue
+        for q in ("p50", "p95"):
+            delta = current[q] - base[q]
+            if delta > min_delta and delta > base[q] * tolerance:
+                regressions.append(
+                    f"{name} {q}: {current[q] * 1000:.1f} ms"
+                    f" vs baseline {base[q] * 1000:.1f} ms"
+                )
+    return regressions
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    print(f"{'':32}{'p50 ms':>10}{'p95 ms':>10}")
+    for name in ("turn_seconds", "critical_path_seconds"):
+        stats = results[name]
+        print(f"{name:32}{stats['p50'] * 1000:10.1f}{stats['p95'] * 1000:10.1f}")
+    for node, stats in results["nodes"].items():
+        print(f"  {node:30}{stats['p50'] * 1000:10.1f}{stats['p95'] * 1000:10.1f}")
+    print(f"critical path: {results['critical_path']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument(
+        "--turns", type=int, default=1, choices=range(1, len(TURNS) + 1)
+    )
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument(
+        "--ttft", type=float, default=0.2, help="Fake LLM seconds to first token"
+    )
+    parser.add_argument(
+        "--tps", type=float, default=200.0, help="Fake LLM tokens per second"
+    )
+    parser.add_argument(
+        "--amap-latency",
+        default="fixed:0.02",
+        help="e.g. fixed:0.02, uniform:0.01:0.05, lognormal:0.02:0.5",
+    )
+    parser.add_argument("--amap-error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--stdio-amap",
+        metavar="SERVER_ARGS",
+        help="Use amap_stdio_server.py over MCP with these options, "
+        'e.g. "--latency fixed:0.02"',
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Put the AMap result cache in front of the server",
+    )
+    parser.add_argument(
+        "--speculative",
+        action="store_true",
+        help="Benchmark the speculative graph variant",
+    )
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store the results as the new baseline",
+    )
+    parser.add_argument(
+        "--check", action="store_true", help="Exit with status 1 on a regression"
+    )
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    llm = FakeChatModel(days=args.days, ttft=args.ttft, tokens_per_second=args.tps)
+    if args.stdio_amap is not None:
+        amap = MCPClientManager(
+            command=sys.executable,
+            args=[SERVER_PATH, *args.stdio_amap.split()],
+            server_name="amap_fixtures",
+            pool_size=max(AMAP_POOL_SIZE, 1),
+            call_timeout=AMAP_CALL_TIMEOUT,
+        )
+    else:
+        amap = FakeAmapManager(
+            latency=Latency(args.amap_latency, seed=0), error_rate=args.amap_error_rate
+        )
+    cache = create_tool_cache() if args.cache else None
+    results = asyncio.run(
+        run_benchmark(
+            args.runs, args.turns, llm, amap, args.speculative or None, cache=cache
+        )
+    )
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(
+            f"No baseline at {args.baseline}; run with --update-baseline to create one"
+        )
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("settings") != results["settings"]:
+        print(f"Baseline settings differ: {baseline.get('settings')}")
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print("No regressions against the baseline")
+    if regressions and args.check:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
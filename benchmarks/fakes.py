@@ -0,0 +1,688 @@
+"""Deterministic stand-ins for the LLM and AMap backends.
+
+Used by the offline benchmarks and load tests so the graph can run end to end
+without network access:
+
+- ``FakeChatModel`` answers every prompt the graph sends (input extraction,
+  planning, patches, tool-calling agents, the final answer) with canned but
+  well-formed output, after a configurable time to first token and at a
+  configurable token rate.
+- ``AmapFixtures`` answers AMap tool calls from a fixture dataset
+  (fixtures/amap.json); ``FakeAmapManager`` serves it in-process in place of
+  ``amap_manager``, with latency and error injection.
+- ``fake_backends`` patches both into the travel graph.
+"""
+
+import asyncio
+import contextlib
+import itertools
+import json
+import math
+import os
+import random
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from travel_assistant.backend.tracing import record_tool_call
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "amap.json")
+
+# Rough characters per token of the canned output
+CHARS_PER_TOKEN = 4
+
+
+class Latency:
+    """A latency distribution, parsed from "fixed:0.05", "uniform:0.02:0.08"
+    or "lognormal:0.05:0.5" (median and sigma)."""
+
+    def __init__(self, spec: str = "fixed:0", seed: Optional[int] = None):
+        kind, *params = spec.split(":")
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+        self.spec = spec
+        self.kind = kind
+        self.params = [float(p) for p in params] or [0.0]
+        self._rng = random.Random(seed)
+
+    def sample(self) -> float:
+        if self.kind == "uniform":
+            return self._rng.uniform(self.params[0], self.params[1])
+        if self.kind == "lognormal":
+            median, sigma = (
+                self.params[0],
+                self.params[1] if len(self.params) > 1 else 0.5,
+            )
+            return median * math.exp(self._rng.gauss(0, sigma))
+        return self.params[0]
+
+    def __repr__(self) -> str:
+        return f"Latency({self.spec!r})"
+
+
+def load_fixtures(path: str = FIXTURES_PATH) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _parse_location(location: str) -> List[float]:
+    lng, lat = (float(part) for part in location.split(",")[:2])
+    return [lng, lat]
+
+
+def _km(a: List[float], b: List[float]) -> float:
+    # Equirectangular is plenty at city scale
+    dx = (a[0] - b[0]) * 111.32 * math.cos(math.radians((a[1] + b[1]) / 2))
+    dy = (a[1] - b[1]) * 111.32
+    return math.hypot(dx, dy)
+
+
+class AmapFixtures:
+    """AMap tool responses built from a fixture dataset.
+
+    Args:
+        data: Parsed fixture data (see fixtures/amap.json).
+        payload_pois: Max POIs per search response.
+        padding_bytes: Extra bytes added to every response, to model large payloads.
+        route_points: Points per direction route polyline.
+    """
+
+    def __init__(
+        self,
+        data: Optional[Dict[str, Any]] = None,
+        payload_pois: int = 10,
+        padding_bytes: int = 0,
+        route_points: int = 50,
+    ):
+        self.data = data or load_fixtures()
+        self.payload_pois = payload_pois
+        self.padding_bytes = padding_bytes
+        self.route_points = route_points
+        self.pois = []
+        for city, info in self.data["cities"].items():
+            for i, poi in enumerate(info["pois"]):
+                self.pois.append(
+                    {**poi, "city": city, "id": f"B0{info['adcode']}{i:04d}"}
+                )
+        self._by_id = {poi["id"]: poi for poi in self.pois}
+
+    def city(self, name: Optional[str]) -> Optional[str]:
+        for city, info in self.data["cities"].items():
+            if name and (
+                name.lower() in city.lower()
+                or city.lower() in name.lower()
+                or name == info["adcode"]
+            ):
+                return city
+        return None
+
+    def search(self, keywords: str, city: Optional[str] = None) -> List[Dict[str, Any]]:
+        city = self.city(city)
+        pois = [p for p in self.pois if city is None or p["city"] == city]
+        words = (keywords or "").lower()
+        type_words = {
+            "hotel": "住宿",
+            "restaurant": "餐饮",
+            "museum": "博物馆",
+            "temple": "寺庙",
+        }
+        matches = [
+            p for p in pois if p["name"].lower() in words or words in p["name"].lower()
+        ]
+        matches += [
+            p
+            for p in pois
+            if any(k in words and v in p["type"] for k, v in type_words.items())
+            and p not in matches
+        ]
+        return (matches or pois)[: self.payload_pois]
+
+    def respond(self, tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        """The response of one tool call, as the AMap server's JSON."""
+        handler = getattr(self, f"_{tool_name}", None)
+        if handler is None:
+            return {"error": f"Unknown tool: {tool_name}"}
+        result = handler(args)
+        if self.padding_bytes:
+            result["padding"] = "x" * self.padding_bytes
+        return result
+
+    def _maps_text_search(self, args):
+        pois = self.search(args.get("keywords", ""), args.get("city"))
+        return {
+            "suggestion": {"keywords": [], "ciytes": []},
+            "pois": [
+                {
+                    "id": p["id"],
+                    "name": p["name"],
+                    "address": p["address"],
+                    "typecode": p["type"],
+                }
+                for p in pois
+            ],
+        }
+
+    def _maps_search_detail(self, args):
+        poi = self._by_id.get(args.get("id"))
+        if poi is None:
+            return {"error": "POI not found"}
+        return {
+            "id": poi["id"],
+            "name": poi["name"],
+            "location": poi["location"],
+            "address": poi["address"],
+            "city": poi["city"],
+            "type": poi["type"],
+        }
+
+    def _maps_geo(self, args):
+        address = (args.get("address") or "").lower()
+        city = self.city(args.get("city"))
+        for poi in self.pois:
+            if poi["name"].lower() == address and (city is None or poi["city"] == city):
+                return {
+                    "return": [
+                        {
+                            "country": "中国",
+                            "city": poi["city"],
+                            "location": poi["location"],
+                            "level": "兴趣点",
+                        }
+                    ]
+                }
+        if city:
+            return {
+                "return": [
+                    {
+                        "country": "中国",
+                        "city": city,
+                        "location": self.data["cities"][city]["center"],
+                        "level": "市",
+                    }
+                ]
+            }
+        return {"return": []}
+
+    def _maps_regeocode(self, args):
+        point = _parse_location(args.get("location", "0,0"))
+        nearest = min(
+            self.pois, key=lambda p: _km(point, _parse_location(p["location"]))
+        )
+        return {
+            "province": "浙江省",
+            "city": nearest["city"],
+            "district": "",
+            "address": nearest["address"],
+        }
+
+    def _maps_weather(self, args):
+        city = self.city(args.get("city"))
+        if city is None:
+            return {"error": "City not found"}
+        return {"city": city, "forecasts": self.data["cities"][city]["weather"]}
+
+    def _maps_around_search(self, args):
+        center = _parse_location(args.get("location", "0,0"))
+        radius_km = float(args.get("radius") or 1000) / 1000
+        words = (args.get("keywords") or "").lower()
+        pois = sorted(
+            (
+                p
+                for p in self.pois
+                if _km(center, _parse_location(p["location"])) <= radius_km
+            ),
+            key=lambda p: _km(center, _parse_location(p["location"])),
+        )
+        if words:
+            pois = [
+                p
+                for p in pois
+                if words in p["name"].lower() or words in p["type"].lower()
+            ] or pois
+        return {
+            "pois": [
+                {
+                    "id": p["id"],
+                    "name": p["name"],
+                    "address": p["address"],
+                    "typecode": p["type"],
+                }
+                for p in pois[: self.payload_pois]
+            ]
+        }
+
+    def _maps_distance(self, args):
+        dest = _parse_location(args.get("destination", "0,0"))
+        walking = str(args.get("type")) == "3"
+        results = []
+        for i, origin in enumerate((args.get("origins") or "").split("|"), start=1):
+            if not origin:
+                continue
+            km = _km(_parse_location(origin), dest) * (
+                1.0 if str(args.get("type")) == "0" else 1.3
+            )
+            speed = 4.5 if walking else 25.0
+            results.append(
+                {
+                    "origin_id": str(i),
+                    "dest_id": "1",
+                    "distance": str(round(km * 1000)),
+                    "duration": str(round(km / speed * 3600)),
+                }
+            )
+        return {"results": results}
+
+    def _direction(self, args, speed_kmh):
+        a = _parse_location(args.get("origin", "0,0"))
+        b = _parse_location(args.get("destination", "0,0"))
+        km = _km(a, b) * 1.3
+        n = max(self.route_points, 2)
+        # A gently curving line between the two points
+        points = []
+        for i in range(n):
+            t = i / (n - 1)
+            bend = math.sin(t * math.pi) * 0.002
+            lng = a[0] + (b[0] - a[0]) * t + bend
+            lat = a[1] + (b[1] - a[1]) * t - bend
+            points.append(f"{lng:.6f},{lat:.6f}")
+        return {
+            "origin": args.get("origin"),
+            "destination": args.get("destination"),
+            "paths": [
+                {
+                    "distance": str(round(km * 1000)),
+                    "duration": str(round(km / speed_kmh * 3600)),
+                    "steps": [
+                        {
+                            "instruction": "Head towards the destination",
+                            "polyline": ";".join(points),
+                        }
+                    ],
+                }
+            ],
+        }
+
+    def _maps_direction_walking(self, args):
+        return self._direction(args, 4.5)
+
+    def _maps_direction_driving(self, args):
+        return self._direction(args, 25.0)
+
+    def _maps_direction_bicycling(self, args):
+        return self._direction(args, 12.0)
+
+
+class _FakeToolResult:
+    """The parts of an MCP CallToolResult that callers use."""
+
+    def __init__(self, text: str, is_error: bool = False):
+        self.isError = is_error
+        self.content = [type("TextContent", (), {"type": "text", "text": text})()]
+
+
+class FakeAmapManager:
+    """In-process replacement for ``amap_manager`` (an MCPClientManager).
+
+    Args:
+        fixtures: Response source.
+        latency: Per-call latency distribution.
+        error_rate: Fraction of calls that fail with an MCP tool error.
+        seed: Seed for error injection.
+    """
+
+    def __init__(
+        self,
+        fixtures: Optional[AmapFixtures] = None,
+        latency: Optional[Latency] = None,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.fixtures = fixtures or AmapFixtures()
+        self.latency = latency or Latency("fixed:0.02", seed=seed)
+        self.error_rate = error_rate
+        self.server_name = "fake_amap"
+        self.calls = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+
+    async def start(self, timeout: Optional[float] = None) -> int:
+        return 1
+
+    async def close(self) -> None:
+        pass
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "errors": self.errors}
+
+    async def execute_tool(self, tool_name: str, tool_args: Dict[str, Any]) -> str:
+        self.calls += 1
+        started = time.perf_counter()
+        await asyncio.sleep(self.latency.sample())
+        error = self._rng.random() < self.error_rate
+        if error:
+            self.errors += 1
+            output = (
+                f"Error executing {tool_name} on {self.server_name}: injected failure"
+            )
+        else:
+            output = json.dumps(
+                self.fixtures.respond(tool_name, tool_args), ensure_ascii=False
+            )
+        # Recorded like MCPClientManager.execute_tool does
+        record_tool_call(
+            self.server_name,
+            tool_name,
+            time.perf_counter() - started,
+            len(output.encode("utf-8")),
+            error,
+        )
+        return output
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model with canned answers for every prompt the travel graph sends.
+
+    Structured output follows ChatOpenAI's json_schema mode: the JSON document
+    is streamed as message content and parsed afterwards, so the planner's
+    incremental day parser sees the same token stream as with a real model.
+    """
+
+    destination: str = "Hangzhou"
+    days: int = 3
+    start_date: str = "2026-05-01"
+    budget: str = "5000 CNY"
+    ttft: float = 0.2
+    tokens_per_second: float = 200.0
+    response_tokens: int = 150
+    chunk_tokens: int = 8
+    seed: int = 0
+    model_name: str = "fake-chat"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-travel-chat"
+
+    def bind_tools(self, tools: List[Any], tool_choice: Any = None, **kwargs: Any):
+        return self.bind(
+            tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs
+        )
+
+    def with_structured_output(self, schema: Any, **kwargs: Any):
+        return self.bind(structured_schema=schema.__name__) | RunnableLambda(
+            lambda message: schema.model_validate_json(message.content)
+        )
+
+    # -- canned content --------------------------------------------------------
+
+    def _pois(self, kind: str) -> List[Dict[str, Any]]:
+        fixtures = load_fixtures()["cities"].get(self.destination, {"pois": []})["pois"]
+        marker = {
+            "attraction": ("风景名胜", "博物馆", "步行街", "村庄", "公园"),
+            "restaurant": ("餐饮",),
+            "hotel": ("住宿",),
+        }[kind]
+        return [p for p in fixtures if any(m in p["type"] for m in marker)] or [
+            {"name": f"{self.destination} {kind}"}
+        ]
+
+    def _plan(self) -> Dict[str, Any]:
+        attractions = itertools.cycle(self._pois("attraction"))
+        restaurants = itertools.cycle(self._pois("restaurant"))
+        hotel = self._pois("hotel")[0]["name"]
+        days = []
+        for d in range(1, self.days + 1):
+            slots = [
+                ("09:00", "11:00", next(attractions)["name"], "attraction", "60 CNY"),
+                ("11:30", "12:30", next(restaurants)["name"], "restaurant", "150 CNY"),
+                ("13:30", "15:30", next(attractions)["name"], "attraction", "40 CNY"),
+                ("16:00", "17:30", next(attractions)["name"], "attraction", "Free"),
+                ("18:30", "20:00", next(restaurants)["name"], "restaurant", "200 CNY"),
+                ("21:00", "22:00", hotel, "hotel", "900 CNY"),
+            ]
+            days.append(
+                {
+                    "day": d,
+                    "date": None,
+                    "summary": f"Day {d} in {self.destination}",
+                    "nodes": [
+                        {
+                            "name": name,
+                            "description": (
+                                f"Visit {name} and take your time to enjoy it."
+                            ),
+                            "start_time": start,
+                            "end_time": end,
+                            "type": kind,
+                            "cost": cost,
+                        }
+                        for start, end, name, kind, cost in slots
+                    ],
+                }
+            )
+        return {
+            "destination": self.destination,
+            "start_date": self.start_date,
+            "end_date": None,
+            "budget": self.budget,
+            "interests": ["culture", "food"],
+            "travelers": 2,
+            "itinerary": days,
+            "notes": [{"category": "weather", "content": "Bring an umbrella."}],
+        }
+
+    def _answer(self, messages: List[BaseMessage], **kwargs: Any) -> AIMessage:
+        schema = kwargs.get("structured_schema")
+        tools = kwargs.get("tools")
+        if schema == "InputSchema":
+            return AIMessage(
+                content=json.dumps(
+                    {
+                        "destination": self.destination,
+                        "start_date": self.start_date,
+                        "end_date": None,
+                        "budget": self.budget,
+                        "interests": ["culture", "food"],
+                    }
+                )
+            )
+        if schema == "TripSchema":
+            return AIMessage(content=json.dumps(self._plan(), ensure_ascii=False))
+        if schema == "PlanPatchSchema":
+            return AIMessage(
+                content=json.dumps(
+                    {
+                        "edits": [
+                            {
+                                "op": "update",
+                                "day": 1,
+                                "index": 0,
+                                "updates": {"description": "Updated as requested."},
+                            }
+                        ]
+                    }
+                )
+            )
+        if schema:
+            raise ValueError(f"FakeChatModel has no canned answer for {schema}")
+        if tools:
+            if isinstance(messages[-1], ToolMessage):
+                return AIMessage(
+                    content=f"Summary of results: {messages[-1].content[:400]}"
+                )
+            tool = tools[0]["function"]
+            required = (
+                tool.get("parameters", {}).get("required")
+                or list(tool.get("parameters", {}).get("properties", {}))[:1]
+            )
+            call_id = (
+                f"call_{random.Random(self.seed + len(messages)).randrange(10**8)}"
+            )
+            return AIMessage(
+                content="",
+                tool_calls=[
+                    {
+                        "name": tool["name"],
+                        "args": {name: self.destination for name in required},
+                        "id": call_id,
+                    }
+                ],
+            )
+        words = " ".join(
+            f"{self.destination} is wonderful in spring"
+            for _ in range(self.response_tokens // 5 + 1)
+        )
+        return AIMessage(content=words[: self.response_tokens * CHARS_PER_TOKEN])
+
+    def _tokens(self, message: AIMessage) -> int:
+        text = message.content if isinstance(message.content, str) else ""
+        return max(
+            1, (len(text) + len(json.dumps(message.tool_calls))) // CHARS_PER_TOKEN
+        )
+
+    def _usage(self, messages: List[BaseMessage], message: AIMessage) -> Dict[str, int]:
+        prompt = sum(len(str(m.content)) for m in messages) // CHARS_PER_TOKEN
+        completion = self._tokens(message)
+        return {
+            "input_tokens": prompt,
+            "output_tokens": completion,
+            "total_tokens": prompt + completion,
+        }
+
+    # -- BaseChatModel -----------------------------------------------------------
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._answer(messages, **kwargs)
+        time.sleep(self.ttft + self._tokens(message) / self.tokens_per_second)
+        message.usage_metadata = self._usage(messages, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._answer(messages, **kwargs)
+        await asyncio.sleep(self.ttft + self._tokens(message) / self.tokens_per_second)
+        message.usage_metadata = self._usage(messages, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, message: AIMessage) -> Iterator[AIMessageChunk]:
+        if message.tool_calls:
+            yield AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {
+                        "name": tc["name"],
+                        "args": json.dumps(tc["args"]),
+                        "id": tc["id"],
+                        "index": i,
+                    }
+                    for i, tc in enumerate(message.tool_calls)
+                ],
+            )
+            return
+        size = self.chunk_tokens * CHARS_PER_TOKEN
+        for i in range(0, len(message.content), size):
+            yield AIMessageChunk(content=message.content[i : i + size])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ):
+        message = self._answer(messages, **kwargs)
+        await asyncio.sleep(self.ttft)
+        for chunk in self._chunks(message):
+            await asyncio.sleep(self.chunk_tokens / self.tokens_per_second)
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.content, chunk=generation)
+            yield generation
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="", usage_metadata=self._usage(messages, message)
+            )
+        )
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ):
+        message = self._answer(messages, **kwargs)
+        time.sleep(self.ttft)
+        for chunk in self._chunks(message):
+            time.sleep(self.chunk_tokens / self.tokens_per_second)
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.content, chunk=generation)
+            yield generation
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="", usage_metadata=self._usage(messages, message)
+            )
+        )
+
+
+@contextlib.contextmanager
+def fake_backends(
+    llm: Optional[FakeChatModel] = None,
+    amap: Optional[Any] = None,
+    cache: Optional[Any] = None,
+):
+    """Patch the fake LLM and AMap manager into the travel graph.
+
+    The POI store is bypassed, and so is the AMap result cache unless one is
+    given, so every run does the same amount of work.
+
+    Args:
+        llm: Fake chat model.
+        amap: AMap manager: a FakeAmapManager, or an MCPClientManager running
+            amap_stdio_server.py.
+        cache: AMap result cache to use (None disables caching).
+
+    Yields:
+        The (llm, amap) pair in use.
+    """
+    from unittest.mock import patch
+
+    llm = llm or FakeChatModel()
+    amap = amap or FakeAmapManager()
+
+    def get_llm(structured_output=None, **kwargs):
+        return (
+            llm.with_structured_output(structured_output) if structured_output else llm
+        )
+
+    with (
+        patch("travel_assistant.backend.agents.nodes.get_llm", new=get_llm),
+        patch("travel_assistant.backend.agents.nodes.tool_llm", new=llm),
+        patch("travel_assistant.backend.tools.amap_manager", new=amap),
+        patch("travel_assistant.backend.tools.amap_cache", new=cache),
+        patch("travel_assistant.backend.tools.get_poi_store", return_value=None),
+        patch(
+            "travel_assistant.backend.tools.geocoding.get_poi_store", return_value=None
+        ),
+    ):
+        yield llm, amap
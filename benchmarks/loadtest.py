@@ -0,0 +1,283 @@
+"""Concurrent multi-session load test.
+
+Runs N conversations at once on one event loop, each on its own thread_id,
+through the compiled graph with the SQLite checkpointer: create a plan, then
+change it twice (the flow of tests/test_memory_flow.py). Backends are the
+fakes of fakes.py by default; ``--backends real`` uses the configured LLM and
+amap server. Reports throughput, turn latency percentiles, event-loop lag and
+checkpointer lock contention per concurrency level as JSON.
+
+Usage:
+    python benchmarks/loadtest.py [--sessions 1,5,10,20] [--turns 3]
+                                  [--backends fake|real] [--ttft 0.2] [--tps 200]
+                                  [--stdio-amap "--latency fixed:0.02"] [--cache]
+                                  [--db path.sqlite] [--report loadtest_report.json]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from e2e import SERVER_PATH, TURNS  # noqa: E402
+from fakes import FakeAmapManager, FakeChatModel, Latency, fake_backends  # noqa: E402
+from langchain_core.messages import HumanMessage  # noqa: E402
+
+from travel_assistant.backend.graph import create_builder  # noqa: E402
+from travel_assistant.backend.mcp_client import MCPClientManager  # noqa: E402
+from travel_assistant.backend.memory.checkpointer import open_checkpointer  # noqa: E402
+from travel_assistant.backend.metrics import percentile  # noqa: E402
+from travel_assistant.backend.streaming import stream_turn  # noqa: E402
+from travel_assistant.backend.tools import AMAP_CALL_TIMEOUT, AMAP_POOL_SIZE  # noqa: E402
+from travel_assistant.backend.tools.cache import create_tool_cache  # noqa: E402
+
+REPORT_PATH = "loadtest_report.json"
+
+# How often the lag monitor wakes up, in seconds
+LAG_INTERVAL = 0.01
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(samples),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples, default=0.0) * 1000,
+    }
+
+
+async def monitor_lag(
+    samples: List[float], stop: asyncio.Event, interval: float = LAG_INTERVAL
+) -> None:
+    """Record how late the loop wakes a sleeping task.
+
+    The lag is time the loop spent busy in other code.
+    """
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(loop.time() - expected, 0.0))
+
+
+async def run_session(
+    graph, turns: int, latencies: List[List[float]], errors: List[str]
+) -> None:
+    config = {"configurable": {"thread_id": f"load-{uuid.uuid4().hex}"}}
+    for i, prompt in enumerate(TURNS[:turns]):
+        started = time.perf_counter()
+        try:
+            async for event in stream_turn(
+                graph, {"messages": [HumanMessage(content=prompt)]}, config=config
+            ):
+                if event.kind == "final" and not event.state.get("trip_plan"):
+                    errors.append(f"turn {i + 1}: no plan in the final state")
+        except Exception as e:
+            errors.append(f"turn {i + 1}: {type(e).__name__}: {e}")
+            return
+        latencies[i].append(time.perf_counter() - started)
+
+
+async def run_level(graph, saver, sessions: int, turns: int) -> Dict[str, Any]:
+    """Run ``sessions`` concurrent conversations and summarize them."""
+    latencies: List[List[float]] = [[] for _ in range(turns)]
+    errors: List[str] = []
+    lag: List[float] = []
+    lock_before = saver.lock.stats()
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_lag(lag, stop))
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *[run_session(graph, turns, latencies, errors) for _ in range(sessions)]
+    )
+    wall = time.perf_counter() - started
+    stop.set()
+    await monitor
+
+    lock = saver.lock.stats()
+    contended = lock["lock_contended"] - lock_before["lock_contended"]
+    completed = sum(len(turn) for turn in latencies)
+    return {
+        "sessions": sessions,
+        "turns": completed,
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "wall_seconds": wall,
+        "turns_per_second": completed / wall if wall else 0.0,
+        "sessions_per_minute": sessions * 60 / wall if wall else 0.0,
+        "turn_latency": latency_summary([s for turn in latencies for s in turn]),
+        "turn_latency_by_index": [latency_summary(turn) for turn in latencies],
+        "loop_lag": latency_summary(lag),
+        "checkpointer": {
+            "lock_acquisitions": lock["lock_acquisitions"]
+            - lock_before["lock_acquisitions"],
+            "lock_contended": contended,
+            "lock_wait_seconds": lock["lock_wait_seconds"]
+            - lock_before["lock_wait_seconds"],
+            "lock_wait_p99_ms": lock["lock_wait_p99_ms"],
+        },
+    }
+
+
+async def run_load_test(
+    levels: List[int],
+    turns: int = 3,
+    db_path: Optional[str] = None,
+    backends: str = "fake",
+    llm: Optional[FakeChatModel] = None,
+    amap: Optional[Any] = None,
+    cache: Optional[Any] = None,
+    quiet: bool = True,
+) -> Dict[str, Any]:
+    """Run the load test at each concurrency level, on one graph and checkpointer.
+
+    Args:
+        levels: Numbers of concurrent sessions, run one after another.
+        turns: Turns per session (the plan, then change requests).
+        db_path: SQLite checkpoint file (a temporary one if omitted).
+        backends: "fake" for FakeChatModel and a fake or stdio AMap manager,
+            "real" for the configured LLM and amap server.
+        llm: Fake chat model (fake backends only).
+        amap: AMap manager (fake backends only).
+        cache: AMap result cache (fake backends only; none by default).
+        quiet: Swallow the nodes' debug output.
+
+    Returns:
+        The machine-readable report: settings, one entry per level and the
+        checkpointer's final report.
+    """
+    tmp = tempfile.TemporaryDirectory() if db_path is None else None
+    db_path = db_path or os.path.join(tmp.name, "loadtest.sqlite")
+    if backends == "fake":
+        llm = llm or FakeChatModel()
+        amap = amap or FakeAmapManager()
+        patched = fake_backends(llm, amap, cache)
+    else:
+        from travel_assistant.backend.tools import amap_manager as amap
+
+        patched = contextlib.nullcontext()
+
+    output = io.StringIO() if quiet else sys.stdout
+    with patched, contextlib.redirect_stdout(output):
+        saver = await open_checkpointer(db_path, maintenance_interval=0)
+        try:
+            graph = create_builder().compile(checkpointer=saver)
+            await amap.start()
+            results = [
+                await run_level(graph, saver, sessions, turns) for sessions in levels
+            ]
+            checkpointer = await saver.report()
+        finally:
+            await amap.close()
+            await saver.close()
+            if tmp is not None:
+                tmp.cleanup()
+
+    return {
+        "settings": {
+            "levels": levels,
+            "turns": turns,
+            "backends": backends,
+            "llm": {
+                "ttft": llm.ttft,
+                "tokens_per_second": llm.tokens_per_second,
+                "days": llm.days,
+            }
+            if llm
+            else None,
+            "amap": amap.latency.spec
+            if isinstance(amap, FakeAmapManager)
+            else " ".join(amap.args),
+            "cache": cache is not None,
+        },
+        "levels": results,
+        "checkpointer": checkpointer,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sessions", default="1,5,10,20", help="Comma-separated concurrency levels"
+    )
+    parser.add_argument(
+        "--turns", type=int, default=3, choices=range(1, len(TURNS) + 1)
+    )
+    parser.add_argument("--backends", choices=("fake", "real"), default="fake")
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument(
+        "--ttft", type=float, default=0.2, help="Fake LLM seconds to first token"
+    )
+    parser.add_argument(
+        "--tps", type=float, default=200.0, help="Fake LLM tokens per second"
+    )
+    parser.add_argument("--amap-latency", default="fixed:0.02")
+    parser.add_argument(
+        "--stdio-amap",
+        metavar="SERVER_ARGS",
+        help="Use amap_stdio_server.py over MCP with these options",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Put the AMap result cache in front of the server",
+    )
+    parser.add_argument(
+        "--db", help="SQLite checkpoint file (default: a temporary file)"
+    )
+    parser.add_argument(
+        "--report", default=REPORT_PATH, help="Where to write the JSON report"
+    )
+    args = parser.parse_args()
+
+    llm = amap = None
+    if args.backends == "fake":
+        llm = FakeChatModel(days=args.days, ttft=args.ttft, tokens_per_second=args.tps)
+        if args.stdio_amap is not None:
+            amap = MCPClientManager(
+                command=sys.executable,
+                args=[SERVER_PATH, *args.stdio_amap.split()],
+                server_name="amap_fixtures",
+                pool_size=max(AMAP_POOL_SIZE, 1),
+                call_timeout=AMAP_CALL_TIMEOUT,
+            )
+        else:
+            amap = FakeAmapManager(latency=Latency(args.amap_latency, seed=0))
+    levels = [int(level) for level in args.sessions.split(",")]
+    cache = create_tool_cache() if args.cache else None
+
+    report = asyncio.run(
+        run_load_test(levels, args.turns, args.db, args.backends, llm, amap, cache)
+    )
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(
+        f"{'sessions':>8}{'turns/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+        f"{'lag p99':>10}{'lock waits':>12}{'errors':>8}"
+    )
+    for level in report["levels"]:
+        latency = level["turn_latency"]
+        print(
+            f"{level['sessions']:8}{level['turns_per_second']:10.2f}"
+            f"{latency['p50_ms']:10.0f}{latency['p99_ms']:10.0f}"
+            f"{level['loop_lag']['p99_ms']:10.1f}"
+            f"{level['checkpointer']['lock_contended']:12}{level['errors']:8}"
+        )
+    print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,146 @@
 """Node definitions for the travel assistant graph."""
 
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.runnables.config import ensure_config, merge_configs
+from langgraph.config import get_stream_writer
+import asyncio
 import datetime
+import os
 
 from travel_assistant.backend.config import get_llm
+from travel_assistant.backend.context import ExtractionContext, format_turns
+from travel_assistant.backend.distance import amap_upgrade_enabled, plan_distances, upgrade_legs
+from travel_assistant.backend.enrichment import (
+    apply_geocodes,
+    apply_refine_patch,
+    drop_coordinates,
+    drop_patch_coordinates,
+    enrichment_key,
+    pending_nodes,
+    record_enrichment,
+    record_geocodes,
+    restore_enrichment,
+)
+from travel_assistant.backend.metrics import metrics
+from travel_assistant.backend.plan_patch import PlanPatchError, apply_plan_patch
+from travel_assistant.backend.plan_stream import IncrementalTripParser, PlanStreamHandler
+from travel_assistant.backend.route_optimizer import optimize_itinerary, route_optimization_enabled
 from travel_assistant.backend.prompts import (
+    CONVERSATION_SUMMARY_SYSTEM_PROMPT,
     INPUT_EXTRACTION_SYSTEM_PROMPT, 
     PLANNER_SYSTEM_PROMPT, 
     RESPONSE_SYSTEM_PROMPT, 
     PLANNER_MODIFICATION_SYSTEM_PROMPT,
-    get_planner_user_prompt
+    PLANNER_PATCH_SYSTEM_PROMPT,
+    get_conversation_summary_user_prompt,
+    get_plan_patch_user_prompt,
+    get_planner_user_prompt,
+    get_refine_user_prompt
 )
-from travel_assistant.backend.schemas import InputSchema, TripSchema
+from travel_assistant.backend.schemas import InputSchema, PlanPatchSchema, TripSchema
 from travel_assistant.backend.state import TravelState
 from travel_assistant.backend.tools import search_destinations, get_weather, search_hotels
 from travel_assistant.backend.tools.calculator import calculate_itinerary_cost, parse_cost
+from travel_assistant.backend.tools.geocoding import geocode_places
+
+
+def _extraction_messages(state: TravelState, context: ExtractionContext) -> list:
+    """Build the extraction prompt from known details, the summary and recent turns."""
+    current_date = datetime.datetime.now().strftime("%Y-%m-%d")
+    
+    messages = [
+        SystemMessage(content=INPUT_EXTRACTION_SYSTEM_PROMPT),
+        HumanMessage(content=f"Current Date: {current_date}\n\n{context.history()}")
+    ]
+
+    # Recorded per turn to check that prompt size levels off in long conversations
+    tokens = count_tokens_approximately(messages)
+    metrics.observe("prompt_tokens", tokens, node="process_input")
+    return messages
+
+
+def _summary_messages(context: ExtractionContext) -> list | None:
+    """Prompt folding turns that left the recent window into the summary, if any did."""
+    if not context.to_summarize:
+        return None
+    return [
+        SystemMessage(content=CONVERSATION_SUMMARY_SYSTEM_PROMPT),
+        HumanMessage(content=get_conversation_summary_user_prompt(context.summary, format_turns(context.to_summarize)))
+    ]
+
+
+def _summary_updates(context: ExtractionContext, response) -> dict:
+    text = getattr(response, "content", None)
+    if not isinstance(text, str) or not text.strip():
+        text = context.fallback_summary()
+    return context.summary_update(text)
+
+
+def _summary_llm():
+    return get_llm(model_key="TOOL", model_name="Qwen/Qwen2.5-7B-Instruct", cache_namespace="conversation_summary")
+
+
+def update_summary(context: ExtractionContext) -> dict:
+    """Extend the rolling conversation summary (no-op while it's up to date)."""
+    messages = _summary_messages(context)
+    if messages is None:
+        return {}
+    try:
+        response = _summary_llm().invoke(messages)
+    except Exception as e:
+        print(f"Error summarizing conversation: {e}")
+        response = None
+    return _summary_updates(context, response)
+
+
+async def aupdate_summary(context: ExtractionContext) -> dict:
+    """Async variant of update_summary."""
+    messages = _summary_messages(context)
+    if messages is None:
+        return {}
+    try:
+        response = await _summary_llm().ainvoke(messages)
+    except Exception as e:
+        print(f"Error summarizing conversation: {e}")
+        response = None
+    return _summary_updates(context, response)
+
+
+def _extraction_updates(state: TravelState, extraction: InputSchema) -> dict:
+    """Turn an extracted InputSchema into graph state updates."""
+    current_date = datetime.datetime.now().strftime("%Y-%m-%d")
+    
+    updates = {}
+    if extraction.destination:
+        updates["destination"] = extraction.destination
+        
+    if extraction.start_date and extraction.end_date:
+        updates["travel_dates"] = {"start": extraction.start_date, "end": extraction.end_date}
+    elif not state.get("travel_dates"):
+        # Dates extracted on an earlier turn still apply; otherwise
+        # fallback to current date if not specified
+        # We assume a 3-day trip if not specified, starting today
+        end_date_obj = datetime.datetime.now() + datetime.timedelta(days=2)
+        end_date = end_date_obj.strftime("%Y-%m-%d")
+        updates["travel_dates"] = {"start": current_date, "end": end_date}
+        
+    if extraction.budget:
+        updates["budget"] = extraction.budget
+    if extraction.interests:
+        updates["preferences"] = {"interests": extraction.interests}
+        
+    # Check if this is a modification request
+    # If we already have a plan, and the user input is treated as "interests" or just general conversational, 
+    # it might be feedback.
+    # But for robustness, let's assume if there's a plan, the latest message is potential feedback.
+    if state.get("trip_plan"):
+         # Get the latest human message content
+         last_msg = state["messages"][-1]
+         if isinstance(last_msg, HumanMessage):
+             updates["user_feedback"] = last_msg.content
+        
+    return updates
 
 
 def process_input(state: TravelState) -> TravelState:
@@ -32,78 +158,51 @@ def process_input(state: TravelState) -> TravelState:
     Returns:
         Updated state with extracted information.
     """
-    llm = get_llm(structured_output=InputSchema, model_name="Pro/zai-org/GLM-4.7")
-    
-    # Format conversation history
-    history = "\n".join([f"{msg.type}: {msg.content}" for msg in state["messages"]])
-    
-    current_date = datetime.datetime.now().strftime("%Y-%m-%d")
+    llm = get_llm(structured_output=InputSchema, model_name="Pro/zai-org/GLM-4.7", cache_namespace="process_input")
+    context = ExtractionContext(state)
     
     try:
-        extraction = llm.invoke([
-            SystemMessage(content=INPUT_EXTRACTION_SYSTEM_PROMPT),
-            HumanMessage(content=f"Current Date: {current_date}\n\nConversation History:\n{history}")
-        ])
-        
-        updates = {}
-        if extraction.destination:
-            updates["destination"] = extraction.destination
-            
-        if extraction.start_date and extraction.end_date:
-            updates["travel_dates"] = {"start": extraction.start_date, "end": extraction.end_date}
-        else:
-            # Fallback to current date if not specified
-            # We assume a 3-day trip if not specified, starting today
-            end_date_obj = datetime.datetime.now() + datetime.timedelta(days=2)
-            end_date = end_date_obj.strftime("%Y-%m-%d")
-            updates["travel_dates"] = {"start": current_date, "end": end_date}
-            
-        if extraction.budget:
-            updates["budget"] = extraction.budget
-        if extraction.interests:
-            updates["preferences"] = {"interests": extraction.interests}
-            
-        # Check if this is a modification request
-        # If we already have a plan, and the user input is treated as "interests" or just general conversational, 
-        # it might be feedback.
-        # But for robustness, let's assume if there's a plan, the latest message is potential feedback.
-        if state.get("trip_plan"):
-             # Get the latest human message content
-             last_msg = state["messages"][-1]
-             if isinstance(last_msg, HumanMessage):
-                 updates["user_feedback"] = last_msg.content
-            
-        return updates
+        extraction = llm.invoke(_extraction_messages(state, context))
+        updates = _extraction_updates(state, extraction)
         
     except Exception as e:
         print(f"Error extracting input: {e}")
-        return state
+        updates = dict(state)
 
+    updates.update(update_summary(context))
+    return updates
 
-def plan_itinerary(state: TravelState) -> TravelState:
-    """Plan the travel itinerary based on user preferences.
 
-    This node creates a personalized travel plan including:
-    - Daily activities
-    - Recommended accommodations
-    - Restaurant suggestions
-    
-    It supports creating NEW plans and MODIFYING existing plans.
-
-    Args:
-        state: The current graph state.
+async def aprocess_input(state: TravelState) -> TravelState:
+    """Async variant of process_input that doesn't block the event loop.
 
-    Returns:
-        Updated state with itinerary information.
+    The summary update runs concurrently with the extraction call.
     """
-    structured_llm = get_llm(structured_output=TripSchema, model_name="Pro/zai-org/GLM-4.7")
+    llm = get_llm(structured_output=InputSchema, model_name="Pro/zai-org/GLM-4.7", cache_namespace="process_input")
+    context = ExtractionContext(state)
+
+    async def extract() -> dict:
+        try:
+            extraction = await llm.ainvoke(_extraction_messages(state, context))
+            return _extraction_updates(state, extraction)
+        except Exception as e:
+            print(f"Error extracting input: {e}")
+            return dict(state)
 
+    updates, summary = await asyncio.gather(extract(), aupdate_summary(context))
+    updates.update(summary)
+    return updates
+
+
+def _planner_messages(state: TravelState) -> list:
+    """Build the planner prompt for a new plan or a modification of the existing one."""
     destination = state.get("destination", "determined by the AI")
     dates = state.get("travel_dates", {})
     budget = state.get("budget")
     preferences = state.get("preferences", {})
     feedback = state.get("planner_feedback")
     weather_info = state.get("weather_info")
+    discovery_info = state.get("discovery_info")
     
     # Modification Logic
     trip_plan_obj = state.get("trip_plan")
@@ -125,18 +224,156 @@ def plan_itinerary(state: TravelState) -> TravelState:
     else:
         # Creation Flow
         system_prompt = PLANNER_SYSTEM_PROMPT
-        user_prompt = get_planner_user_prompt(destination, dates, budget, preferences, feedback, weather_info=weather_info)
+        user_prompt = get_planner_user_prompt(
+            destination,
+            dates,
+            budget,
+            preferences,
+            feedback,
+            weather_info=weather_info,
+            discovery_info=discovery_info
+        )
+
+    return [
+        SystemMessage(content=system_prompt),
+        HumanMessage(content=user_prompt)
+    ]
+
 
+def plan_patch_enabled() -> bool:
+    return os.getenv("PLAN_PATCH_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+def _wants_patch(state: TravelState) -> bool:
+    """Modification turns try a compact patch before regenerating the plan."""
+    return bool(state.get("trip_plan") and state.get("user_feedback") and plan_patch_enabled())
+
+
+def _patch_messages(state: TravelState) -> list:
+    return [
+        SystemMessage(content=PLANNER_PATCH_SYSTEM_PROMPT),
+        HumanMessage(content=get_plan_patch_user_prompt(state["trip_plan"], state["user_feedback"]))
+    ]
+
+
+def _patched_plan(state: TravelState, patch: PlanPatchSchema) -> TravelState | None:
+    """Apply a model-generated patch, or return None to fall back to regeneration."""
     try:
-        trip_plan = structured_llm.invoke([
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=user_prompt)
-        ])
-        return {"trip_plan": trip_plan, "user_feedback": None} # Clear feedback after processing
-    except Exception as e:
+        trip_plan = apply_plan_patch(state["trip_plan"], drop_patch_coordinates(patch))
+    except PlanPatchError as e:
+        print(f"Invalid plan patch, regenerating the full plan: {e}")
+        metrics.incr("plan_patch_total", result="invalid")
+        return None
+    metrics.incr("plan_patch_total", result="applied")
+    return {"trip_plan": trip_plan, "user_feedback": None}
+
+
+def _stream_writer():
+    """Return the graph's custom stream writer, or a no-op outside a graph run."""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda chunk: None
+
+
+def _plan_stream_config(parser: IncrementalTripParser) -> dict:
+    """Run config that parses planner tokens as they stream in.
+
+    Each completed day is published on the graph's "custom" stream as
+    ``{"plan_day": {...}}`` so the UI can render it before the plan is done.
+    The handler is merged into the inherited config to keep LangGraph's own
+    callbacks (tracing, "messages" streaming) attached.
+    """
+    writer = _stream_writer()
+    handler = PlanStreamHandler(parser, on_day=lambda day: writer({"plan_day": day.model_dump()}))
+    return merge_configs(ensure_config(), {"callbacks": [handler]})
+
+
+def _salvaged_plan(state: TravelState, parser: IncrementalTripParser, error: Exception) -> TravelState:
+    """Recover the completed days when the planner output fails to parse."""
+    trip_plan = parser.salvage()
+    if trip_plan is None:
         # In a real app, handle error gracefully
-        print(f"Error generating itinerary: {e}")
+        print(f"Error generating itinerary: {error}")
         return state
+    print(f"Error generating itinerary, kept {len(trip_plan.itinerary)} completed day(s): {error}")
+    return {"trip_plan": drop_coordinates(trip_plan), "user_feedback": None}
+
+
+def plan_itinerary(state: TravelState) -> TravelState:
+    """Plan the travel itinerary based on user preferences.
+
+    This node creates a personalized travel plan including:
+    - Daily activities
+    - Recommended accommodations
+    - Restaurant suggestions
+    
+    It supports creating NEW plans and MODIFYING existing plans. Modifications
+    first ask for a compact PlanPatchSchema applied locally, and regenerate the
+    whole plan only when the patch is invalid (PLAN_PATCH_ENABLED=false skips it).
+
+    Args:
+        state: The current graph state.
+
+    Returns:
+        Updated state with itinerary information.
+    """
+    if _wants_patch(state):
+        patch_llm = get_llm(structured_output=PlanPatchSchema, model_name="Pro/zai-org/GLM-4.7", cache_namespace="plan_patch")
+        try:
+            updates = _patched_plan(state, patch_llm.invoke(_patch_messages(state)))
+            if updates is not None:
+                return updates
+        except Exception as e:
+            print(f"Error generating plan patch, regenerating the full plan: {e}")
+            metrics.incr("plan_patch_total", result="error")
+
+    structured_llm = get_llm(structured_output=TripSchema, model_name="Pro/zai-org/GLM-4.7", cache_namespace="plan_itinerary")
+    parser = IncrementalTripParser()
+
+    try:
+        trip_plan = structured_llm.invoke(_planner_messages(state), config=_plan_stream_config(parser), stream=True)
+        # Coordinates come from geocoding, never from the planner
+        return {"trip_plan": drop_coordinates(trip_plan), "user_feedback": None} # Clear feedback after processing
+    except Exception as e:
+        return _salvaged_plan(state, parser, e)
+
+
+async def aplan_itinerary(state: TravelState) -> TravelState:
+    """Async variant of plan_itinerary that doesn't block the event loop."""
+    if _wants_patch(state):
+        patch_llm = get_llm(structured_output=PlanPatchSchema, model_name="Pro/zai-org/GLM-4.7", cache_namespace="plan_patch")
+        try:
+            updates = _patched_plan(state, await patch_llm.ainvoke(_patch_messages(state)))
+            if updates is not None:
+                return updates
+        except Exception as e:
+            print(f"Error generating plan patch, regenerating the full plan: {e}")
+            metrics.incr("plan_patch_total", result="error")
+
+    structured_llm = get_llm(structured_output=TripSchema, model_name="Pro/zai-org/GLM-4.7", cache_namespace="plan_itinerary")
+    parser = IncrementalTripParser()
+
+    try:
+        trip_plan = await structured_llm.ainvoke(_planner_messages(state), config=_plan_stream_config(parser), stream=True)
+        # Coordinates come from geocoding, never from the planner
+        return {"trip_plan": drop_coordinates(trip_plan), "user_feedback": None} # Clear feedback after processing
+    except Exception as e:
+        return _salvaged_plan(state, parser, e)
+
+
+NO_PLAN_MESSAGE = "I'm sorry, I couldn't generate a travel plan for you at this time."
+
+
+def _response_messages(trip_plan: TripSchema) -> list:
+    """Build the prompt that presents the final plan to the user."""
+    system_prompt = RESPONSE_SYSTEM_PROMPT
+    user_prompt = f"Here is the trip plan:\n{trip_plan.model_dump_json()}"
+    
+    return [
+        SystemMessage(content=system_prompt),
+        HumanMessage(content=user_prompt)
+    ]
 
 
 def generate_response(state: TravelState) -> TravelState:
@@ -154,16 +391,28 @@ def generate_response(state: TravelState) -> TravelState:
     trip_plan = state.get("trip_plan")
     
     if not trip_plan:
-        return {"messages": [AIMessage(content="I'm sorry, I couldn't generate a travel plan for you at this time.")]}
+        return {"messages": [AIMessage(content=NO_PLAN_MESSAGE)]}
     
-    llm = get_llm()
-    system_prompt = RESPONSE_SYSTEM_PROMPT
-    user_prompt = f"Here is the trip plan:\n{trip_plan.model_dump_json()}"
+    llm = get_llm(cache_namespace="generate_response")
+    response = llm.invoke(_response_messages(trip_plan))
     
-    response = llm.invoke([
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=user_prompt)
-    ])
+    return {"messages": [response]}
+
+
+async def agenerate_response(state: TravelState) -> TravelState:
+    """Async variant of generate_response that doesn't block the event loop.
+
+    The completion is requested with ``stream=True`` so tokens reach
+    ``graph.astream(stream_mode="messages")`` consumers as they arrive, while
+    cached responses are still served without an API call.
+    """
+    trip_plan = state.get("trip_plan")
+    
+    if not trip_plan:
+        return {"messages": [AIMessage(content=NO_PLAN_MESSAGE)]}
+    
+    llm = get_llm(cache_namespace="generate_response")
+    response = await llm.ainvoke(_response_messages(trip_plan), stream=True)
     
     return {"messages": [response]}
 
@@ -183,15 +432,42 @@ def validate_budget(state: TravelState) -> TravelState:
     return {"budget_status": "OK"}
 
 
-def refine_itinerary(state: TravelState) -> TravelState:
-    """Refine the itinerary with gathered information (costs, descriptions).
-    
-    This node runs after the search agents. It uses an LLM to update the 
-    TripSchema with the specific details found by the agents.
+REFINE_SYSTEM_PROMPT = (
+    "You are a travel assistant editor. Your goal is to ENRICH the listed nodes of an existing travel "
+    "itinerary with new information gathered from external tools, by returning 'update' edit operations "
+    "addressed by day number and [index] exactly as listed. "
+    "Only update COSTS and DESCRIPTIONS; coordinates are resolved separately. "
+    "If a specific cost was found (e.g. for a hotel or ticket), set the 'cost' field "
+    "of the corresponding node. "
+    "If the weather info shows rain or extreme conditions on a day, mention it in the description "
+    "of the outdoor activities on that day. "
+    "Only edit the listed nodes and only set fields you have information for."
+)
+
+
+def _refine_context(state: TravelState):
+    """Collect what refine needs: the plan with stored enrichment and fresh
+    geocodes applied, the destination, the enrichment map and the nodes that
+    still need enrichment.
+
+    Returns None when there is no plan.
     """
     trip_plan = state.get("trip_plan")
     if not trip_plan:
-        return {} # No plan to refine
+        return None
+    destination = state.get("destination") or trip_plan.destination
+    enrichment = dict(state.get("enrichment") or {})
+    geocodes = state.get("geocodes") or {}
+    record_geocodes(enrichment, geocodes)
+    plan = restore_enrichment(trip_plan, destination, enrichment)
+    plan = apply_geocodes(plan, destination, geocodes)
+    return plan, destination, enrichment, pending_nodes(plan, destination, enrichment)
+
+
+def _refine_messages(state: TravelState, destination: str, pending: list) -> list | None:
+    """Build the refine prompt, or None when there is nothing to refine."""
+    if not pending:
+        return None # Input diff is empty: every node is already enriched
         
     attractions_info = state.get("attractions_info", "")
     weather_info = state.get("weather_info", "")
@@ -199,64 +475,158 @@ def refine_itinerary(state: TravelState) -> TravelState:
     
     # If no info gathered, skip
     if not (attractions_info or weather_info or hotel_info):
-        return {}
-        
-    llm = get_llm(structured_output=TripSchema, model_name="Pro/zai-org/GLM-4.7")
+        return None
+    
+    user_prompt = get_refine_user_prompt(destination, pending, attractions_info, weather_info, hotel_info)
+    
+    return [
+        SystemMessage(content=REFINE_SYSTEM_PROMPT),
+        HumanMessage(content=user_prompt)
+    ]
+
+
+def _unrefined_updates(state: TravelState, plan: TripSchema, enrichment: dict) -> TravelState:
+    """State updates when the LLM refine step doesn't run (or fails)."""
+    updates = {}
+    if plan is not state["trip_plan"]:
+        updates["trip_plan"] = plan
+    if enrichment != (state.get("enrichment") or {}):
+        updates["enrichment"] = enrichment
+    return updates
+
+
+def _deferred_names(state: TravelState) -> set:
+    """Names of the sights and hotels past the search agents' lookup limits."""
+    names = set()
+    for node_types, limit in (
+        (ATTRACTION_NODE_TYPES, ATTRACTION_LOOKUP_LIMIT),
+        (HOTEL_NODE_TYPES, HOTEL_LOOKUP_LIMIT),
+    ):
+        names.update(_new_node_names(state, node_types)[limit:])
+    return names
+
+
+def _refined_updates(
+    state: TravelState,
+    plan: TripSchema,
+    destination: str,
+    enrichment: dict,
+    pending: list,
+    patch: PlanPatchSchema,
+) -> TravelState:
+    """Apply the refine edits and store enrichment for the refined nodes."""
+    refined = apply_refine_patch(plan, patch, pending)
+    enrichment.update(record_enrichment(refined, destination, pending, _deferred_names(state)))
+    metrics.incr("refine_total", result="applied")
+    return {"trip_plan": refined, "enrichment": enrichment}
+
+
+def refine_itinerary(state: TravelState) -> TravelState:
+    """Refine the itinerary with gathered information (costs, descriptions).
     
-    system_prompt = (
-        "You are a travel assistant editor. Your goal is to UPDATE an existing travel itinerary "
-        "with new information gathered from external tools. "
-        "Focus on updating COSTS, TIMINGS, DESCRIPTIONS, and COORDINATES. "
-        "If a specific cost was found (e.g. for a hotel or ticket), update the 'cost' field "
-        "of the corresponding node. "
-        "Crucially, if the tool output contains location details, you MUST populate the 'coordinates' "
-        "field (lat, lng) for each node so they can be shown on a map. "
-        "Do NOT change the structure of the trip or the destinations unless necessary. "
-        "Maintain the original plan as much as possible, just enrich it."
-    )
+    This node runs after the search agents. Only nodes without stored
+    enrichment (new or renamed since the last turn) are sent to the LLM, which
+    returns update edits for them; the LLM call is skipped entirely when there
+    are none.
+    """
+    context = _refine_context(state)
+    if context is None:
+        return {} # No plan to refine
+    plan, destination, enrichment, pending = context
+    updates = _unrefined_updates(state, plan, enrichment)
+
+    messages = _refine_messages(state, destination, pending)
+    if messages is None:
+        metrics.incr("refine_total", result="skipped")
+        return updates
+        
+    llm = get_llm(structured_output=PlanPatchSchema, model_name="Pro/zai-org/GLM-4.7", cache_namespace="refine_itinerary")
     
-    user_prompt = (
-        f"Original Plan: {trip_plan.model_dump_json()}\n\n"
-        f"Gathered Information:\n"
-        f"Attractions Info: {attractions_info}\n"
-        f"Weather Info: {weather_info}\n"
-        f"Hotel Info: {hotel_info}\n\n"
-        "Please output the updated TripSchema."
-    )
+    try:
+        patch = llm.invoke(messages)
+        return _refined_updates(state, plan, destination, enrichment, pending, patch)
+    except Exception as e:
+        print(f"Error refining itinerary: {e}")
+        metrics.incr("refine_total", result="error")
+        return updates # Keep original plan on error
+
+
+async def arefine_itinerary(state: TravelState) -> TravelState:
+    """Async variant of refine_itinerary that doesn't block the event loop."""
+    context = _refine_context(state)
+    if context is None:
+        return {} # No plan to refine
+    plan, destination, enrichment, pending = context
+    updates = _unrefined_updates(state, plan, enrichment)
+
+    messages = _refine_messages(state, destination, pending)
+    if messages is None:
+        metrics.incr("refine_total", result="skipped")
+        return updates
+        
+    llm = get_llm(structured_output=PlanPatchSchema, model_name="Pro/zai-org/GLM-4.7", cache_namespace="refine_itinerary")
     
     try:
-        updated_plan = llm.invoke([
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=user_prompt)
-        ])
-        return {"trip_plan": updated_plan}
+        patch = await llm.ainvoke(messages)
+        return _refined_updates(state, plan, destination, enrichment, pending, patch)
     except Exception as e:
         print(f"Error refining itinerary: {e}")
-        return {} # Keep original plan on error
+        metrics.incr("refine_total", result="error")
+        return updates # Keep original plan on error
+
+
+async def optimize_routes(state: TravelState) -> TravelState:
+    """Reorder each day's movable stops into a shorter route.
+
+    Runs after refine_itinerary, once coordinates are on the plan. Meals,
+    hotels and transport keep their slots; moved stops are re-timed. The
+    distance saved per day is stored in ``route_savings``. The plan's distance
+    matrix is built (and cached for the UI) here, with leg times upgraded
+    through AMap when DISTANCE_AMAP_UPGRADE is on.
+    """
+    trip_plan = state.get("trip_plan")
+    if not trip_plan or not route_optimization_enabled():
+        return {}
+    optimized, savings = optimize_itinerary(trip_plan)
+    metrics.observe("route_saved_km", sum(day["saved_km"] for day in savings.values()))
+
+    distances = plan_distances(optimized)
+    if amap_upgrade_enabled():
+        metrics.incr("distance_legs_upgraded_total", await upgrade_legs(distances))
+    metrics.incr("distance_tight_legs_total", len(distances.tight_legs()))
+
+    updates = {"route_savings": savings}
+    if optimized is not trip_plan:
+        updates["trip_plan"] = optimized
+    return updates
 
 
 from langgraph.prebuilt import create_react_agent
 from travel_assistant.backend.agents.tools import run_simple_tool_agent, tool_llm
 
 
+# Node types each search agent looks up, and how many names go in one query
+ATTRACTION_NODE_TYPES = ["attraction", "activity", "sight"]
+ATTRACTION_LOOKUP_LIMIT = 5
+HOTEL_NODE_TYPES = ["hotel", "accommodation", "lodging"]
+HOTEL_LOOKUP_LIMIT = 3
+
+
 async def attraction_search_agent(state: TravelState) -> TravelState:
     """Agent that searches for attractions using MCP."""
     destination = state.get("destination")
-    trip_plan = state.get("trip_plan")
     
     if not destination:
         return {"attractions_info": "No destination specified for attraction search."}
 
     # If we have a plan, search for the specific attractions in it
-    targets = []
-    if trip_plan and hasattr(trip_plan, "itinerary") and trip_plan.itinerary:
-        for day in trip_plan.itinerary:
-            for node in day.nodes:
-                if node.type in ["attraction", "activity", "sight"]:
-                    targets.append(node.name)
+    targets = _new_node_names(state, ATTRACTION_NODE_TYPES)
+    if not targets and state.get("enrichment"):
+        metrics.incr("search_agent_skipped_total", agent="attractions")
+        return {"attractions_info": None}
     
     if targets:
-        items = ", ".join(targets[:5]) # Search for top 5 to avoid long queries
+        items = ", ".join(targets[:ATTRACTION_LOOKUP_LIMIT]) # Search for the top few to avoid long queries
         prompt = f"Find details (ticket price, opening hours) for these attractions in {destination}: {items}. Provide a concise summary."
     else:
         prompt = f"Find top attractions and sights in {destination}. Provide a concise summary."
@@ -271,6 +641,81 @@ async def attraction_search_agent(state: TravelState) -> TravelState:
         return {"attractions_info": f"Failed to fetch attractions: {str(e)}"}
 
 
+def _new_node_names(state: TravelState, node_types: list) -> list:
+    """Names of plan nodes of the given types that have no stored enrichment yet."""
+    trip_plan = state.get("trip_plan")
+    if not (trip_plan and trip_plan.itinerary):
+        return []
+    destination = state.get("destination") or trip_plan.destination
+    enrichment = state.get("enrichment") or {}
+    return [
+        node.name
+        for day in trip_plan.itinerary
+        for node in day.nodes
+        if node.type in node_types and enrichment_key(destination, node.name) not in enrichment
+    ]
+
+
+async def attraction_discovery_agent(state: TravelState) -> TravelState:
+    """Agent that looks up the destination's top attractions before planning."""
+    destination = state.get("destination")
+
+    if not destination:
+        return {"discovery_info": None}
+
+    # Modifications edit an existing plan, so a fresh discovery is not needed
+    if state.get("trip_plan") and state.get("user_feedback"):
+        return {}
+
+    prompt = f"Find top attractions and sights in {destination}. Provide a concise summary."
+
+    try:
+        content = await run_simple_tool_agent(prompt, [search_destinations], tool_llm)
+        return {"discovery_info": content}
+    except Exception as e:
+        return {"discovery_info": f"Failed to discover attractions: {str(e)}"}
+
+
+# Node types that are routes rather than places and can't be geocoded
+UNLOCATABLE_NODE_TYPES = {"transport", "transportation", "transit", "flight", "train"}
+
+
+async def geocode_itinerary(state: TravelState) -> TravelState:
+    """Resolve coordinates for plan nodes through the AMap geocode/search tools.
+
+    Runs next to the search agents. Planner coordinates are dropped before
+    this runs, so nodes without coordinates (and not already located on an
+    earlier turn) are looked up by name; results are returned as
+    ``geocodes`` keyed like the enrichment map and applied by refine_itinerary.
+    """
+    trip_plan = state.get("trip_plan")
+    if not (trip_plan and trip_plan.itinerary):
+        return {"geocodes": {}}
+    destination = state.get("destination") or trip_plan.destination
+    enrichment = state.get("enrichment") or {}
+
+    names = [
+        node.name
+        for day in trip_plan.itinerary
+        for node in day.nodes
+        if node.coordinates is None
+        and (node.type or "").lower() not in UNLOCATABLE_NODE_TYPES
+        and not (enrichment.get(enrichment_key(destination, node.name)) or {}).get("coordinates")
+    ]
+    if not names:
+        return {"geocodes": {}}
+
+    results = await geocode_places(names, city=destination)
+    geocodes = {
+        enrichment_key(destination, name): coordinates.model_dump()
+        for name, coordinates in results.items()
+        if coordinates is not None
+    }
+    metrics.incr("geocoded_places_total", len(geocodes), result="found")
+    metrics.incr("geocoded_places_total", len(results) - len(geocodes), result="missing")
+    return {"geocodes": geocodes}
+
+
 async def weather_query_agent(state: TravelState) -> TravelState:
     """Agent that queries weather using MCP."""
     destination = state.get("destination")
@@ -314,15 +759,13 @@ async def hotel_info_agent(state: TravelState) -> TravelState:
         end_date = trip_plan.end_date
 
     # If we have a plan, check for specific hotels
-    targets = []
-    if trip_plan and hasattr(trip_plan, "itinerary") and trip_plan.itinerary:
-        for day in trip_plan.itinerary:
-            for node in day.nodes:
-                if node.type in ["hotel", "accommodation", "lodging"]:
-                    targets.append(node.name)
+    targets = _new_node_names(state, HOTEL_NODE_TYPES)
+    if not targets and state.get("enrichment"):
+        metrics.incr("search_agent_skipped_total", agent="hotels")
+        return {"hotel_info": None}
     
     if targets:
-         items = ", ".join(targets[:3])
+         items = ", ".join(targets[:HOTEL_LOOKUP_LIMIT])
          prompt = f"Find prices and availability for these hotels in {destination} from {start_date} to {end_date}: {items}. Provide a concise summary."
     else:
         prompt = f"Find available hotels in {destination} from {start_date} to {end_date}. Provide a concise summary."
@@ -1,56 +1,109 @@
 """Tools execution helpers for agents."""
 
+import asyncio
 import json
+import os
+import time
+
 from langchain_core.messages import HumanMessage, ToolMessage
+
 from travel_assistant.backend.config import get_llm
+from travel_assistant.backend.metrics import metrics
 
 # Initialize Sub-Agents
 # We use a smaller/faster model for these agents if configured (model_key="TOOL")
 tool_llm = get_llm(model_key="TOOL", model_name="Qwen/Qwen2.5-7B-Instruct")
 
-async def run_simple_tool_agent(prompt: str, tools_list: list, llm) -> str:
-    """Executes a simple ReAct-style loop: LLM -> Tool -> LLM Summary.
-    
+# Max tool calls of one LLM turn executed at the same time, and per-call timeout
+TOOL_CALL_CONCURRENCY = int(os.getenv("TOOL_CALL_CONCURRENCY", "4"))
+TOOL_CALL_TIMEOUT = float(os.getenv("TOOL_CALL_TIMEOUT", "45"))
+
+
+async def _execute_tool_call(
+    tc: dict, tools_list: list, semaphore: asyncio.Semaphore, timeout: float
+) -> tuple[str, float]:
+    """Run a single tool call under the concurrency limit.
+
+    Returns:
+        The tool output as a string and the call latency in seconds.
+    """
+    # Robust parsing of args
+    tool_args = tc["args"]
+    if isinstance(tool_args, str):
+        try:
+            tool_args = json.loads(tool_args)
+        except json.JSONDecodeError:
+            pass  # Keep as string if parsing fails, might be just a string arg
+
+    # Find matching tool
+    tool_name = tc["name"]
+    selected_tool = next((t for t in tools_list if t.name == tool_name), None)
+    if not selected_tool:
+        return "Tool not found.", 0.0
+
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            # LangChain runs sync tool functions in an executor inside ainvoke
+            tool_output = await asyncio.wait_for(
+                selected_tool.ainvoke(tool_args), timeout
+            )
+        except asyncio.TimeoutError:
+            tool_output = f"Tool execution timed out after {timeout:.0f}s."
+            metrics.incr("tool_call_timeouts_total", tool=tool_name)
+        except Exception as e:
+            tool_output = f"Tool execution error: {e}"
+        elapsed = time.perf_counter() - start
+
+    metrics.observe("tool_call_seconds", elapsed, tool=tool_name)
+    return str(tool_output), elapsed
+
+
+async def run_simple_tool_agent(
+    prompt: str,
+    tools_list: list,
+    llm,
+    max_concurrency: int | None = None,
+    call_timeout: float | None = None,
+) -> str:
+    """Executes a simple ReAct-style loop: LLM -> Tools -> LLM Summary.
+
+    All tool calls requested in one LLM turn run concurrently (bounded by
+    ``max_concurrency``, each limited to ``call_timeout`` seconds) and their
+    results are appended as ToolMessages in the original call order.
     Robustly handles stringified tool arguments which can occur with some models.
     """
     llm_with_tools = llm.bind_tools(tools_list)
     messages = [HumanMessage(content=prompt)]
-    
+
     # 1. First LLM Call (Decide to call tool)
     response = await llm_with_tools.ainvoke(messages)
     messages.append(response)
-    
+
     # 2. Execute Tools if any
     if response.tool_calls:
-        for tc in response.tool_calls:
-            # Robust parsing of args
-            tool_args = tc["args"]
-            if isinstance(tool_args, str):
-                try:
-                    tool_args = json.loads(tool_args)
-                except json.JSONDecodeError:
-                    pass # Keep as string if parsing fails, might be just a string arg
-            
-            # Find matching tool
-            tool_name = tc["name"]
-            selected_tool = next((t for t in tools_list if t.name == tool_name), None)
-            
-            tool_output = "Tool not found."
-            if selected_tool:
-                try:
-                     # Await if async tool, else call
-                     if hasattr(selected_tool, "ainvoke"):
-                         tool_output = await selected_tool.ainvoke(tool_args)
-                     else:
-                         tool_output = selected_tool.invoke(tool_args)
-                except Exception as e:
-                    tool_output = f"Tool execution error: {e}"
-            
-            messages.append(ToolMessage(content=str(tool_output), tool_call_id=tc["id"]))
-            
+        semaphore = asyncio.Semaphore(max_concurrency or TOOL_CALL_CONCURRENCY)
+        timeout = TOOL_CALL_TIMEOUT if call_timeout is None else call_timeout
+
+        batch_start = time.perf_counter()
+        results = await asyncio.gather(
+            *[
+                _execute_tool_call(tc, tools_list, semaphore, timeout)
+                for tc in response.tool_calls
+            ]
+        )
+        wall_time = time.perf_counter() - batch_start
+        serial_time = sum(elapsed for _, elapsed in results)
+
+        metrics.observe("tool_batch_wall_seconds", wall_time)
+        metrics.observe("tool_batch_serial_seconds", serial_time)
+
+        for tc, (tool_output, _) in zip(response.tool_calls, results):
+            messages.append(ToolMessage(content=tool_output, tool_call_id=tc["id"]))
+
         # 3. Final Summary Call
         final_response = await llm_with_tools.ainvoke(messages)
         return final_response.content
-    
+
     # If no tool called, return original content
     return response.content
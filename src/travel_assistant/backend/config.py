@@ -1,23 +1,166 @@
 """Configuration settings for the travel assistant."""
 
+import asyncio
 import os
-from typing import Any, Optional
+import threading
+import weakref
+from typing import Any, Dict, Optional
 
+import httpx
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 
+from travel_assistant.backend.memory.llm_cache import get_response_cache
+from travel_assistant.backend.metrics import metrics
+from travel_assistant.backend.tracing import llm_metrics
+
 # Load environment variables
 load_dotenv()
 
-def get_llm(structured_output: Optional[Any] = None, model_key: str = "PLANNER", model_name: Optional[str] = None) -> ChatOpenAI | Any:
+# Keep-alive settings shared by every LLM endpoint pool
+HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "600"))
+
+_registry_lock = threading.Lock()
+_llm_registry: Dict[tuple, Any] = {}
+_http_clients: Dict[str, tuple] = {}
+
+
+def _http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+class _CountingTransport(httpx.HTTPTransport):
+    """Sync transport that counts requests and newly opened connections."""
+
+    def __init__(self, endpoint: str, **kwargs):
+        super().__init__(**kwargs)
+        self.endpoint = endpoint
+
+    def _trace(self, event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            metrics.incr("llm_http_connections_opened_total", endpoint=self.endpoint)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        metrics.incr("llm_http_requests_total", endpoint=self.endpoint)
+        request.extensions.setdefault("trace", self._trace)
+        return super().handle_request(request)
+
+
+class _LoopAwareTransport(httpx.AsyncBaseTransport):
+    """Async transport keeping one keep-alive pool per event loop.
+
+    Async connections are bound to the loop that opened them, so a client
+    shared across ``asyncio.run`` calls must not hand a connection from a
+    closed loop to a new one.
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    async def _trace(self, event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            metrics.incr("llm_http_connections_opened_total", endpoint=self.endpoint)
+
+    def _pool(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            pool = httpx.AsyncHTTPTransport(limits=_http_limits())
+            self._pools[loop] = pool
+        return pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        metrics.incr("llm_http_requests_total", endpoint=self.endpoint)
+        request.extensions.setdefault("trace", self._trace)
+        return await self._pool().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.aclose()
+
+
+def _get_http_clients(base_url: Optional[str]) -> tuple:
+    """Return the shared (sync, async) httpx clients for an endpoint."""
+    endpoint = base_url or os.getenv("OPENAI_BASE_URL") or "https://api.openai.com/v1"
+    clients = _http_clients.get(endpoint)
+    if clients is None:
+        clients = (
+            httpx.Client(
+                base_url=endpoint,
+                timeout=HTTP_TIMEOUT,
+                transport=_CountingTransport(endpoint, limits=_http_limits()),
+            ),
+            httpx.AsyncClient(
+                base_url=endpoint,
+                timeout=HTTP_TIMEOUT,
+                transport=_LoopAwareTransport(endpoint),
+            ),
+        )
+        _http_clients[endpoint] = clients
+    return clients
+
+
+def clear_llm_cache() -> None:
+    """Drop all memoized LLM clients and HTTP pools.
+
+    Call this after configuration changes (API keys, base URLs, model names).
+    Clients handed out earlier keep working; new ``get_llm`` calls build fresh ones.
+    """
+    with _registry_lock:
+        _llm_registry.clear()
+        _http_clients.clear()
+
+
+def reload_config() -> None:
+    """Re-read the .env file and rebuild LLM clients on next use."""
+    load_dotenv(override=True)
+    clear_llm_cache()
+
+
+def get_llm_stats() -> Dict[str, float]:
+    """Return client-cache and connection-reuse counters."""
+    snapshot = metrics.snapshot()["counters"]
+
+    def total(name: str) -> float:
+        return sum(c["value"] for c in snapshot if c["name"] == name)
+
+    requests = total("llm_http_requests_total")
+    opened = total("llm_http_connections_opened_total")
+    return {
+        "client_cache_hits": total("llm_client_cache_hits_total"),
+        "client_cache_misses": total("llm_client_cache_misses_total"),
+        "http_requests": requests,
+        "connections_opened": opened,
+        "connections_reused": max(0.0, requests - opened),
+    }
+
+
+def get_llm(structured_output: Optional[Any] = None, model_key: str = "PLANNER", model_name: Optional[str] = None, cache_namespace: str = "default") -> ChatOpenAI | Any:
     """Get the configured LLM instance.
 
+    Instances are memoized by (model, base_url, temperature, schema) and all
+    instances for the same endpoint share one keep-alive HTTP pool. When
+    LLM_CACHE_ENABLED is set, responses are served from the response cache.
+    Every call is recorded in the metrics registry (see tracing.LLMMetrics).
+
     Args:
         structured_output: Optional schema to enforce structured output.
         model_key: Key suffix for model configuration (e.g., "PLANNER" or "TOOL").
                    Looks for env vars like MODEL_NAME_PLANNER or MODEL_NAME_TOOL.
                    Defaults to "PLANNER".
         model_name: Explicit model name to use. Overrides env vars.
+        cache_namespace: Response-cache namespace (usually the node name), which
+                         selects the TTL policy. Ignored when caching is disabled.
 
     Returns:
         Configured ChatOpenAI instance (or structured output runnable).
@@ -26,26 +169,49 @@ def get_llm(structured_output: Optional[Any] = None, model_key: str = "PLANNER",
     if not model_name:
         default_model = os.getenv("MODEL_NAME", "gpt-4o")
         model_name = os.getenv(f"MODEL_NAME_{model_key}", default_model)
-    
+
     # Allow overriding API key/base per model if needed, but usually shared
     api_key = os.getenv(f"OPENAI_API_KEY_{model_key}") or os.getenv("OPENAI_API_KEY")
     base_url = os.getenv(f"OPENAI_API_BASE_{model_key}") or os.getenv("OPENAI_API_BASE")
-    
+
     temperature = float(os.getenv(f"TEMPERATURE_{model_key}", os.getenv("TEMPERATURE", "0.6")))
 
     if not api_key:
         # We might want to raise an error or just warn, but letting LangChain handle it is usually fine
         pass
 
-    llm = ChatOpenAI(
-        model=model_name,
-        temperature=temperature,
-        api_key=api_key,
-        base_url=base_url,
-        max_tokens=16384,  # Increase max tokens for detailed itineraries
-    )
+    response_cache = get_response_cache()
+    if response_cache is None:
+        cache_namespace = None
+
+    client_key = (model_name, base_url, temperature, api_key, cache_namespace)
+    cache_key = client_key + (structured_output,)
+    with _registry_lock:
+        cached = _llm_registry.get(cache_key)
+        if cached is not None:
+            metrics.incr("llm_client_cache_hits_total", model=model_name)
+            return cached
+        metrics.incr("llm_client_cache_misses_total", model=model_name)
+
+        llm = _llm_registry.get(client_key)
+        if llm is None:
+            http_client, http_async_client = _get_http_clients(base_url)
+            llm = ChatOpenAI(
+                model=model_name,
+                temperature=temperature,
+                api_key=api_key,
+                base_url=base_url,
+                max_tokens=16384,  # Increase max tokens for detailed itineraries
+                http_client=http_client,
+                http_async_client=http_async_client,
+                cache=response_cache.for_node(cache_namespace) if response_cache else None,
+                callbacks=[llm_metrics],
+            )
+            _llm_registry[client_key] = llm
+
+        if structured_output:
+            # Derives the JSON schema once per (client, schema) pair
+            llm = llm.with_structured_output(structured_output)
 
-    if structured_output:
-        return llm.with_structured_output(structured_output)
-    
-    return llm
+        _llm_registry[cache_key] = llm
+        return llm
@@ -0,0 +1,110 @@
+"""Bounded conversation context for input extraction.
+
+process_input used to send the whole chat history on every turn, so its prompt
+grew with the conversation. The extraction context is now made of:
+
+- the trip details already extracted into state (destination, dates, budget,
+  interests), so they carry over without re-reading old turns;
+- a rolling summary of older turns, cached in state and only extended with
+  the turns that fell out of the window since it was last updated;
+- the turns the summary doesn't cover yet, verbatim (the last K, plus at most
+  the one turn awaiting summarization).
+"""
+
+import os
+from typing import List, Optional
+
+from langchain_core.messages import BaseMessage, HumanMessage
+
+# Number of most recent turns (a user message and the replies to it) kept verbatim
+CONTEXT_RECENT_TURNS = int(os.environ.get("CONTEXT_RECENT_TURNS", "3"))
+
+# Bounds for the summary fallback used when the summarizer LLM fails
+FALLBACK_MESSAGE_CHARS = 200
+MAX_SUMMARY_CHARS = 2000
+
+
+def split_turns(messages: List[BaseMessage]) -> List[List[BaseMessage]]:
+    """Group messages into turns, each starting at a user message."""
+    turns: List[List[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return turns
+
+
+def format_turns(turns: List[List[BaseMessage]]) -> str:
+    return "\n".join(f"{msg.type}: {msg.content}" for turn in turns for msg in turn)
+
+
+def known_details(state: dict) -> Optional[str]:
+    """Trip details extracted on earlier turns, as prompt lines."""
+    lines = []
+    if state.get("destination"):
+        lines.append(f"- Destination: {state['destination']}")
+    dates = state.get("travel_dates") or {}
+    if dates.get("start") and dates.get("end"):
+        lines.append(f"- Dates: {dates['start']} to {dates['end']}")
+    if state.get("budget"):
+        lines.append(f"- Budget: {state['budget']}")
+    interests = (state.get("preferences") or {}).get("interests")
+    if interests:
+        lines.append(f"- Interests: {', '.join(interests)}")
+    return "\n".join(lines) or None
+
+
+class ExtractionContext:
+    """The bounded view of a conversation used by process_input.
+
+    Attributes:
+        summary: The cached summary text (if any).
+        summarized_turns: Number of leading turns the summary covers.
+        unsummarized: Turns after the summary, sent verbatim.
+        to_summarize: Turns that are now older than the window and should be
+            folded into the summary.
+    """
+
+    def __init__(self, state: dict, recent_turns: Optional[int] = None):
+        recent_turns = CONTEXT_RECENT_TURNS if recent_turns is None else recent_turns
+        cached = state.get("conversation_summary") or {}
+        turns = split_turns(state.get("messages") or [])
+
+        self.summary: Optional[str] = cached.get("text")
+        self.summarized_turns: int = min(cached.get("turns", 0), len(turns))
+        self.unsummarized = turns[self.summarized_turns :]
+        self.to_summarize = self.unsummarized[
+            : max(len(self.unsummarized) - recent_turns, 0)
+        ]
+        self.details = known_details(state)
+
+    def history(self) -> str:
+        """The prompt section describing the conversation so far."""
+        sections = []
+        if self.details:
+            sections.append(f"Known Trip Details (from earlier turns):\n{self.details}")
+        if self.summary:
+            sections.append(f"Earlier Conversation Summary:\n{self.summary}")
+        sections.append(f"Recent Conversation:\n{format_turns(self.unsummarized)}")
+        return "\n\n".join(sections)
+
+    def fallback_summary(self) -> str:
+        """Summary extended without an LLM: the gist of each older user message."""
+        lines = [self.summary] if self.summary else []
+        for turn in self.to_summarize:
+            for message in turn:
+                if isinstance(message, HumanMessage):
+                    lines.append(
+                        f"- user: {str(message.content)[:FALLBACK_MESSAGE_CHARS]}"
+                    )
+        return "\n".join(lines)[-MAX_SUMMARY_CHARS:]
+
+    def summary_update(self, text: str) -> dict:
+        """State update recording a summary that now covers ``to_summarize``."""
+        return {
+            "conversation_summary": {
+                "text": text.strip()[-MAX_SUMMARY_CHARS:],
+                "turns": self.summarized_turns + len(self.to_summarize),
+            }
+        }
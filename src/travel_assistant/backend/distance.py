@@ -0,0 +1,339 @@
+"""Distances and travel times between the stops of an itinerary.
+
+Pairwise haversine distances for every located node are computed in one
+vectorized pass and cached per plan revision, together with the legs between
+consecutive stops of each day. Leg times come from a speed model (walk short
+hops, ride longer ones) and can be upgraded to real AMap travel times with
+batched, cached ``maps_distance`` calls.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from travel_assistant.backend.memory.cache import LRUTTLCache
+from travel_assistant.backend.schemas import TripNodeSchema, TripSchema
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Speed model used when no AMap travel time is known
+WALKING_SPEED_KMH = float(os.environ.get("WALKING_SPEED_KMH", "4.5"))
+WALKING_MAX_KM = float(os.environ.get("WALKING_MAX_KM", "1.5"))
+ROUTE_SPEED_KMH = float(os.environ.get("ROUTE_SPEED_KMH", "20"))
+
+# maps_distance "type" per travel mode
+AMAP_DISTANCE_TYPES = {"walking": "3", "driving": "1"}
+DISTANCE_CONCURRENCY = int(os.environ.get("DISTANCE_CONCURRENCY", "4"))
+LEG_TTL = 7 * 24 * 3600
+
+ToolCall = Callable[[str, Dict[str, Any]], Awaitable[str]]
+
+# Matrices per plan revision, and AMap leg results per (origin, destination, mode)
+_plan_cache = LRUTTLCache(max_entries=64)
+_leg_cache = LRUTTLCache(max_entries=4096)
+
+
+def amap_upgrade_enabled() -> bool:
+    return os.getenv("DISTANCE_AMAP_UPGRADE", "false").lower() in ("1", "true", "yes")
+
+
+def haversine_matrix(lats: Sequence[float], lngs: Sequence[float]) -> np.ndarray:
+    """Pairwise great-circle distances in kilometres.
+
+    Args:
+        lats: Latitudes in degrees.
+        lngs: Longitudes in degrees, same length as ``lats``.
+
+    Returns:
+        An (n, n) symmetric matrix of distances.
+    """
+    lat = np.radians(np.asarray(lats, dtype=float))
+    lng = np.radians(np.asarray(lngs, dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlng = lng[:, None] - lng[None, :]
+    a = (
+        np.sin(dlat / 2) ** 2
+        + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlng / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def estimate_minutes(km: Any) -> np.ndarray:
+    """Speed-model travel time in minutes for a distance or array of distances."""
+    km = np.asarray(km, dtype=float)
+    return (
+        np.where(km <= WALKING_MAX_KM, km / WALKING_SPEED_KMH, km / ROUTE_SPEED_KMH)
+        * 60
+    )
+
+
+def travel_mode(km: float) -> str:
+    return "walking" if km <= WALKING_MAX_KM else "driving"
+
+
+def _minutes_of_day(value: Optional[str]) -> Optional[int]:
+    try:
+        hours, minutes = (int(part) for part in (value or "").split(":"))
+    except ValueError:
+        return None
+    return hours * 60 + minutes
+
+
+@dataclass
+class Leg:
+    """Travel between two consecutive located stops of a day.
+
+    Attributes:
+        day: Day number.
+        from_index: Node index of the origin within the day.
+        to_index: Node index of the destination within the day.
+        km: Distance (straight-line, or by road once upgraded).
+        minutes: Travel time.
+        mode: "walking" or "driving".
+        source: "estimate" for the speed model, "amap" once upgraded.
+        gap_minutes: Time between the origin's end and the destination's
+            start, if both are scheduled.
+    """
+
+    day: int
+    from_index: int
+    to_index: int
+    km: float
+    minutes: float
+    mode: str
+    source: str = "estimate"
+    gap_minutes: Optional[int] = None
+
+    @property
+    def tight(self) -> bool:
+        """Whether the schedule leaves less time than the trip takes."""
+        return self.gap_minutes is not None and self.gap_minutes < self.minutes
+
+
+@dataclass
+class PlanDistances:
+    """Distance and time matrices over a plan's located nodes.
+
+    Row ``i`` of ``km``/``minutes`` is the node at ``positions[i]``
+    (day number, node index), located at ``coordinates[i]`` (lat, lng).
+    """
+
+    revision: str
+    positions: List[Tuple[int, int]]
+    names: List[str]
+    coordinates: np.ndarray
+    km: np.ndarray
+    minutes: np.ndarray
+    legs: Dict[int, List[Leg]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self._rows = {position: i for i, position in enumerate(self.positions)}
+
+    def index_of(self, day: int, index: int) -> Optional[int]:
+        return self._rows.get((day, index))
+
+    def location(self, day: int, index: int) -> str:
+        """AMap "lng,lat" string of a located node."""
+        lat, lng = self.coordinates[self._rows[(day, index)]]
+        return f"{lng:.6f},{lat:.6f}"
+
+    def between(self, a: Tuple[int, int], b: Tuple[int, int]) -> Optional[float]:
+        """Distance in km between two (day, index) positions."""
+        i, j = self.index_of(*a), self.index_of(*b)
+        if i is None or j is None:
+            return None
+        return float(self.km[i, j])
+
+    def day_km(self, day: int) -> float:
+        return sum(leg.km for leg in self.legs.get(day, []))
+
+    def day_minutes(self, day: int) -> float:
+        return sum(leg.minutes for leg in self.legs.get(day, []))
+
+    def tight_legs(self) -> List[Leg]:
+        """Legs whose scheduled gap is shorter than the travel time."""
+        return [leg for legs in self.legs.values() for leg in legs if leg.tight]
+
+
+def plan_revision(plan: TripSchema) -> str:
+    """Hash of everything the matrices depend on: stop order, places and times."""
+    payload = [
+        (
+            day.day,
+            node.name,
+            node.start_time,
+            node.end_time,
+            (node.coordinates.lat, node.coordinates.lng) if node.coordinates else None,
+        )
+        for day in plan.itinerary
+        for node in day.nodes
+    ]
+    return hashlib.sha1(
+        json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+
+def _build_legs(plan: TripSchema, distances: PlanDistances) -> Dict[int, List[Leg]]:
+    km, minutes = distances.km, distances.minutes
+    legs: Dict[int, List[Leg]] = {}
+    for day in plan.itinerary:
+        located = [
+            (i, node)
+            for i, node in enumerate(day.nodes)
+            if distances.index_of(day.day, i) is not None
+        ]
+        day_legs = []
+        for (a, origin), (b, dest) in zip(located, located[1:]):
+            ra, rb = distances.index_of(day.day, a), distances.index_of(day.day, b)
+            end, start = (
+                _minutes_of_day(origin.end_time),
+                _minutes_of_day(dest.start_time),
+            )
+            day_legs.append(
+                Leg(
+                    day=day.day,
+                    from_index=a,
+                    to_index=b,
+                    km=float(km[ra, rb]),
+                    minutes=float(minutes[ra, rb]),
+                    mode=travel_mode(float(km[ra, rb])),
+                    gap_minutes=start - end
+                    if start is not None and end is not None
+                    else None,
+                )
+            )
+        legs[day.day] = day_legs
+    return legs
+
+
+def plan_distances(plan: TripSchema) -> PlanDistances:
+    """Distance/time matrices and daily legs for a plan, cached per revision.
+
+    Args:
+        plan: The trip plan.
+
+    Returns:
+        The (shared) PlanDistances for this plan revision. Legs upgraded with
+        ``upgrade_legs`` stay upgraded for later callers.
+    """
+    revision = plan_revision(plan)
+    cached = _plan_cache.get(revision)
+    if cached is not None:
+        return cached
+
+    positions: List[Tuple[int, int]] = []
+    nodes: List[TripNodeSchema] = []
+    for day in plan.itinerary:
+        for i, node in enumerate(day.nodes):
+            if node.coordinates is not None:
+                positions.append((day.day, i))
+                nodes.append(node)
+
+    coordinates = np.array(
+        [(n.coordinates.lat, n.coordinates.lng) for n in nodes], dtype=float
+    ).reshape(-1, 2)
+    km = haversine_matrix(coordinates[:, 0], coordinates[:, 1])
+    distances = PlanDistances(
+        revision=revision,
+        positions=positions,
+        names=[n.name for n in nodes],
+        coordinates=coordinates,
+        km=km,
+        minutes=estimate_minutes(km),
+    )
+    distances.legs = _build_legs(plan, distances)
+    _plan_cache.set(revision, distances, ttl=24 * 3600)
+    return distances
+
+
+async def upgrade_legs(
+    distances: PlanDistances,
+    call: Optional[ToolCall] = None,
+    concurrency: Optional[int] = None,
+) -> int:
+    """Replace estimated leg times with AMap travel times.
+
+    Legs are grouped by destination and mode so each ``maps_distance`` call
+    covers every origin heading to the same place. Results are cached per
+    leg; failed calls leave the speed-model estimate in place.
+
+    Args:
+        distances: The plan's matrices, usually from ``plan_distances``.
+        call: Tool executor; defaults to the cached amap client.
+        concurrency: Max calls in flight (defaults to DISTANCE_CONCURRENCY).
+
+    Returns:
+        Number of legs upgraded.
+    """
+    if call is None:
+        from travel_assistant.backend.tools import call_amap
+
+        call = call_amap
+
+    batches: Dict[Tuple[str, str], List[Tuple[str, Leg]]] = defaultdict(list)
+    upgraded = 0
+    for legs in distances.legs.values():
+        for leg in legs:
+            if leg.source == "amap":
+                continue
+            origin = distances.location(leg.day, leg.from_index)
+            dest = distances.location(leg.day, leg.to_index)
+            cached = _leg_cache.get((origin, dest, leg.mode))
+            if cached is not None:
+                leg.km, leg.minutes, leg.source = cached[0], cached[1], "amap"
+                upgraded += 1
+            else:
+                batches[(dest, leg.mode)].append((origin, leg))
+
+    semaphore = asyncio.Semaphore(concurrency or DISTANCE_CONCURRENCY)
+
+    async def fetch(dest: str, mode: str, batch: List[Tuple[str, Leg]]) -> int:
+        origins = list(dict.fromkeys(origin for origin, _ in batch))
+        args = {
+            "origins": "|".join(origins),
+            "destination": dest,
+            "type": AMAP_DISTANCE_TYPES[mode],
+        }
+        async with semaphore:
+            try:
+                data = json.loads(await call("maps_distance", args))
+            except Exception as e:
+                print(f"Error fetching travel times to {dest}: {e}")
+                return 0
+        if not isinstance(data, dict) or "error" in data:
+            return 0
+
+        by_origin = {}
+        for result in data.get("results") or []:
+            try:
+                origin = origins[int(result["origin_id"]) - 1]
+                by_origin[origin] = (
+                    float(result["distance"]) / 1000,
+                    float(result["duration"]) / 60,
+                )
+            except (KeyError, IndexError, TypeError, ValueError):
+                continue
+        count = 0
+        for origin, leg in batch:
+            if origin in by_origin:
+                leg.km, leg.minutes = by_origin[origin]
+                leg.source = "amap"
+                _leg_cache.set((origin, dest, mode), by_origin[origin], ttl=LEG_TTL)
+                count += 1
+        return count
+
+    counts = await asyncio.gather(
+        *(fetch(dest, mode, batch) for (dest, mode), batch in batches.items())
+    )
+    return upgraded + sum(counts)
+
+
+def clear_distance_cache() -> None:
+    _plan_cache.clear()
+    _leg_cache.clear()
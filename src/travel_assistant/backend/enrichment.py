@@ -0,0 +1,213 @@
+"""Per-node enrichment shared across turns.
+
+Costs, hours, descriptions and coordinates found for itinerary nodes are
+stored in the graph state under ``enrichment``, keyed by destination and
+normalized node name. On modification turns only nodes without an entry (new
+or renamed) are looked up and refined; unchanged nodes get their stored
+details back even when the planner regenerated the whole plan.
+"""
+
+import re
+from typing import Dict, List, Set, Tuple
+
+from travel_assistant.backend.metrics import metrics
+from travel_assistant.backend.plan_patch import apply_plan_patch
+from travel_assistant.backend.schemas import (
+    CoordinateSchema,
+    PlanEditSchema,
+    PlanPatchSchema,
+    TripNodeSchema,
+    TripNodeUpdateSchema,
+    TripSchema,
+)
+
+# Node fields carried over between turns
+ENRICHED_FIELDS = ("description", "start_time", "end_time", "cost", "coordinates")
+
+# Node fields the LLM refine step may set; coordinates come from geocoding
+REFINED_FIELDS = {"cost", "description"}
+
+# (day number, index within the day, node)
+PendingNode = Tuple[int, int, TripNodeSchema]
+
+
+def normalize_name(text: str) -> str:
+    """Case-fold, drop punctuation and collapse whitespace."""
+    return " ".join(re.sub(r"[^\w\s]", " ", text or "").split()).casefold()
+
+
+def enrichment_key(destination: str, name: str) -> str:
+    return f"{normalize_name(destination)}|{normalize_name(name)}"
+
+
+def pending_nodes(
+    plan: TripSchema, destination: str, enrichment: Dict[str, dict]
+) -> List[PendingNode]:
+    """Return the nodes that have no stored enrichment yet."""
+    pending = []
+    for day in plan.itinerary:
+        for index, node in enumerate(day.nodes):
+            if enrichment_key(destination, node.name) not in enrichment:
+                pending.append((day.day, index, node))
+    return pending
+
+
+def restore_enrichment(
+    plan: TripSchema, destination: str, enrichment: Dict[str, dict]
+) -> TripSchema:
+    """Fill missing fields of known nodes from stored enrichment.
+
+    Returns the plan itself when nothing changed, otherwise an updated copy.
+    """
+    if not enrichment:
+        return plan
+    restored = plan.model_copy(deep=True)
+    changed = False
+    for day in restored.itinerary:
+        for index, node in enumerate(day.nodes):
+            stored = enrichment.get(enrichment_key(destination, node.name))
+            if not stored:
+                continue
+            missing = {
+                f: v
+                for f, v in stored.items()
+                if v is not None and getattr(node, f) is None
+            }
+            if missing:
+                day.nodes[index] = TripNodeSchema.model_validate(
+                    {**node.model_dump(), **missing}
+                )
+                changed = True
+    return restored if changed else plan
+
+
+def drop_coordinates(plan: TripSchema) -> TripSchema:
+    """Clear coordinates on a plan written by the LLM; only geocoding sets them.
+
+    Returns the plan itself when no node had coordinates, otherwise an updated copy.
+    """
+    if not any(node.coordinates for day in plan.itinerary for node in day.nodes):
+        return plan
+    stripped = plan.model_copy(deep=True)
+    for day in stripped.itinerary:
+        for node in day.nodes:
+            node.coordinates = None
+    return stripped
+
+
+def drop_patch_coordinates(patch: PlanPatchSchema) -> PlanPatchSchema:
+    """Clear coordinates on the nodes and updates of an LLM-written patch."""
+    edits = []
+    for edit in patch.edits:
+        if edit.node is not None and edit.node.coordinates is not None:
+            edit = edit.model_copy(
+                update={"node": edit.node.model_copy(update={"coordinates": None})}
+            )
+        if edit.updates is not None and edit.updates.coordinates is not None:
+            edit = edit.model_copy(
+                update={
+                    "updates": edit.updates.model_copy(update={"coordinates": None})
+                }
+            )
+        edits.append(edit)
+    return PlanPatchSchema(edits=edits)
+
+
+def apply_geocodes(
+    plan: TripSchema, destination: str, geocodes: Dict[str, dict]
+) -> TripSchema:
+    """Set coordinates from geocoding results on nodes that have none.
+
+    Returns the plan itself when nothing changed, otherwise an updated copy.
+    """
+    if not geocodes:
+        return plan
+    located = plan.model_copy(deep=True)
+    changed = False
+    for day in located.itinerary:
+        for node in day.nodes:
+            coordinates = geocodes.get(enrichment_key(destination, node.name))
+            if coordinates and node.coordinates is None:
+                node.coordinates = CoordinateSchema.model_validate(coordinates)
+                changed = True
+    return located if changed else plan
+
+
+def record_geocodes(enrichment: Dict[str, dict], geocodes: Dict[str, dict]) -> None:
+    """Add coordinates to already enriched entries that lacked them."""
+    for key, coordinates in (geocodes or {}).items():
+        entry = enrichment.get(key)
+        if entry is not None and not entry.get("coordinates"):
+            enrichment[key] = {**entry, "coordinates": coordinates}
+
+
+def record_enrichment(
+    plan: TripSchema, destination: str, pending: List[PendingNode], deferred: Set[str]
+) -> Dict[str, dict]:
+    """Build enrichment entries for the pending nodes that were sent to refine.
+
+    Every pending node gets an entry, so unchanged nodes are not refined again
+    on later turns. Nodes named in ``deferred`` (sights and hotels past the
+    search agents' lookup limits) get none and are looked up on the next turn.
+
+    Args:
+        plan: The refined plan.
+        destination: Destination the entries are keyed by.
+        pending: The pending nodes, as they were before refine.
+        deferred: Names of the nodes left for the next turn.
+    """
+    days = {day.day: day for day in plan.itinerary}
+    entries = {}
+    for day_number, index, original in pending:
+        if original.name in deferred:
+            continue
+        node = days[day_number].nodes[index]
+        data = node.model_dump(include=set(ENRICHED_FIELDS))
+        entries[enrichment_key(destination, node.name)] = data
+    return entries
+
+
+def apply_refine_patch(
+    plan: TripSchema, patch: PlanPatchSchema, pending: List[PendingNode]
+) -> TripSchema:
+    """Apply refine edits, keeping only in-place edits of pending nodes.
+
+    Edits that add or remove nodes, or touch nodes that are already enriched,
+    are dropped so refine can't disturb the rest of the plan. Updates and
+    replacements are both limited to costs and descriptions.
+
+    Raises:
+        PlanPatchError: If a remaining edit is invalid.
+    """
+    allowed = {(day, index) for day, index, _ in pending}
+    edits = []
+    for edit in patch.edits:
+        if (
+            edit.op not in ("update", "replace")
+            or (edit.day, edit.index) not in allowed
+        ):
+            continue
+        # Only costs and descriptions; names and times stay as planned,
+        # coordinates as geocoded
+        source = edit.node if edit.op == "replace" else edit.updates
+        fields = (
+            source.model_dump(include=REFINED_FIELDS, exclude_none=True)
+            if source is not None
+            else {}
+        )
+        if not fields:
+            continue
+        edits.append(
+            PlanEditSchema(
+                op="update",
+                day=edit.day,
+                index=edit.index,
+                updates=TripNodeUpdateSchema(**fields),
+            )
+        )
+    dropped = len(patch.edits) - len(edits)
+    if dropped:
+        metrics.incr("refine_edits_dropped_total", dropped)
+    if not edits:
+        return plan
+    return apply_plan_patch(plan, PlanPatchSchema(edits=edits))
@@ -1,11 +1,21 @@
 """Main graph definition for the travel assistant."""
 
+import os
+
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END, StateGraph
 
 from travel_assistant.backend.agents.nodes import (
+    agenerate_response,
+    aplan_itinerary,
+    attraction_discovery_agent,
+    aprocess_input,
+    arefine_itinerary,
     attraction_search_agent,
     generate_response,
+    geocode_itinerary,
     hotel_info_agent,
+    optimize_routes,
     plan_itinerary,
     process_input,
     weather_query_agent,
@@ -14,38 +24,89 @@ from travel_assistant.backend.agents.nodes import (
 )
 from travel_assistant.backend.state import TravelState
 
-# Create the graph
-builder = StateGraph(TravelState)
 
-# Add nodes
-builder.add_node("process_input", process_input)
-builder.add_node("attraction_search_agent", attraction_search_agent)
-builder.add_node("weather_query_agent", weather_query_agent)
-builder.add_node("hotel_info_agent", hotel_info_agent)
-builder.add_node("refine_itinerary", refine_itinerary)
-builder.add_node("plan_itinerary", plan_itinerary)
-builder.add_node("validate_budget", validate_budget)
-builder.add_node("generate_response", generate_response)
+def _dual_node(name: str, func, afunc) -> RunnableLambda:
+    """Register both implementations of a node.
+
+    ``graph.invoke`` runs the sync function, while ``graph.ainvoke`` and the
+    async streaming APIs await the async one so LLM calls don't block the loop.
+    """
+    return RunnableLambda(func, afunc=afunc, name=name)
+
+
+def speculative_planning_enabled() -> bool:
+    return os.getenv("SPECULATIVE_PLANNING", "false").lower() in ("1", "true", "yes")
+
+
+def create_builder(speculative: bool | None = None) -> StateGraph:
+    """Build the travel assistant graph.
+
+    Weather and a generic "top attractions" discovery fan out in parallel as
+    soon as process_input has extracted the destination, and the planner waits
+    for both. With ``speculative`` (or SPECULATIVE_PLANNING=true) the planner
+    starts right away instead, and the weather lookup runs alongside it and is
+    folded in by refine_itinerary.
+
+    Args:
+        speculative: Start planning before the weather is known. Defaults to
+            the SPECULATIVE_PLANNING environment variable.
+
+    Returns:
+        The uncompiled StateGraph builder.
+    """
+    if speculative is None:
+        speculative = speculative_planning_enabled()
+
+    builder = StateGraph(TravelState)
+
+    # Add nodes
+    builder.add_node("process_input", _dual_node("process_input", process_input, aprocess_input))
+    builder.add_node("attraction_search_agent", attraction_search_agent)
+    builder.add_node("weather_query_agent", weather_query_agent)
+    builder.add_node("hotel_info_agent", hotel_info_agent)
+    builder.add_node("geocode_itinerary", geocode_itinerary)
+    builder.add_node("refine_itinerary", _dual_node("refine_itinerary", refine_itinerary, arefine_itinerary))
+    builder.add_node("plan_itinerary", _dual_node("plan_itinerary", plan_itinerary, aplan_itinerary))
+    builder.add_node("optimize_routes", optimize_routes)
+    builder.add_node("validate_budget", validate_budget)
+    builder.add_node("generate_response", _dual_node("generate_response", generate_response, agenerate_response))
+
+    # Define the graph flow
+    builder.set_entry_point("process_input")
+
+    if speculative:
+        # Plan immediately; weather joins the plan's enrichment at refine time
+        builder.add_edge("process_input", "plan_itinerary")
+        builder.add_edge("process_input", "weather_query_agent")
+        refine_inputs = ["attraction_search_agent", "hotel_info_agent", "geocode_itinerary", "weather_query_agent"]
+    else:
+        # Fan-out once the destination is known, fan-in at the planner
+        builder.add_node("attraction_discovery_agent", attraction_discovery_agent)
+        builder.add_edge("process_input", "weather_query_agent")
+        builder.add_edge("process_input", "attraction_discovery_agent")
+        builder.add_edge(["weather_query_agent", "attraction_discovery_agent"], "plan_itinerary")
+        refine_inputs = ["attraction_search_agent", "hotel_info_agent", "geocode_itinerary"]
+
+    # Parallelize agents: Fan-out from planner
+    builder.add_edge("plan_itinerary", "attraction_search_agent")
+    builder.add_edge("plan_itinerary", "hotel_info_agent")
+    builder.add_edge("plan_itinerary", "geocode_itinerary")
+
+    # Fan-in to refine_itinerary
+    builder.add_edge(refine_inputs, "refine_itinerary")
+
+    builder.add_edge("refine_itinerary", "optimize_routes")
 
-# Define the graph flow
-# Define the graph flow
-builder.set_entry_point("process_input")
-builder.add_edge("process_input", "weather_query_agent")
-builder.add_edge("weather_query_agent", "plan_itinerary")
+    builder.add_edge("optimize_routes", "validate_budget")
 
-# Parallelize agents: Fan-out from planner
-builder.add_edge("plan_itinerary", "attraction_search_agent")
-builder.add_edge("plan_itinerary", "hotel_info_agent")
+    builder.add_edge("validate_budget", "generate_response")
 
-# Fan-in to refine_itinerary
-builder.add_edge("attraction_search_agent", "refine_itinerary")
-builder.add_edge("hotel_info_agent", "refine_itinerary")
+    builder.add_edge("generate_response", END)
 
-builder.add_edge("refine_itinerary", "validate_budget")
+    return builder
 
-builder.add_edge("validate_budget", "generate_response")
 
-builder.add_edge("generate_response", END)
+builder = create_builder()
 
 # Compile the graph
 graph = builder.compile()
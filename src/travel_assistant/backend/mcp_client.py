@@ -1,10 +1,266 @@
 import asyncio
+import itertools
 import os
-from typing import Any, Dict, List, Optional
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
 
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
+from travel_assistant.backend.tracing import record_tool_call
+
+# Longest wait between attempts to start a server that keeps failing
+MAX_RESPAWN_BACKOFF = 30.0
+
+# Seconds before a pool whose servers all failed to start is rebuilt
+FAILED_POOL_RETRY_SECONDS = 60.0
+
+
+class _PooledSession:
+    """A single warm MCP server subprocess held open by a supervisor task.
+
+    The stdio/session context managers must be entered and exited in the same
+    task, so each slot owns one long-running task that keeps the session open,
+    pings it periodically and respawns the subprocess when it dies. Callers
+    only borrow ``session`` to send requests; MCP multiplexes concurrent
+    requests over one session by JSON-RPC id.
+
+    A server that fails to start is retried with exponential backoff, and the
+    supervisor gives up after ``max_spawn_failures`` failed starts in a row.
+    """
+
+    def __init__(self, pool: "MCPSessionPool", index: int):
+        self.pool = pool
+        self.index = index
+        self.session: Optional[ClientSession] = None
+        self.ready = asyncio.Event()
+        self.check_now = asyncio.Event()
+        # Set while the latest attempt to start the server failed
+        self.spawn_failed = asyncio.Event()
+        self.spawn_failures = 0
+        self.last_error: Optional[Exception] = None
+        self.gave_up = False
+        self.in_flight = 0
+        self.spawn_count = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(
+            self._supervise(), name=f"{self.pool.server_name}-pool-{self.index}"
+        )
+
+    async def _supervise(self) -> None:
+        while not self.pool.closed:
+            try:
+                await self._run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = e
+                if self.ready.is_set():
+                    # A running session died: respawn right away
+                    backoff = self.pool.respawn_backoff
+                else:
+                    self.spawn_failures += 1
+                    self.spawn_failed.set()
+                    if self.spawn_failures >= self.pool.max_spawn_failures:
+                        print(
+                            f"MCP pool {self.pool.server_name}[{self.index}] giving up "
+                            f"after {self.spawn_failures} failed starts: {e}"
+                        )
+                        self.gave_up = True
+                        self.pool.slot_gave_up()
+                        return
+                    backoff = min(
+                        self.pool.respawn_backoff * 2 ** (self.spawn_failures - 1),
+                        MAX_RESPAWN_BACKOFF,
+                    )
+                print(
+                    f"MCP pool {self.pool.server_name}[{self.index}] session failed: {e}"
+                )
+                self.session = None
+                self.ready.clear()
+                await asyncio.sleep(backoff)
+            finally:
+                self.session = None
+                self.ready.clear()
+
+    async def _run_once(self) -> None:
+        params = self.pool.server_params()
+        async with stdio_client(params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                self.spawn_count += 1
+                self.spawn_failures = 0
+                self.spawn_failed.clear()
+                self.session = session
+                self.ready.set()
+
+                # Health check loop: ping every interval, or immediately after a
+                # failed call. A failed ping tears the session down for respawn.
+                while not self.pool.closed:
+                    try:
+                        await asyncio.wait_for(
+                            self.check_now.wait(), timeout=self.pool.health_interval
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                    self.check_now.clear()
+                    await asyncio.wait_for(
+                        session.send_ping(), timeout=self.pool.call_timeout
+                    )
+
+
+class MCPSessionPool:
+    """A pool of long-lived MCP server sessions bound to one event loop."""
+
+    def __init__(
+        self,
+        server_params_factory,
+        size: int,
+        server_name: str,
+        call_timeout: float = 60.0,
+        health_interval: float = 30.0,
+        respawn_backoff: float = 0.5,
+        max_spawn_failures: int = 5,
+    ):
+        """Initialize the pool.
+
+        Args:
+            server_params_factory: Callable returning fresh StdioServerParameters.
+            size: Number of server subprocesses to keep warm.
+            server_name: A human-readable name for logging/debugging.
+            call_timeout: Seconds to wait for a single tool call or ping.
+            health_interval: Seconds between health-check pings of idle sessions.
+            respawn_backoff: Initial delay before respawning a crashed session.
+            max_spawn_failures: Failed starts in a row after which a slot
+                stops respawning its server.
+        """
+        self.server_params = server_params_factory
+        self.size = size
+        self.server_name = server_name
+        self.call_timeout = call_timeout
+        self.health_interval = health_interval
+        self.respawn_backoff = respawn_backoff
+        self.max_spawn_failures = max_spawn_failures
+        self.closed = False
+        # When every slot gave up starting its server (see _PooledSession)
+        self.failed_at: Optional[float] = None
+        self.loop = asyncio.get_running_loop()
+        self.slots = [_PooledSession(self, i) for i in range(size)]
+        self._round_robin = itertools.count()
+        for slot in self.slots:
+            slot.start()
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> int:
+        """Wait until every slot has a live session or failed to start one
+        (or the timeout expires).
+
+        Returns:
+            The number of ready sessions.
+        """
+        waiters = [asyncio.create_task(self._settled(slot)) for slot in self.slots]
+        _, pending = await asyncio.wait(waiters, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        return sum(1 for slot in self.slots if slot.ready.is_set())
+
+    @staticmethod
+    async def _settled(slot: _PooledSession) -> None:
+        """Return once the slot is ready or its latest start failed."""
+        waiters = [
+            asyncio.create_task(slot.ready.wait()),
+            asyncio.create_task(slot.spawn_failed.wait()),
+        ]
+        try:
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in waiters:
+                task.cancel()
+
+    def slot_gave_up(self) -> None:
+        if all(slot.gave_up for slot in self.slots):
+            self.failed_at = time.monotonic()
+
+    async def _acquire(self) -> _PooledSession:
+        """Pick the ready session with the fewest in-flight requests.
+
+        Waits up to ``call_timeout`` for a session to come up, but fails at
+        once when no session is ready and every slot's last start failed.
+
+        Raises:
+            ConnectionError: If the servers are failing to start.
+            TimeoutError: If no session became ready in time.
+        """
+        deadline = self.loop.time() + self.call_timeout
+        while True:
+            ready = [slot for slot in self.slots if slot.ready.is_set()]
+            if ready:
+                break
+            if all(slot.spawn_failed.is_set() for slot in self.slots):
+                raise ConnectionError(
+                    f"{self.server_name} failed to start: {self.slots[-1].last_error}"
+                )
+            remaining = deadline - self.loop.time()
+            if remaining <= 0:
+                raise TimeoutError(f"No {self.server_name} session became ready")
+            waiters = [asyncio.create_task(slot.ready.wait()) for slot in self.slots]
+            waiters += [
+                asyncio.create_task(slot.spawn_failed.wait())
+                for slot in self.slots
+                if not slot.spawn_failed.is_set()
+            ]
+            try:
+                await asyncio.wait(
+                    waiters, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+            finally:
+                for task in waiters:
+                    task.cancel()
+        # Break ties round-robin so idle sessions share the load.
+        offset = next(self._round_robin)
+        ready = ready[offset % len(ready):] + ready[: offset % len(ready)]
+        return min(ready, key=lambda slot: slot.in_flight)
+
+    async def call_tool(self, tool_name: str, tool_args: Dict[str, Any]):
+        slot = await self._acquire()
+        slot.in_flight += 1
+        try:
+            return await slot.session.call_tool(
+                tool_name,
+                tool_args,
+                read_timeout_seconds=timedelta(seconds=self.call_timeout),
+            )
+        except Exception:
+            # The subprocess may have crashed mid-call; have the supervisor
+            # verify the session and respawn it if needed.
+            slot.check_now.set()
+            raise
+        finally:
+            slot.in_flight -= 1
+
+    async def list_tools(self):
+        slot = await self._acquire()
+        return await slot.session.list_tools()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "ready": sum(1 for slot in self.slots if slot.ready.is_set()),
+            "in_flight": sum(slot.in_flight for slot in self.slots),
+            "spawns": sum(slot.spawn_count for slot in self.slots),
+            "spawn_failures": sum(slot.spawn_failures for slot in self.slots),
+            "failed": self.failed_at is not None,
+        }
+
+    async def close(self) -> None:
+        self.closed = True
+        tasks = [slot.task for slot in self.slots if slot.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
 
 class MCPClientManager:
     """Generic Manager for connecting to MCP servers."""
@@ -15,6 +271,9 @@ class MCPClientManager:
         args: List[str],
         env: Optional[Dict[str, str]] = None,
         server_name: str = "mcp_server",
+        pool_size: int = 0,
+        call_timeout: float = 60.0,
+        health_interval: float = 30.0,
     ):
         """Initialize the MCP client manager.
 
@@ -23,15 +282,83 @@ class MCPClientManager:
             args: List of arguments for the command (e.g., ["-m", "amap_mcp_server"]).
             env: Environment variables to pass to the server process.
             server_name: A human-readable name for logging/debugging.
+            pool_size: Number of warm server subprocesses to keep open. 0 disables
+                pooling and spawns a fresh server for every call.
+            call_timeout: Seconds to wait for a pooled tool call.
+            health_interval: Seconds between health-check pings of pooled sessions.
         """
         self.command = command
         self.args = args
         self.env = env or os.environ.copy()
         self.server_name = server_name
+        self.pool_size = pool_size
+        self.call_timeout = call_timeout
+        self.health_interval = health_interval
+        self._pool: Optional[MCPSessionPool] = None
+
+    def _server_params(self) -> StdioServerParameters:
+        return StdioServerParameters(command=self.command, args=self.args, env=self.env)
+
+    def _get_pool(self) -> Optional[MCPSessionPool]:
+        """Return the session pool for the running event loop, creating it lazily.
+
+        A pool is tied to the loop that spawned it; when the caller runs on a new
+        loop (e.g. a fresh ``asyncio.run``) the stale pool is dropped and rebuilt.
+        A pool whose servers all failed to start is rebuilt, for another round
+        of attempts, once FAILED_POOL_RETRY_SECONDS have passed.
+        """
+        if self.pool_size <= 0:
+            return None
+        loop = asyncio.get_running_loop()
+        pool = self._pool
+        retry = (
+            pool is not None
+            and pool.failed_at is not None
+            and time.monotonic() - pool.failed_at >= FAILED_POOL_RETRY_SECONDS
+        )
+        if pool is None or pool.closed or pool.loop is not loop or retry:
+            if retry:
+                pool.closed = True
+            self._pool = MCPSessionPool(
+                self._server_params,
+                size=self.pool_size,
+                server_name=self.server_name,
+                call_timeout=self.call_timeout,
+                health_interval=self.health_interval,
+            )
+        return self._pool
+
+    async def start(self, timeout: Optional[float] = None) -> int:
+        """Pre-spawn the session pool so the first tool call doesn't pay startup.
+
+        Args:
+            timeout: Optional seconds to wait for the sessions to initialize.
+
+        Returns:
+            The number of ready sessions (0 when pooling is disabled).
+        """
+        pool = self._get_pool()
+        if pool is None:
+            return 0
+        return await pool.wait_ready(timeout=timeout)
+
+    async def close(self) -> None:
+        """Shut down all pooled server subprocesses."""
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            if pool.loop is asyncio.get_running_loop():
+                await pool.close()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the session pool (empty if not started)."""
+        return self._pool.stats() if self._pool else {}
 
     async def execute_tool(self, tool_name: str, tool_args: Dict[str, Any]) -> str:
         """Connect to the MCP server and execute a tool.
 
+        Uses a warm pooled session when pooling is enabled, otherwise spawns a
+        one-off server process for the call.
+
         Args:
             tool_name: The name of the tool to execute.
             tool_args: Dictionary of arguments for the tool.
@@ -39,27 +366,34 @@ class MCPClientManager:
         Returns:
             The text output from the tool execution.
         """
-        try:
-            server_params = StdioServerParameters(
-                command=self.command, args=self.args, env=self.env
-            )
-
-            async with stdio_client(server_params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
+        started = time.perf_counter()
+        output, error = await self._execute_tool(tool_name, tool_args)
+        record_tool_call(self.server_name, tool_name, time.perf_counter() - started,
+                         len(output.encode("utf-8")), error)
+        return output
 
-                    result = await session.call_tool(tool_name, tool_args)
+    async def _execute_tool(self, tool_name: str, tool_args: Dict[str, Any]) -> Tuple[str, bool]:
+        """Run the tool call; returns the text output and whether it failed."""
+        try:
+            pool = self._get_pool()
+            if pool is not None:
+                result = await pool.call_tool(tool_name, tool_args)
+            else:
+                async with stdio_client(self._server_params()) as (read, write):
+                    async with ClientSession(read, write) as session:
+                        await session.initialize()
+                        result = await session.call_tool(tool_name, tool_args)
 
-                    if result.isError:
-                        return f"Error executing {tool_name} on {self.server_name}: {result.content}"
+            if result.isError:
+                return f"Error executing {tool_name} on {self.server_name}: {result.content}", True
 
-                    text_output = "\n".join(
-                        [c.text for c in result.content if c.type == "text"]
-                    )
-                    return text_output
+            text_output = "\n".join(
+                [c.text for c in result.content if c.type == "text"]
+            )
+            return text_output, False
 
         except Exception as e:
-            return f"Error calling {self.server_name} tool {tool_name}: {str(e)}"
+            return f"Error calling {self.server_name} tool {tool_name}: {str(e)}", True
 
     async def list_tools(self) -> Any:
         """List available tools on the MCP server.
@@ -68,11 +402,11 @@ class MCPClientManager:
             The list of tools returned by the server.
         """
         try:
-            server_params = StdioServerParameters(
-                command=self.command, args=self.args, env=self.env
-            )
+            pool = self._get_pool()
+            if pool is not None:
+                return await pool.list_tools()
 
-            async with stdio_client(server_params) as (read, write):
+            async with stdio_client(self._server_params()) as (read, write):
                 async with ClientSession(read, write) as session:
                     await session.initialize()
                     return await session.list_tools()
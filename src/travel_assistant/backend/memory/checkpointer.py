@@ -1,21 +1,529 @@
-"""Memory checkpointer configuration."""
+"""Memory checkpointer configuration.
+
+One long-lived checkpointer serves the whole process instead of a new
+connection per chat message. On top of LangGraph's ``AsyncSqliteSaver`` it
+tunes SQLite (WAL, synchronous=NORMAL, a larger page cache), keeps only the
+last N checkpoints of each thread, drops threads idle for more than T days and
+compacts the file with VACUUM in a background task once enough pages are free.
+
+Checkpoints use the compact encoding of ``serde.py``: zstd-compressed msgpack,
+with messages and plan days stored once as content-addressed blobs that later
+checkpoints reference instead of repeating.
+
+Settings (environment):
+    CHECKPOINT_KEEP_LAST: Checkpoints kept per thread (default 20).
+    CHECKPOINT_THREAD_TTL_DAYS: Idle days before a thread is dropped (default 30).
+    CHECKPOINT_MAINTENANCE_INTERVAL: Seconds between maintenance runs (default 600).
+    CHECKPOINT_CACHE_MB: SQLite page cache size (default 32).
+    CHECKPOINT_VACUUM_MIN_FREE_MB: Free space that triggers a VACUUM (default 16).
+    CHECKPOINT_COMPACT: Write the compact encoding (default true). Compact
+        checkpoints are read either way.
+"""
+
+import asyncio
 import os
+import time
+from collections import deque
 from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+import aiosqlite
 from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 
+from travel_assistant.backend.memory.cache import LRUTTLCache, data_path
+from travel_assistant.backend.memory.serde import (
+    CompactSerializer,
+    join_channel_values,
+    referenced_hashes,
+    split_channel_values,
+)
+from travel_assistant.backend.metrics import metrics, percentile
+
+CHECKPOINT_DB = "travel_memory.sqlite"
+
+# Seconds between updates of a thread's last-write time
+ACTIVITY_RESOLUTION = 60
+
+# Raw blobs kept in memory, so consecutive loads of a thread skip the query
+BLOB_CACHE_ENTRIES = 4096
+BLOB_CACHE_TTL = 3600
+
+
+class TimedLock(asyncio.Lock):
+    """asyncio.Lock that records how long callers wait for it.
+
+    The saver serializes every query on one connection through its lock, so
+    waits here are the checkpointer's contention between concurrent threads.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_seconds = 0.0
+        self._waits: deque = deque(maxlen=1024)
+
+    async def acquire(self) -> bool:
+        self.acquisitions += 1
+        if not self.locked():
+            return await super().acquire()
+        started = time.perf_counter()
+        result = await super().acquire()
+        waited = time.perf_counter() - started
+        self.contended += 1
+        self.wait_seconds += waited
+        self._waits.append(waited)
+        metrics.observe("checkpoint_lock_wait_seconds", waited)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        samples = list(self._waits)
+        return {
+            "lock_acquisitions": self.acquisitions,
+            "lock_contended": self.contended,
+            "lock_wait_seconds": self.wait_seconds,
+            "lock_wait_p50_ms": percentile(samples, 50) * 1000,
+            "lock_wait_p99_ms": percentile(samples, 99) * 1000,
+        }
+
+
+class TunedSqliteSaver(AsyncSqliteSaver):
+    """AsyncSqliteSaver with tuned pragmas, retention, compaction and stats."""
+
+    def __init__(
+        self,
+        conn: aiosqlite.Connection,
+        *,
+        path: Optional[str] = None,
+        keep_last: int = 20,
+        thread_ttl: float = 30 * 24 * 3600,
+        cache_mb: int = 32,
+        vacuum_min_free_mb: float = 16,
+        compact: bool = True,
+        **kwargs: Any,
+    ):
+        """Initialize the saver.
+
+        Args:
+            conn: An open aiosqlite connection.
+            path: Database file, used to report the WAL size.
+            keep_last: Checkpoints kept per thread and namespace.
+            thread_ttl: Seconds without writes before a thread is dropped.
+            cache_mb: SQLite page cache size.
+            vacuum_min_free_mb: Free space in the file that triggers VACUUM.
+            compact: Whether to write compressed, deduplicated checkpoints.
+        """
+        kwargs.setdefault("serde", CompactSerializer(compress=compact))
+        super().__init__(conn, **kwargs)
+        self.lock = TimedLock()
+        self.compact = compact
+        self.path = path
+        self.keep_last = keep_last
+        self.thread_ttl = thread_ttl
+        self.cache_mb = cache_mb
+        self.vacuum_min_free_mb = vacuum_min_free_mb
+        self.pruned_checkpoints = 0
+        self.dropped_threads = 0
+        self.vacuums = 0
+        self.collected_blobs = 0
+        self._blob_cache = LRUTTLCache(max_entries=BLOB_CACHE_ENTRIES)
+        self.last_maintenance: Optional[float] = None
+        self._write_latencies: deque = deque(maxlen=1024)
+        self._active_threads: set = set()
+        self._last_touch: Dict[str, float] = {}
+        self._maintenance_task: Optional[asyncio.Task] = None
+
+    async def setup(self) -> None:
+        if self.is_setup:
+            return
+        await super().setup()
+        async with self.lock:
+            await self.conn.executescript(
+                f"""
+                PRAGMA synchronous=NORMAL;
+                PRAGMA cache_size=-{self.cache_mb * 1024};
+                PRAGMA temp_store=MEMORY;
+                PRAGMA busy_timeout=5000;
+                CREATE TABLE IF NOT EXISTS thread_activity (
+                    thread_id TEXT PRIMARY KEY,
+                    last_write REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS checkpoint_blobs (
+                    hash TEXT PRIMARY KEY,
+                    type TEXT NOT NULL,
+                    data BLOB NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS checkpoint_blob_refs (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL DEFAULT '',
+                    checkpoint_id TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, hash)
+                );
+                CREATE INDEX IF NOT EXISTS checkpoint_blob_refs_hash ON checkpoint_blob_refs (hash);
+                """
+            )
+            # Threads written before retention existed start their idle clock now
+            await self.conn.execute(
+                "INSERT OR IGNORE INTO thread_activity (thread_id, last_write) SELECT DISTINCT thread_id, ? FROM checkpoints",
+                (time.time(),),
+            )
+            await self.conn.commit()
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        started = time.perf_counter()
+        thread_id = str(config["configurable"]["thread_id"])
+        if self.compact:
+            checkpoint = await self._store_blobs(thread_id, config["configurable"].get("checkpoint_ns", ""), checkpoint)
+        result = await super().aput(config, checkpoint, metadata, new_versions)
+        now = time.time()
+        # A turn writes many checkpoints; the idle clock only needs minute precision
+        if now - self._last_touch.get(thread_id, 0) > ACTIVITY_RESOLUTION:
+            self._last_touch[thread_id] = now
+            async with self.lock:
+                await self.conn.execute(
+                    "INSERT OR REPLACE INTO thread_activity (thread_id, last_write) VALUES (?, ?)",
+                    (thread_id, now),
+                )
+                await self.conn.commit()
+        self._active_threads.add(thread_id)
+        elapsed = time.perf_counter() - started
+        self._write_latencies.append(elapsed)
+        metrics.observe("checkpoint_write_seconds", elapsed)
+        return result
+
+    async def aget_tuple(self, config):
+        saved = await super().aget_tuple(config)
+        return await self._inflate(saved) if saved is not None else None
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        # Blobs are only fetched for the tuples the caller actually consumes.
+        # super().alist holds the lock while it yields, so the blob query
+        # runs under it already.
+        async for saved in super().alist(
+            config, filter=filter, before=before, limit=limit
+        ):
+            yield await self._inflate(saved, locked=True)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await super().adelete_thread(thread_id)
+        async with self.lock:
+            await self.conn.execute("DELETE FROM thread_activity WHERE thread_id = ?", (str(thread_id),))
+            await self.conn.execute("DELETE FROM checkpoint_blob_refs WHERE thread_id = ?", (str(thread_id),))
+            await self.conn.commit()
+
+    # -- compact encoding -----------------------------------------------------
+
+    async def _store_blobs(self, thread_id: str, checkpoint_ns: str, checkpoint: dict) -> dict:
+        """Store the checkpoint's messages and plan days as blobs.
+
+        Returns:
+            A copy of the checkpoint whose channel values reference the blobs.
+        """
+        values, blobs = split_channel_values(checkpoint["channel_values"], self.serde)
+        if not blobs:
+            return checkpoint
+        await self.setup()
+        async with self.lock:
+            # Checked under the lock: collect_blobs deletes blobs and clears the
+            # cache while holding it, so a cached hash is still on disk here
+            new = {key: blob for key, blob in blobs.items() if self._blob_cache.get(key) is None}
+            # Left for super().aput's commit, so blobs land with their checkpoint
+            await self.conn.executemany(
+                "INSERT OR IGNORE INTO checkpoint_blobs (hash, type, data) VALUES (?, ?, ?)",
+                [(key, type_, data) for key, (type_, data) in new.items()],
+            )
+            await self.conn.executemany(
+                "INSERT OR IGNORE INTO checkpoint_blob_refs (thread_id, checkpoint_ns, checkpoint_id, hash) "
+                "VALUES (?, ?, ?, ?)",
+                [(thread_id, checkpoint_ns, checkpoint["id"], key) for key in blobs],
+            )
+            for key, blob in new.items():
+                self._blob_cache.set(key, blob, ttl=BLOB_CACHE_TTL)
+        return {**checkpoint, "channel_values": values}
+
+    async def _inflate(self, saved, locked: bool = False):
+        """Resolve the blob references of a loaded checkpoint tuple.
+
+        Blobs are decoded when the tuple is loaded: LangGraph reads channel
+        values as plain objects, so they can't be resolved on first access.
+
+        Args:
+            saved: The checkpoint tuple as stored.
+            locked: Whether the caller already holds ``self.lock``.
+        """
+        values = saved.checkpoint["channel_values"]
+        hashes = referenced_hashes(values)
+        if not hashes:
+            return saved
+        raw = {key: self._blob_cache.get(key) for key in hashes}
+        missing = [key for key, blob in raw.items() if blob is None]
+        if missing:
+            if locked:
+                raw.update(await self._fetch_blobs(missing))
+            else:
+                # The connection is shared with collect_blobs, prune and vacuum
+                async with self.lock:
+                    raw.update(await self._fetch_blobs(missing))
+        decoded = {key: self.serde.loads_typed(blob) for key, blob in raw.items()}
+        checkpoint = {
+            **saved.checkpoint,
+            "channel_values": join_channel_values(values, decoded),
+        }
+        return saved._replace(checkpoint=checkpoint)
+
+    async def _fetch_blobs(self, hashes: list) -> dict:
+        """Read blobs from disk into the cache; the caller holds ``self.lock``."""
+        placeholders = ",".join("?" * len(hashes))
+        found = {}
+        async with self.conn.execute(
+            "SELECT hash, type, data FROM checkpoint_blobs "
+            f"WHERE hash IN ({placeholders})",
+            hashes,
+        ) as cursor:
+            for key, type_, data in await cursor.fetchall():
+                found[key] = (type_, data)
+                self._blob_cache.set(key, (type_, data), ttl=BLOB_CACHE_TTL)
+        return found
+
+    async def collect_blobs(self) -> int:
+        """Delete blobs no longer referenced by any checkpoint.
+
+        Returns:
+            Number of blobs deleted.
+        """
+        await self.setup()
+        async with self.lock:
+            cursor = await self.conn.execute(
+                "DELETE FROM checkpoint_blobs WHERE hash NOT IN (SELECT hash FROM checkpoint_blob_refs)"
+            )
+            await self.conn.commit()
+            # Cached blobs may be gone from disk now and must not skip their insert
+            self._blob_cache.clear()
+        self.collected_blobs += cursor.rowcount
+        return cursor.rowcount
+
+    # -- retention ------------------------------------------------------------
+
+    async def prune_thread(self, thread_id: str) -> int:
+        """Delete all but the last ``keep_last`` checkpoints (and their writes) of a thread.
+
+        Returns:
+            Number of checkpoints deleted.
+        """
+        await self.setup()
+        deleted = 0
+        async with self.lock:
+            async with self.conn.execute(
+                "SELECT DISTINCT checkpoint_ns FROM checkpoints WHERE thread_id = ?", (thread_id,)
+            ) as cursor:
+                namespaces = [row[0] for row in await cursor.fetchall()]
+            for ns in namespaces:
+                # Checkpoint ids are time-ordered, so the cutoff is the N-th newest id
+                async with self.conn.execute(
+                    "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+                    (thread_id, ns, self.keep_last - 1),
+                ) as cursor:
+                    row = await cursor.fetchone()
+                if row is None:
+                    continue
+                cursor = await self.conn.execute(
+                    "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                    (thread_id, ns, row[0]),
+                )
+                deleted += cursor.rowcount
+                for table in ("writes", "checkpoint_blob_refs"):
+                    await self.conn.execute(
+                        f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                        (thread_id, ns, row[0]),
+                    )
+            await self.conn.commit()
+        self.pruned_checkpoints += deleted
+        return deleted
+
+    async def drop_idle_threads(self) -> int:
+        """Delete threads without writes for longer than ``thread_ttl``.
+
+        Returns:
+            Number of threads deleted.
+        """
+        await self.setup()
+        async with self.lock:
+            async with self.conn.execute(
+                "SELECT thread_id FROM thread_activity WHERE last_write < ?", (time.time() - self.thread_ttl,)
+            ) as cursor:
+                idle = [row[0] for row in await cursor.fetchall()]
+        for thread_id in idle:
+            await self.adelete_thread(thread_id)
+            self._active_threads.discard(thread_id)
+            self._last_touch.pop(thread_id, None)
+        self.dropped_threads += len(idle)
+        return len(idle)
+
+    async def vacuum_if_needed(self, force: bool = False) -> bool:
+        """VACUUM the database once its free pages exceed ``vacuum_min_free_mb``.
+
+        Returns:
+            Whether a VACUUM ran.
+        """
+        stats = await self._page_stats()
+        if not force and stats["free_bytes"] < self.vacuum_min_free_mb * 1024 * 1024:
+            return False
+        async with self.lock:
+            await self.conn.commit()
+            await self.conn.execute("VACUUM")
+            await self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.vacuums += 1
+        return True
+
+    async def maintain(self) -> Dict[str, Any]:
+        """Run one maintenance pass: prune threads written since the last pass,
+        drop idle threads, delete unreferenced blobs and VACUUM if worthwhile.
+
+        Returns:
+            The report after maintenance.
+        """
+        active, self._active_threads = self._active_threads, set()
+        for thread_id in active:
+            await self.prune_thread(thread_id)
+        await self.drop_idle_threads()
+        await self.collect_blobs()
+        await self.vacuum_if_needed()
+        self.last_maintenance = time.time()
+        report = await self.report()
+        metrics.observe("checkpoint_db_bytes", report["db_bytes"])
+        metrics.observe("checkpoint_count", report["checkpoints"])
+        return report
+
+    def start_maintenance(self, interval: float) -> None:
+        """Run ``maintain`` now and then every ``interval`` seconds on the current event loop."""
+        if self._maintenance_task is not None and not self._maintenance_task.done():
+            return
+
+        async def loop():
+            while True:
+                try:
+                    await self.maintain()
+                except Exception as e:
+                    print(f"Error maintaining checkpointer: {e}")
+                await asyncio.sleep(interval)
+
+        self._maintenance_task = asyncio.get_running_loop().create_task(loop())
+
+    async def stop_maintenance(self) -> None:
+        task, self._maintenance_task = self._maintenance_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    # -- reporting ------------------------------------------------------------
+
+    async def _scalar(self, query: str) -> Any:
+        async with self.conn.execute(query) as cursor:
+            row = await cursor.fetchone()
+        return row[0] if row else None
+
+    async def _page_stats(self) -> Dict[str, int]:
+        page_size = await self._scalar("PRAGMA page_size")
+        pages = await self._scalar("PRAGMA page_count")
+        free = await self._scalar("PRAGMA freelist_count")
+        return {"db_bytes": page_size * pages, "free_bytes": page_size * free}
+
+    async def report(self) -> Dict[str, Any]:
+        """Database size, row counts, retention activity, write latency and lock contention."""
+        await self.setup()
+        stats = await self._page_stats()
+        wal = f"{self.path}-wal" if self.path else None
+        samples = list(self._write_latencies)
+        return {
+            **stats,
+            "wal_bytes": os.path.getsize(wal) if wal and os.path.exists(wal) else 0,
+            "threads": await self._scalar("SELECT COUNT(*) FROM thread_activity"),
+            "checkpoints": await self._scalar("SELECT COUNT(*) FROM checkpoints"),
+            "writes": await self._scalar("SELECT COUNT(*) FROM writes"),
+            "blobs": await self._scalar("SELECT COUNT(*) FROM checkpoint_blobs"),
+            "pruned_checkpoints": self.pruned_checkpoints,
+            "dropped_threads": self.dropped_threads,
+            "vacuums": self.vacuums,
+            "collected_blobs": self.collected_blobs,
+            "last_maintenance": self.last_maintenance,
+            "write_count": len(samples),
+            "write_p50_ms": percentile(samples, 50) * 1000,
+            "write_p95_ms": percentile(samples, 95) * 1000,
+            **self.lock.stats(),
+        }
+
+    async def close(self) -> None:
+        await self.stop_maintenance()
+        await self.conn.close()
+
+
+_checkpointer: Optional[TunedSqliteSaver] = None
+
+
+async def open_checkpointer(path: Optional[str] = None, maintenance_interval: Optional[float] = None) -> TunedSqliteSaver:
+    """Open a TunedSqliteSaver configured from the environment.
+
+    Args:
+        path: Database file (defaults to data/travel_memory.sqlite).
+        maintenance_interval: Seconds between background maintenance runs;
+            0 disables them. Defaults to CHECKPOINT_MAINTENANCE_INTERVAL.
+    """
+    path = path or data_path(CHECKPOINT_DB)
+    if maintenance_interval is None:
+        maintenance_interval = float(os.getenv("CHECKPOINT_MAINTENANCE_INTERVAL", "600"))
+    conn = await aiosqlite.connect(path)
+    saver = TunedSqliteSaver(
+        conn,
+        path=path,
+        keep_last=int(os.getenv("CHECKPOINT_KEEP_LAST", "20")),
+        thread_ttl=float(os.getenv("CHECKPOINT_THREAD_TTL_DAYS", "30")) * 24 * 3600,
+        cache_mb=int(os.getenv("CHECKPOINT_CACHE_MB", "32")),
+        vacuum_min_free_mb=float(os.getenv("CHECKPOINT_VACUUM_MIN_FREE_MB", "16")),
+        compact=os.getenv("CHECKPOINT_COMPACT", "true").lower() in ("1", "true", "yes"),
+    )
+    await saver.setup()
+    if maintenance_interval > 0:
+        saver.start_maintenance(maintenance_interval)
+    return saver
+
+
+async def get_checkpointer() -> TunedSqliteSaver:
+    """Return the process-wide checkpointer, opening it on first use.
+
+    The saver is bound to the event loop it was opened on; when called from a
+    different loop (e.g. a new ``asyncio.run``) it is reopened there.
+    """
+    global _checkpointer
+    loop = asyncio.get_running_loop()
+    if _checkpointer is not None and _checkpointer.loop is not loop:
+        # The old loop is gone; just stop the connection's worker thread
+        _checkpointer.conn.stop()
+        _checkpointer = None
+    if _checkpointer is None:
+        _checkpointer = await open_checkpointer()
+    return _checkpointer
+
+
+async def close_checkpointer() -> None:
+    """Close the process-wide checkpointer (e.g. on shutdown)."""
+    global _checkpointer
+    saver, _checkpointer = _checkpointer, None
+    if saver is not None:
+        await saver.close()
+
+
 @asynccontextmanager
 async def get_async_checkpointer():
-    """Get the Async SQLite checkpointer via context manager.
-    
+    """Get the shared Async SQLite checkpointer via context manager.
+
+    The checkpointer stays open after the block so later messages reuse it.
+
     Yields:
-        AsyncSqliteSaver: The configured checkpointer.
+        TunedSqliteSaver: The configured checkpointer.
     """
-    # Ensure data directory exists
-    data_dir = os.path.join(os.getcwd(), "data")
-    os.makedirs(data_dir, exist_ok=True)
-    
-    db_path = os.path.join(data_dir, "travel_memory.sqlite")
-    conn_string = db_path
-    
-    async with AsyncSqliteSaver.from_conn_string(conn_string) as saver:
-        yield saver
+    yield await get_checkpointer()
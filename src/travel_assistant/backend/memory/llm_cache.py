@@ -0,0 +1,213 @@
+"""Opt-in LLM response cache layered under get_llm.
+
+Responses are keyed by the serialized prompt messages and the model's
+``llm_string`` (model name, parameters and bound tools, i.e. the output
+schema). Cached generations keep their tool calls, so structured outputs are
+re-parsed into ``InputSchema``/``TripSchema`` exactly like live responses.
+"""
+
+import copy
+import hashlib
+import os
+import threading
+import time
+import warnings
+from typing import Any, Dict, Optional
+
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from pydantic import BaseModel
+
+from travel_assistant.backend.memory.cache import (
+    LRUTTLCache,
+    SqliteCacheStore,
+    data_path,
+)
+from travel_assistant.backend.metrics import metrics
+
+# Time-to-live (seconds) per cache namespace, usually the graph node name.
+# Override with LLM_CACHE_TTL_<NAMESPACE>, e.g. LLM_CACHE_TTL_PLAN_ITINERARY=600.
+DEFAULT_TTLS = {
+    "process_input": 3600,
+    "conversation_summary": 24 * 3600,
+    "plan_itinerary": 6 * 3600,
+    "plan_patch": 6 * 3600,
+    "refine_itinerary": 6 * 3600,
+    "generate_response": 24 * 3600,
+    "default": 3600,
+}
+
+
+def llm_cache_enabled() -> bool:
+    return os.getenv("LLM_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+
+
+def get_ttl(namespace: str) -> float:
+    """Return the TTL for a namespace, honoring env overrides."""
+    default = DEFAULT_TTLS.get(namespace, DEFAULT_TTLS["default"])
+    return float(os.getenv(f"LLM_CACHE_TTL_{namespace.upper()}", default))
+
+
+def _serializable_generations(return_val: RETURN_VAL_TYPE) -> list:
+    """Replace parsed pydantic objects (json_schema mode) with plain dicts.
+
+    ``langchain_core.load`` can't serialize arbitrary models, and the structured
+    output parser rebuilds the schema from a dict.
+    """
+    generations = []
+    for gen in return_val:
+        message = getattr(gen, "message", None)
+        parsed = (
+            message.additional_kwargs.get("parsed") if message is not None else None
+        )
+        if isinstance(parsed, BaseModel):
+            kwargs = {**message.additional_kwargs, "parsed": parsed.model_dump()}
+            gen = gen.model_copy(
+                update={
+                    "message": message.model_copy(update={"additional_kwargs": kwargs})
+                }
+            )
+        generations.append(gen)
+    return generations
+
+
+class LLMResponseCache:
+    """Two-tier response store: in-memory LRU in front of an SQLite file."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        memory_entries: int = 256,
+        disk_entries: int = 5000,
+    ):
+        """Initialize the cache.
+
+        Args:
+            path: SQLite file for the disk tier; None keeps the cache in memory only.
+            memory_entries: Max entries in the in-memory LRU tier.
+            disk_entries: Max entries per namespace in the disk tier.
+        """
+        self.memory = LRUTTLCache(memory_entries)
+        self.disk = SqliteCacheStore(path, disk_entries) if path else None
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(
+        self, namespace: str, prompt: str, llm_string: str
+    ) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+
+        value = self.memory.get((namespace, key))
+        if value is not None:
+            metrics.incr(
+                "llm_cache_requests_total", namespace=namespace, result="memory_hit"
+            )
+            # Callers own what they get back; edits must not reach later hits
+            return copy.deepcopy(value)
+
+        if self.disk is not None:
+            row = self.disk.get(namespace, key)
+            if row is not None:
+                blob, expires_at = row
+                try:
+                    with warnings.catch_warnings():
+                        warnings.simplefilter("ignore", LangChainBetaWarning)
+                        value = loads(blob.decode("utf-8"))
+                except Exception as e:
+                    print(f"Error decoding cached LLM response: {e}")
+                else:
+                    ttl = expires_at - time.time()
+                    self.memory.set((namespace, key), value, ttl)
+                    metrics.incr(
+                        "llm_cache_requests_total",
+                        namespace=namespace,
+                        result="disk_hit",
+                    )
+                    return copy.deepcopy(value)
+
+        metrics.incr("llm_cache_requests_total", namespace=namespace, result="miss")
+        return None
+
+    def update(
+        self,
+        namespace: str,
+        prompt: str,
+        llm_string: str,
+        return_val: RETURN_VAL_TYPE,
+        ttl: float,
+    ) -> None:
+        key = self._key(prompt, llm_string)
+        self.memory.set((namespace, key), copy.deepcopy(return_val), ttl)
+        if self.disk is not None:
+            blob = dumps(_serializable_generations(return_val)).encode("utf-8")
+            self.disk.set(namespace, key, blob, ttl)
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear(namespace)
+
+    def for_node(self, namespace: str, ttl: Optional[float] = None) -> "NodeLLMCache":
+        """Return a LangChain cache view that applies the namespace's TTL."""
+        return NodeLLMCache(
+            store=self,
+            namespace=namespace,
+            ttl=ttl if ttl is not None else get_ttl(namespace),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counts per namespace plus tier sizes."""
+        stats: Dict[str, Any] = {"namespaces": {}}
+        for counter in metrics.snapshot()["counters"]:
+            if counter["name"] != "llm_cache_requests_total":
+                continue
+            ns = stats["namespaces"].setdefault(
+                counter["labels"]["namespace"],
+                {"memory_hit": 0, "disk_hit": 0, "miss": 0},
+            )
+            ns[counter["labels"]["result"]] += counter["value"]
+        stats["memory_entries"] = len(self.memory)
+        stats["memory_evictions"] = self.memory.evictions
+        stats["disk_entries"] = self.disk.count() if self.disk else 0
+        stats["disk_evictions"] = self.disk.evictions if self.disk else 0
+        return stats
+
+
+class NodeLLMCache(BaseCache):
+    """LangChain ``BaseCache`` adapter bound to one namespace and TTL."""
+
+    def __init__(self, store: LLMResponseCache, namespace: str, ttl: float):
+        self.store = store
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        return self.store.lookup(self.namespace, prompt, llm_string)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.store.update(self.namespace, prompt, llm_string, return_val, self.ttl)
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear(self.namespace)
+
+
+_response_cache: Optional[LLMResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[LLMResponseCache]:
+    """Return the process-wide response cache, or None when caching is disabled."""
+    global _response_cache
+    if not llm_cache_enabled():
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = LLMResponseCache(
+                path=data_path("llm_cache.sqlite"),
+                memory_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256")),
+                disk_entries=int(os.getenv("LLM_CACHE_DISK_ENTRIES", "5000")),
+            )
+        return _response_cache
@@ -0,0 +1,469 @@
+"""Persistent local POI/geocode store with a spatial index.
+
+Every POI the amap tools return is kept in SQLite, keyed by normalized name
+and city, so popular landmarks are resolved locally instead of through the MCP
+server. Located POIs are indexed in an R-tree (or, on SQLite builds without
+the R-tree module, a lat/lng B-tree) for "within X km" queries.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from travel_assistant.backend.enrichment import normalize_name
+from travel_assistant.backend.memory.cache import data_path
+from travel_assistant.backend.metrics import metrics
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+@dataclass
+class POI:
+    """A stored point of interest. ``lat``/``lng`` are None until located."""
+
+    name: str
+    city: str
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    address: Optional[str] = None
+    poi_id: Optional[str] = None
+    typecode: Optional[str] = None
+    distance_km: Optional[float] = None
+
+    @property
+    def located(self) -> bool:
+        return self.lat is not None and self.lng is not None
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _parse_json(output: str) -> Optional[Dict[str, Any]]:
+    try:
+        data = json.loads(output)
+    except (json.JSONDecodeError, TypeError):
+        return None
+    if not isinstance(data, dict) or "error" in data:
+        return None
+    return data
+
+
+def _parse_lng_lat(location: Any) -> Optional[Tuple[float, float]]:
+    if not isinstance(location, str) or "," not in location:
+        return None
+    try:
+        lng, lat = (float(part) for part in location.split(",")[:2])
+    except ValueError:
+        return None
+    return lng, lat
+
+
+def _text(value: Any) -> Optional[str]:
+    # AMap returns [] for empty string fields
+    return value if isinstance(value, str) and value else None
+
+
+class POIStore:
+    """SQLite POI store with name lookup, radius queries, LRU/TTL eviction and stats."""
+
+    _COLUMNS = "name, city, lat, lng, address, poi_id, typecode"
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        max_entries: int = 50000,
+        ttl: float = 90 * 24 * 3600,
+    ):
+        """Initialize the store.
+
+        Args:
+            path: SQLite file; ":memory:" keeps the store in memory.
+            max_entries: Least recently used POIs are evicted above this size.
+            ttl: Seconds before a POI is considered stale and purged.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._requests = {kind: {"hit": 0, "miss": 0} for kind in ("name", "nearby")}
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pois (
+                id INTEGER PRIMARY KEY,
+                name_key TEXT NOT NULL,
+                city_key TEXT NOT NULL,
+                name TEXT NOT NULL,
+                city TEXT NOT NULL,
+                lat REAL,
+                lng REAL,
+                address TEXT,
+                poi_id TEXT,
+                typecode TEXT,
+                updated_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                UNIQUE (name_key, city_key)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pois_poi_id ON pois (poi_id)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS pois_last_access ON pois (last_access)"
+        )
+        try:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS pois_rtree "
+                "USING rtree(id, min_lat, max_lat, min_lng, max_lng)"
+            )
+            self.spatial_index = "rtree"
+        except sqlite3.OperationalError:
+            # SQLite built without the R-tree module: bounding-box scans on a B-tree
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS pois_lat_lng ON pois (lat, lng)"
+            )
+            self.spatial_index = "btree"
+        self._conn.commit()
+
+    # -- writes ---------------------------------------------------------------
+
+    def add(
+        self,
+        name: str,
+        city: str,
+        lat: Optional[float] = None,
+        lng: Optional[float] = None,
+        address: Optional[str] = None,
+        poi_id: Optional[str] = None,
+        typecode: Optional[str] = None,
+    ) -> None:
+        """Insert or update a POI. Known coordinates are never overwritten with None."""
+        self.add_many([POI(name, city, lat, lng, address, poi_id, typecode)])
+
+    def add_many(self, pois: Iterable[POI]) -> None:
+        now = time.time()
+        with self._lock:
+            for poi in pois:
+                if not poi.name:
+                    continue
+                self._conn.execute(
+                    """
+                    INSERT INTO pois (name_key, city_key, name, city, lat, lng, address,
+                                      poi_id, typecode, updated_at, last_access)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (name_key, city_key) DO UPDATE SET
+                        lat = COALESCE(excluded.lat, lat),
+                        lng = COALESCE(excluded.lng, lng),
+                        address = COALESCE(excluded.address, address),
+                        poi_id = COALESCE(excluded.poi_id, poi_id),
+                        typecode = COALESCE(excluded.typecode, typecode),
+                        updated_at = excluded.updated_at
+                    """,
+                    (
+                        normalize_name(poi.name),
+                        normalize_name(poi.city),
+                        poi.name,
+                        poi.city,
+                        poi.lat,
+                        poi.lng,
+                        poi.address or None,
+                        poi.poi_id or None,
+                        poi.typecode or None,
+                        now,
+                        now,
+                    ),
+                )
+                if poi.lat is not None and poi.lng is not None:
+                    self._index(normalize_name(poi.name), normalize_name(poi.city))
+            self._writes += 1
+            if self._writes % 100 == 1:
+                self._purge_expired(now)
+            self._evict()
+            self._conn.commit()
+
+    def locate(
+        self, poi_id: str, lat: float, lng: float, address: Optional[str] = None
+    ) -> int:
+        """Set coordinates on every stored entry of an AMap POI id.
+
+        Returns:
+            Number of entries updated.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name_key, city_key FROM pois WHERE poi_id = ?", (poi_id,)
+            ).fetchall()
+            self._conn.execute(
+                "UPDATE pois SET lat = ?, lng = ?, address = COALESCE(?, address), "
+                "updated_at = ? WHERE poi_id = ?",
+                (lat, lng, address or None, time.time(), poi_id),
+            )
+            for name_key, city_key in rows:
+                self._index(name_key, city_key)
+            self._conn.commit()
+            return len(rows)
+
+    def _index(self, name_key: str, city_key: str) -> None:
+        if self.spatial_index != "rtree":
+            return
+        self._conn.execute(
+            """
+            INSERT OR REPLACE INTO pois_rtree (id, min_lat, max_lat, min_lng, max_lng)
+            SELECT id, lat, lat, lng, lng FROM pois WHERE name_key = ? AND city_key = ?
+            """,
+            (name_key, city_key),
+        )
+
+    def _delete_where(self, condition: str, params: tuple) -> int:
+        ids = [
+            row[0]
+            for row in self._conn.execute(
+                f"SELECT id FROM pois WHERE {condition}", params
+            )
+        ]
+        if not ids:
+            return 0
+        placeholders = ",".join("?" * len(ids))
+        self._conn.execute(f"DELETE FROM pois WHERE id IN ({placeholders})", ids)
+        if self.spatial_index == "rtree":
+            self._conn.execute(
+                f"DELETE FROM pois_rtree WHERE id IN ({placeholders})", ids
+            )
+        return len(ids)
+
+    def _purge_expired(self, now: float) -> None:
+        self.evictions += self._delete_where("updated_at < ?", (now - self.ttl,))
+
+    def _evict(self) -> None:
+        count = self._conn.execute("SELECT COUNT(*) FROM pois").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow <= 0:
+            return
+        # Evict a little more than needed so eviction doesn't run on every write
+        overflow += self.max_entries // 10
+        self.evictions += self._delete_where(
+            "id IN (SELECT id FROM pois ORDER BY last_access ASC LIMIT ?)", (overflow,)
+        )
+
+    # -- reads ----------------------------------------------------------------
+
+    def _count(self, kind: str, hit: bool) -> None:
+        result = "hit" if hit else "miss"
+        self._requests[kind][result] += 1
+        metrics.incr("poi_store_requests_total", kind=kind, result=result)
+
+    def _row_to_poi(self, row: tuple) -> POI:
+        return POI(*row)
+
+    def lookup(self, name: str, city: str) -> Optional[POI]:
+        """Find a POI by name and city (normalized)."""
+        name_key, city_key = normalize_name(name), normalize_name(city)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM pois "
+                "WHERE name_key = ? AND city_key = ? AND updated_at >= ?",
+                (name_key, city_key, time.time() - self.ttl),
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE pois SET last_access = ? "
+                    "WHERE name_key = ? AND city_key = ?",
+                    (time.time(), name_key, city_key),
+                )
+                self._conn.commit()
+        self._count("name", row is not None)
+        return self._row_to_poi(row) if row else None
+
+    def within(
+        self,
+        lat: float,
+        lng: float,
+        radius_km: float,
+        keywords: Optional[str] = None,
+        limit: int = 50,
+    ) -> List[POI]:
+        """Return located POIs within ``radius_km`` of a point, nearest first.
+
+        Args:
+            lat: Latitude of the centre.
+            lng: Longitude of the centre.
+            radius_km: Search radius in kilometres.
+            keywords: Optional text that the POI name must contain.
+            limit: Max results.
+        """
+        dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+        dlng = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        box = (lat - dlat, lat + dlat, lng - dlng, lng + dlng)
+        if self.spatial_index == "rtree":
+            columns = ", ".join("p." + c.strip() for c in self._COLUMNS.split(","))
+            query = (
+                f"SELECT {columns} FROM pois_rtree r "
+                "JOIN pois p ON p.id = r.id "
+                "WHERE r.min_lat >= ? AND r.max_lat <= ? "
+                "AND r.min_lng >= ? AND r.max_lng <= ? AND p.updated_at >= ?"
+            )
+        else:
+            query = (
+                f"SELECT {self._COLUMNS} FROM pois "
+                "WHERE lat BETWEEN ? AND ? AND lng BETWEEN ? AND ? AND updated_at >= ?"
+            )
+        with self._lock:
+            rows = self._conn.execute(query, (*box, time.time() - self.ttl)).fetchall()
+
+        needle = normalize_name(keywords) if keywords else ""
+        results = []
+        for row in rows:
+            poi = self._row_to_poi(row)
+            if needle and needle not in normalize_name(poi.name):
+                continue
+            poi.distance_km = haversine_km(lat, lng, poi.lat, poi.lng)
+            if poi.distance_km <= radius_km:
+                results.append(poi)
+        results.sort(key=lambda p: p.distance_km)
+        return results[:limit]
+
+    # -- amap tool integration ------------------------------------------------
+
+    def record_tool_output(
+        self, tool_name: str, tool_args: Dict[str, Any], output: str
+    ) -> None:
+        """Store the POIs of a ``maps_text_search`` or ``maps_search_detail`` result."""
+        data = _parse_json(output)
+        if data is None:
+            return
+        if tool_name == "maps_text_search":
+            city = tool_args.get("city") or ""
+            self.add_many(
+                POI(
+                    name=poi.get("name") or "",
+                    city=city,
+                    address=_text(poi.get("address")),
+                    poi_id=poi.get("id"),
+                    typecode=_text(poi.get("typecode")),
+                )
+                for poi in data.get("pois") or []
+                if isinstance(poi, dict)
+            )
+        elif tool_name == "maps_search_detail":
+            location = _parse_lng_lat(data.get("location"))
+            if location is None or not data.get("id"):
+                return
+            lng, lat = location
+            if not self.locate(
+                data["id"], lat, lng, _text(data.get("address"))
+            ) and data.get("name"):
+                self.add(
+                    data["name"],
+                    _text(data.get("city")) or "",
+                    lat,
+                    lng,
+                    _text(data.get("address")),
+                    data["id"],
+                    _text(data.get("type")),
+                )
+
+    def around_search(
+        self, tool_args: Dict[str, Any], min_results: int = 5
+    ) -> Optional[str]:
+        """Answer a ``maps_around_search`` call locally, in the server's output format.
+
+        Returns:
+            The JSON output, or None when fewer than ``min_results`` stored POIs
+            match and the real server should be asked instead.
+        """
+        location = _parse_lng_lat(tool_args.get("location"))
+        if location is None:
+            return None
+        lng, lat = location
+        try:
+            radius_km = float(tool_args.get("radius") or 1000) / 1000
+        except ValueError:
+            return None
+        pois = self.within(
+            lat, lng, radius_km, keywords=tool_args.get("keywords") or None
+        )
+        hit = len(pois) >= min_results
+        self._count("nearby", hit)
+        if not hit:
+            return None
+        return json.dumps(
+            {
+                "pois": [
+                    {
+                        "id": poi.poi_id,
+                        "name": poi.name,
+                        "address": poi.address,
+                        "typecode": poi.typecode,
+                    }
+                    for poi in pois
+                ]
+            },
+            ensure_ascii=False,
+        )
+
+    def count(self, located_only: bool = False) -> int:
+        with self._lock:
+            where = " WHERE lat IS NOT NULL" if located_only else ""
+            return self._conn.execute(f"SELECT COUNT(*) FROM pois{where}").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counts and hit rates per query kind plus store size."""
+        stats: Dict[str, Any] = {}
+        for kind, counts in self._requests.items():
+            total = counts["hit"] + counts["miss"]
+            stats[kind] = {
+                **counts,
+                "hit_rate": counts["hit"] / total if total else 0.0,
+            }
+        stats["entries"] = self.count()
+        stats["located_entries"] = self.count(located_only=True)
+        stats["evictions"] = self.evictions
+        stats["spatial_index"] = self.spatial_index
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM pois")
+            if self.spatial_index == "rtree":
+                self._conn.execute("DELETE FROM pois_rtree")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_poi_store: Optional[POIStore] = None
+_poi_store_lock = threading.Lock()
+
+
+def get_poi_store() -> Optional[POIStore]:
+    """Return the process-wide POI store, or None when POI_STORE_ENABLED is off.
+
+    Stored in data/poi_store.sqlite; POI_STORE_MAX_ENTRIES and
+    POI_STORE_TTL_DAYS tune eviction.
+    """
+    global _poi_store
+    if os.getenv("POI_STORE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    with _poi_store_lock:
+        if _poi_store is None:
+            _poi_store = POIStore(
+                path=data_path("poi_store.sqlite"),
+                max_entries=int(os.getenv("POI_STORE_MAX_ENTRIES", "50000")),
+                ttl=float(os.getenv("POI_STORE_TTL_DAYS", "90")) * 24 * 3600,
+            )
+        return _poi_store
@@ -0,0 +1,167 @@
+"""Compact checkpoint encoding.
+
+A checkpoint normally stores the whole TravelState, so every step of every
+turn rewrites the full message history and trip plan even though most steps
+change neither. Two things make checkpoints small:
+
+- ``CompactSerializer`` wraps LangGraph's msgpack serializer and compresses
+  anything larger than a few hundred bytes with zstd.
+- ``split_channel_values`` replaces the message history and the trip plan's
+  days with references to content-addressed blobs. A checkpoint then only
+  adds the messages and days that changed since the previous one; everything
+  else is already stored. ``join_channel_values`` puts them back on load.
+
+Values written before the compact encoding existed carry no references and
+uncompressed type tags, so they still load unchanged.
+"""
+
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import zstandard
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from travel_assistant.backend.schemas import TripSchema
+
+ZSTD_SUFFIX = "+zstd"
+
+# Key marking a channel value that was replaced by blob references
+REF_KEY = "__blob_ref__"
+
+Blob = Tuple[str, bytes]
+
+
+class CompactSerializer(SerializerProtocol):
+    """msgpack serializer that zstd-compresses larger payloads.
+
+    Compressed values get the inner type tag with a ``+zstd`` suffix; smaller
+    values and values of other serializers pass through untouched.
+    """
+
+    def __init__(
+        self,
+        inner: Optional[SerializerProtocol] = None,
+        level: int = 3,
+        min_size: int = 256,
+        compress: bool = True,
+    ):
+        """Initialize the serializer.
+
+        Args:
+            inner: Serializer producing the uncompressed payload.
+            level: zstd compression level.
+            min_size: Payloads shorter than this many bytes stay uncompressed.
+            compress: Whether to compress at all; compressed values are
+                decoded either way.
+        """
+        self.inner = inner or JsonPlusSerializer()
+        self.compress = compress
+        self.level = level
+        self.min_size = min_size
+        # zstd (de)compressor objects are not thread-safe
+        self._local = threading.local()
+
+    def _compressor(self) -> zstandard.ZstdCompressor:
+        if not hasattr(self._local, "compressor"):
+            self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+            self._local.decompressor = zstandard.ZstdDecompressor()
+        return self._local.compressor
+
+    def _decompressor(self) -> zstandard.ZstdDecompressor:
+        self._compressor()
+        return self._local.decompressor
+
+    def dumps_typed(self, obj: Any) -> Blob:
+        type_, data = self.inner.dumps_typed(obj)
+        if not self.compress or len(data) < self.min_size:
+            return type_, data
+        return type_ + ZSTD_SUFFIX, self._compressor().compress(data)
+
+    def loads_typed(self, data: Blob) -> Any:
+        type_, payload = data
+        if type_.endswith(ZSTD_SUFFIX):
+            type_ = type_[: -len(ZSTD_SUFFIX)]
+            payload = self._decompressor().decompress(payload)
+        return self.inner.loads_typed((type_, payload))
+
+
+def blob_hash(blob: Blob) -> str:
+    type_, data = blob
+    return hashlib.sha1(type_.encode("utf-8") + b"\0" + data).hexdigest()
+
+
+def split_channel_values(
+    values: Dict[str, Any], serde: SerializerProtocol
+) -> Tuple[Dict[str, Any], Dict[str, Blob]]:
+    """Replace the message history and plan days with blob references.
+
+    Args:
+        values: A checkpoint's ``channel_values``; not modified.
+        serde: Serializer used for the blobs.
+
+    Returns:
+        The channel values to store and the blobs they reference, by hash.
+    """
+    blobs: Dict[str, Blob] = {}
+
+    def store(obj: Any) -> str:
+        blob = serde.dumps_typed(obj)
+        key = blob_hash(blob)
+        blobs[key] = blob
+        return key
+
+    values = dict(values)
+    messages = values.get("messages")
+    if isinstance(messages, list) and messages:
+        values["messages"] = {
+            REF_KEY: "messages",
+            "items": [store(m) for m in messages],
+        }
+    plan = values.get("trip_plan")
+    if isinstance(plan, TripSchema):
+        values["trip_plan"] = {
+            REF_KEY: "trip_plan",
+            "header": plan.model_dump(exclude={"itinerary"}),
+            "days": [store(day) for day in plan.itinerary],
+        }
+    return values, blobs
+
+
+def _refs(value: Any) -> List[str]:
+    if not isinstance(value, dict) or REF_KEY not in value:
+        return []
+    return value["items"] if value[REF_KEY] == "messages" else value["days"]
+
+
+def referenced_hashes(values: Dict[str, Any]) -> Set[str]:
+    """Blob hashes referenced by stored channel values."""
+    return {key for value in values.values() for key in _refs(value)}
+
+
+def join_channel_values(
+    values: Dict[str, Any], blobs: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Inverse of ``split_channel_values``.
+
+    Args:
+        values: Stored channel values; not modified.
+        blobs: Decoded blob objects by hash.
+
+    Returns:
+        The channel values with messages and plan restored.
+    """
+    if not referenced_hashes(values):
+        return values
+    values = dict(values)
+    for channel, value in values.items():
+        if not isinstance(value, dict) or REF_KEY not in value:
+            continue
+        if value[REF_KEY] == "messages":
+            values[channel] = [blobs[key] for key in value["items"]]
+        else:
+            values[channel] = TripSchema(
+                **value["header"], itinerary=[blobs[key] for key in value["days"]]
+            )
+    return values
@@ -0,0 +1,202 @@
+"""Lightweight in-process metrics for the travel assistant.
+
+Counters and observations can be exported in the Prometheus text format,
+either served over HTTP (``serve_prometheus``) or written to a file for a
+textfile collector (``write_prometheus``). Observations whose name ends in
+``_seconds``, ``_bytes`` or ``_tokens`` are exported as histograms, others as
+summaries.
+"""
+
+import os
+import tempfile
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Number of recent samples kept per series for percentile estimates
+MAX_SAMPLES = 1024
+
+# Histogram bucket upper bounds, by metric name suffix
+BUCKETS = {
+    "_seconds": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+    "_bytes": (256, 1024, 4096, 16384, 65536, 262144, 1048576),
+    "_tokens": (16, 64, 256, 1024, 4096, 16384),
+}
+
+
+def buckets_for(name: str) -> Tuple[float, ...]:
+    for suffix, bounds in BUCKETS.items():
+        if name.endswith(suffix):
+            return bounds
+    return ()
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def percentile(samples: list, q: float) -> float:
+    """Return the q-th percentile (0-100) of samples using nearest-rank."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1))))
+    return ordered[rank]
+
+
+class MetricsRegistry:
+    """Thread-safe registry of counters and timing observations."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._observations: Dict[Tuple[str, LabelKey], Dict[str, Any]] = {}
+
+    def incr(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        """Increment a counter."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Record one observation (e.g. a latency in seconds)."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            series = self._observations.get(key)
+            if series is None:
+                bounds = buckets_for(name)
+                series = {"count": 0, "sum": 0.0, "samples": deque(maxlen=MAX_SAMPLES),
+                          "bounds": bounds, "buckets": [0] * len(bounds)}
+                self._observations[key] = series
+            series["count"] += 1
+            series["sum"] += value
+            series["samples"].append(value)
+            for i, bound in enumerate(series["bounds"]):
+                if value <= bound:
+                    series["buckets"][i] += 1
+
+    def counter(self, name: str, **labels: Any) -> float:
+        """Return the current value of a counter."""
+        with self._lock:
+            return self._counters.get((name, _label_key(labels)), 0.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a plain-dict view of all counters and observation summaries."""
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in self._counters.items()
+            ]
+            observations = []
+            for (name, labels), series in self._observations.items():
+                samples = list(series["samples"])
+                observations.append({
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": series["count"],
+                    "sum": series["sum"],
+                    "p50": percentile(samples, 50),
+                    "p95": percentile(samples, 95),
+                    "max": max(samples) if samples else 0.0,
+                    # Cumulative counts per upper bound, as in a Prometheus histogram
+                    "buckets": list(zip(series["bounds"], series["buckets"])),
+                })
+        return {"counters": counters, "observations": observations}
+
+    def reset(self) -> None:
+        """Drop all recorded metrics."""
+        with self._lock:
+            self._counters.clear()
+            self._observations.clear()
+
+    def to_prometheus(self, prefix: str = "travel_") -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+        typed = set()
+
+        def header(name: str, kind: str) -> None:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for counter in sorted(snapshot["counters"], key=lambda c: c["name"]):
+            name = prefix + counter["name"]
+            header(name, "counter")
+            lines.append(f"{name}{_format_labels(counter['labels'])} {_format_value(counter['value'])}")
+
+        for obs in sorted(snapshot["observations"], key=lambda o: o["name"]):
+            name = prefix + obs["name"]
+            labels = obs["labels"]
+            if obs["buckets"]:
+                header(name, "histogram")
+                for bound, count in obs["buckets"]:
+                    lines.append(f"{name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {count}")
+                lines.append(f"{name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {obs['count']}")
+            else:
+                header(name, "summary")
+                for q in ("p50", "p95"):
+                    quantile = str(int(q[1:]) / 100)
+                    lines.append(f"{name}{_format_labels({**labels, 'quantile': quantile})} {_format_value(obs[q])}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(obs['sum'])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {obs['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
+
+
+def write_prometheus(path: str, registry: Optional[MetricsRegistry] = None) -> None:
+    """Write the metrics to ``path`` atomically (for a node_exporter textfile collector)."""
+    registry = registry or metrics
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(registry.to_prometheus())
+    os.replace(tmp, path)
+
+
+def serve_prometheus(port: int, host: str = "127.0.0.1", registry: Optional[MetricsRegistry] = None) -> ThreadingHTTPServer:
+    """Serve the metrics at ``/metrics`` from a daemon thread.
+
+    Returns:
+        The running server; call ``shutdown()`` to stop it.
+    """
+    registry = registry or metrics
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
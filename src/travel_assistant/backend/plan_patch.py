@@ -0,0 +1,106 @@
+"""Apply compact edit operations to an existing TripSchema.
+
+Modification turns ask the model for a ``PlanPatchSchema`` (a few edits
+addressed by day number and node index) instead of the whole plan. The edits
+are validated and applied here; any invalid edit rejects the whole patch so
+the caller can fall back to full regeneration.
+"""
+
+from typing import List
+
+from pydantic import ValidationError
+
+from travel_assistant.backend.schemas import (
+    DailyItinerarySchema,
+    PlanEditSchema,
+    PlanPatchSchema,
+    TripNodeSchema,
+    TripSchema,
+)
+
+
+class PlanPatchError(ValueError):
+    """Raised when a patch can't be applied to the plan."""
+
+
+def _find_day(plan: TripSchema, day_number: int) -> DailyItinerarySchema:
+    for day in plan.itinerary:
+        if day.day == day_number:
+            return day
+    raise PlanPatchError(f"Day {day_number} does not exist in the plan")
+
+
+def _check_index(edit: PlanEditSchema, nodes: List[TripNodeSchema]) -> int:
+    if edit.index is None or not 0 <= edit.index < len(nodes):
+        raise PlanPatchError(
+            f"'{edit.op}' on day {edit.day} needs an index between 0 and "
+            f"{len(nodes) - 1}, got {edit.index}"
+        )
+    return edit.index
+
+
+def _apply_edit(plan: TripSchema, edit: PlanEditSchema) -> None:
+    nodes = _find_day(plan, edit.day).nodes
+
+    if edit.op == "add":
+        if edit.node is None:
+            raise PlanPatchError(f"'add' on day {edit.day} is missing the node")
+        index = len(nodes) if edit.index is None else edit.index
+        if not 0 <= index <= len(nodes):
+            raise PlanPatchError(
+                f"'add' on day {edit.day} index {index} is out of range"
+            )
+        nodes.insert(index, edit.node.model_copy(deep=True))
+
+    elif edit.op == "remove":
+        del nodes[_check_index(edit, nodes)]
+
+    elif edit.op == "replace":
+        if edit.node is None:
+            raise PlanPatchError(f"'replace' on day {edit.day} is missing the node")
+        nodes[_check_index(edit, nodes)] = edit.node.model_copy(deep=True)
+
+    elif edit.op == "update":
+        index = _check_index(edit, nodes)
+        changes = edit.updates.model_dump(exclude_none=True) if edit.updates else {}
+        if not changes:
+            raise PlanPatchError(
+                f"'update' on day {edit.day} index {index} has no fields to change"
+            )
+        current = nodes[index].model_dump()
+        if (
+            changes.get("name", current["name"]) != current["name"]
+            and "coordinates" not in changes
+        ):
+            current["coordinates"] = (
+                None  # A renamed node is another place; geocode it again
+            )
+        try:
+            nodes[index] = TripNodeSchema.model_validate({**current, **changes})
+        except ValidationError as e:
+            raise PlanPatchError(
+                f"'update' on day {edit.day} index {index} is invalid: {e}"
+            ) from e
+
+
+def apply_plan_patch(plan: TripSchema, patch: PlanPatchSchema) -> TripSchema:
+    """Apply a patch to a copy of the plan.
+
+    Args:
+        plan: The existing plan; it is not modified.
+        patch: Edits to apply in order. Indices of later edits refer to the
+            plan as changed by the earlier ones.
+
+    Returns:
+        The patched plan.
+
+    Raises:
+        PlanPatchError: If the patch is empty or any edit is invalid.
+    """
+    if not patch.edits:
+        raise PlanPatchError("Patch contains no edits")
+
+    patched = plan.model_copy(deep=True)
+    for edit in patch.edits:
+        _apply_edit(patched, edit)
+    return patched
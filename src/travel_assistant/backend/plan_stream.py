@@ -0,0 +1,210 @@
+"""Incremental parsing of the planner's streamed TripSchema JSON.
+
+The planner emits one JSON document. Instead of waiting for the whole
+document, ``IncrementalTripParser`` scans the text as it arrives and
+validates each entry of the ``itinerary`` array as soon as its closing brace
+is seen, so days can be shown while later days are still being written. If
+the stream ends malformed, ``salvage`` rebuilds the plan from everything up to
+the last complete value, losing only the unfinished day.
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from pydantic import ValidationError
+
+from travel_assistant.backend.schemas import DailyItinerarySchema, TripSchema
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class _Container:
+    """An open JSON object or array while scanning."""
+
+    __slots__ = ("kind", "key", "expect_key", "start")
+
+    def __init__(self, kind: str, key: Optional[str], start: int):
+        self.kind = kind
+        # Key under which this container sits in its parent object
+        self.key = key
+        self.expect_key = kind == "{"
+        self.start = start
+
+
+class IncrementalTripParser:
+    """Streaming scanner that yields validated days from partial TripSchema JSON."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.days: List[DailyItinerarySchema] = []
+        self.errors: List[str] = []
+        self._pos = 0
+        self._started = False
+        self._stack: List[_Container] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._pending_key: Optional[str] = None
+        self._last_key: Optional[str] = None
+        # Longest prefix that forms valid JSON once the open containers are closed
+        self._safe_end = 0
+        self._safe_suffix = ""
+
+    def _in_itinerary(self) -> bool:
+        """True when the innermost container is the top-level itinerary array."""
+        return (
+            len(self._stack) == 2
+            and self._stack[1].kind == "["
+            and self._stack[1].key == "itinerary"
+        )
+
+    def _mark_safe(self, end: int) -> None:
+        self._safe_end = end
+        self._safe_suffix = "".join(_CLOSERS[c.kind] for c in reversed(self._stack))
+
+    def feed(self, text: str) -> List[DailyItinerarySchema]:
+        """Consume a chunk of streamed text.
+
+        Args:
+            text: The next piece of the planner output.
+
+        Returns:
+            Days that were completed by this chunk, in order.
+        """
+        self.buffer += text
+        completed = []
+        buf = self.buffer
+
+        while self._pos < len(buf):
+            i = self._pos
+            ch = buf[i]
+            self._pos += 1
+
+            if not self._started:
+                # Skip any preamble such as a ```json fence
+                if ch == "{":
+                    self._started = True
+                    self._stack.append(_Container("{", None, i))
+                    self._mark_safe(i + 1)
+                continue
+
+            if not self._stack:
+                # Document already closed; ignore trailing text
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    top = self._stack[-1]
+                    if top.kind == "{" and top.expect_key:
+                        try:
+                            self._pending_key = json.loads(
+                                buf[self._string_start : i + 1]
+                            )
+                        except json.JSONDecodeError:
+                            self._pending_key = None
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":":
+                top = self._stack[-1]
+                if top.kind == "{":
+                    top.expect_key = False
+                    self._last_key = self._pending_key
+            elif ch == ",":
+                top = self._stack[-1]
+                if top.kind == "{":
+                    top.expect_key = True
+                if len(self._stack) == 1 or self._in_itinerary():
+                    self._mark_safe(i)
+            elif ch in _CLOSERS:
+                key = self._last_key if self._stack[-1].kind == "{" else None
+                self._stack.append(_Container(ch, key, i))
+                self._last_key = None
+                if self._in_itinerary():
+                    self._mark_safe(i + 1)
+            elif ch in ("}", "]"):
+                closed = self._stack.pop()
+                if ch == "}" and self._in_itinerary():
+                    day = self._validate_day(buf[closed.start : i + 1])
+                    if day is not None:
+                        self.days.append(day)
+                        completed.append(day)
+                if not self._stack or len(self._stack) == 1 or self._in_itinerary():
+                    self._mark_safe(i + 1)
+
+        return completed
+
+    def _validate_day(self, raw: str) -> Optional[DailyItinerarySchema]:
+        try:
+            return DailyItinerarySchema.model_validate(json.loads(raw))
+        except (json.JSONDecodeError, ValidationError) as e:
+            self.errors.append(f"Skipping malformed day: {e}")
+            return None
+
+    def salvage(self) -> Optional[TripSchema]:
+        """Build the best TripSchema available from the text received so far.
+
+        Uses the full document when it parses; otherwise everything up to the
+        last complete top-level value or day. The itinerary is always the list
+        of days that validated individually.
+
+        Returns:
+            The recovered plan, or None if not even the required fields arrived.
+        """
+        candidates = [self.buffer[self.buffer.find("{") :]] if self._started else []
+        if self._safe_end:
+            start = self.buffer.find("{")
+            prefix = self.buffer[start : self._safe_end].rstrip().rstrip(",")
+            candidates.append(prefix + self._safe_suffix)
+
+        for text in candidates:
+            try:
+                data: Dict[str, Any] = json.loads(text)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(data, dict):
+                continue
+            data["itinerary"] = [day.model_dump() for day in self.days]
+            try:
+                return TripSchema.model_validate(data)
+            except ValidationError as e:
+                self.errors.append(f"Salvaged plan is invalid: {e}")
+                return None
+        return None
+
+
+class PlanStreamHandler(BaseCallbackHandler):
+    """Feeds streamed planner tokens into an ``IncrementalTripParser``.
+
+    Args:
+        parser: The parser receiving the tokens.
+        on_day: Called with each validated day as soon as it completes.
+    """
+
+    # Keep token order; the parser is cheap enough to run on the event loop
+    run_inline = True
+
+    def __init__(
+        self,
+        parser: IncrementalTripParser,
+        on_day: Optional[Callable[[DailyItinerarySchema], None]] = None,
+    ):
+        self.parser = parser
+        self.on_day = on_day
+
+    def on_llm_new_token(self, token: str, *, chunk: Any = None, **kwargs: Any) -> None:
+        message = getattr(chunk, "message", None)
+        # The final structured-output chunk repeats the whole document
+        if message is not None and "parsed" in message.additional_kwargs:
+            return
+        for day in self.parser.feed(token):
+            if self.on_day is not None:
+                self.on_day(day)
@@ -19,15 +19,36 @@ PLANNER_MODIFICATION_SYSTEM_PROMPT = (
     "If the user asks to remove something, find a suitable replacement or adjust timings."
 )
 
+PLANNER_PATCH_SYSTEM_PROMPT = (
+    "You are an expert travel assistant editor. Your goal is to MODIFY an existing travel itinerary "
+    "based on the user's specific feedback or request, by returning a short list of edit operations. "
+    "Nodes are addressed by day number and their 0-based [index] within that day, as shown in the plan outline. "
+    "Use 'replace' to swap a node for a new one, 'update' to change only some fields (e.g. times or cost), "
+    "'add' to insert a new node at an index and 'remove' to delete one. "
+    "Edits are applied in order, so indices of later edits must account for earlier adds and removes. "
+    "Only include edits the request needs; do NOT repeat unchanged parts of the plan. "
+    "If the user asks to remove something, find a suitable replacement or adjust timings."
+)
+
 INPUT_EXTRACTION_SYSTEM_PROMPT = (
     "You are a helpful travel assistant. Your goal is to extract travel details "
     "from the conversation history. Extract the destination, travel dates, budget, and interests. "
     "Check if the user is asking to modify an existing plan or creating a new one. "
+    "Known trip details from earlier turns still apply unless the recent conversation changes them; "
+    "repeat them in your answer. "
     "IMPORTANT: Convert all dates to YYYY-MM-DD format. If relative dates like 'next week' are used, "
     "calculate them based on the current context or assume upcoming dates. "
     "If any information is missing, leave it as null."
 )
 
+CONVERSATION_SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a short running summary of a conversation between a user and a travel assistant. "
+    "Update the existing summary with the new messages. Keep only what matters for planning the trip: "
+    "destinations, dates, budget, interests, constraints and changes the user asked for. "
+    "Drop itinerary details the assistant presented. Answer with the updated summary only, "
+    "as at most 10 short bullet points."
+)
+
 RESPONSE_SYSTEM_PROMPT = (
     "You are a helpful travel assistant. Your goal is to present the propose itinerary "
     "to the user in an engaging and easy-to-read format. "
@@ -44,7 +65,8 @@ def get_planner_user_prompt(
     feedback: str | None = None,
     existing_plan: str | None = None,
     user_feedback: str | None = None,
-    weather_info: str | None = None
+    weather_info: str | None = None,
+    discovery_info: str | None = None
 ) -> str:
     """Construct the user prompt for the planner.
 
@@ -55,6 +77,7 @@ def get_planner_user_prompt(
         existing_plan: Optional JSON string of the existing plan.
         user_feedback: Optional string of specific user feedback/request.
         weather_info: Optional string containing weather forecast.
+        discovery_info: Optional string listing top attractions at the destination.
 
     Returns:
         Formatted user prompt string.
@@ -75,6 +98,88 @@ def get_planner_user_prompt(
         user_prompt += f"Preferences: {preferences}\n"
     if weather_info:
         user_prompt += f"Weather Forecast: {weather_info}\n"
+    if discovery_info:
+        user_prompt += f"Top Attractions: {discovery_info}\n"
     if feedback:
         user_prompt += f"\nIMPORTANT FEEDBACK FROM PREVIOUS ATTEMPT:\n{feedback}\n"
     return user_prompt
+
+
+def get_plan_patch_user_prompt(trip_plan, user_feedback: str) -> str:
+    """Construct the user prompt for patch-based plan modification.
+
+    Args:
+        trip_plan: The existing TripSchema.
+        user_feedback: The user's modification request.
+
+    Returns:
+        Formatted user prompt with an indexed outline of the plan.
+    """
+    lines = [f"Destination: {trip_plan.destination}"]
+    for day in trip_plan.itinerary:
+        date = f" ({day.date})" if day.date else ""
+        lines.append(f"Day {day.day}{date}: {day.summary}")
+        for index, node in enumerate(day.nodes):
+            times = "-".join(t for t in (node.start_time, node.end_time) if t)
+            cost = f" (cost: {node.cost})" if node.cost else ""
+            lines.append(f"  [{index}] {times} {node.type or 'activity'}: {node.name}{cost}")
+    outline = "\n".join(lines)
+
+    return (
+        f"Plan Outline:\n{outline}\n\n"
+        f"User Modification Request: {user_feedback}\n\n"
+        "Please output the edit operations."
+    )
+
+
+def get_refine_user_prompt(
+    destination: str,
+    pending_nodes: list,
+    attractions_info: str | None = None,
+    weather_info: str | None = None,
+    hotel_info: str | None = None
+) -> str:
+    """Construct the user prompt for enriching new or changed itinerary nodes.
+
+    Args:
+        destination: The travel destination.
+        pending_nodes: (day number, index, TripNodeSchema) of the nodes to enrich.
+        attractions_info: Optional attraction details gathered by the tools.
+        weather_info: Optional weather forecast.
+        hotel_info: Optional hotel details gathered by the tools.
+
+    Returns:
+        Formatted user prompt string.
+    """
+    lines = []
+    for day, index, node in pending_nodes:
+        times = "-".join(t for t in (node.start_time, node.end_time) if t)
+        cost = node.cost or "unknown"
+        lines.append(f"Day {day} [{index}] {times} {node.type or 'activity'}: {node.name} (cost: {cost})")
+    nodes = "\n".join(lines)
+
+    return (
+        f"Destination: {destination}\n\n"
+        f"Nodes to enrich:\n{nodes}\n\n"
+        f"Gathered Information:\n"
+        f"Attractions Info: {attractions_info or ''}\n"
+        f"Weather Info: {weather_info or ''}\n"
+        f"Hotel Info: {hotel_info or ''}\n\n"
+        "Please output the edit operations."
+    )
+
+
+def get_conversation_summary_user_prompt(summary: str | None, new_messages: str) -> str:
+    """Construct the user prompt for extending the conversation summary.
+
+    Args:
+        summary: The current summary, if any.
+        new_messages: Older messages to fold into it, one "type: content" per line.
+
+    Returns:
+        Formatted user prompt string.
+    """
+    return (
+        f"Current Summary:\n{summary or '(none yet)'}\n\n"
+        f"New Messages:\n{new_messages}"
+    )
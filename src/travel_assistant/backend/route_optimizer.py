@@ -0,0 +1,333 @@
+"""Per-day route ordering of itinerary stops.
+
+The planner LLM orders each day's nodes freely, which often zig-zags across
+town. This module reorders the movable stops of a day with a nearest-neighbour
+tour improved by 2-opt and Or-opt over a vectorized haversine distance matrix.
+Meals, hotels, transport and stops without coordinates stay where they are, so
+the day is split into runs of movable stops between those anchors and each run
+is ordered as a path from the anchor before it to the anchor after it.
+"""
+
+import math
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from travel_assistant.backend.distance import estimate_minutes, haversine_matrix
+from travel_assistant.backend.schemas import (
+    DailyItinerarySchema,
+    TripNodeSchema,
+    TripSchema,
+)
+
+# Node types that keep their slot in the day: meals happen at meal times,
+# hotels open/close the day and transport is booked for a time.
+PINNED_NODE_TYPES = {
+    "restaurant",
+    "food",
+    "meal",
+    "breakfast",
+    "lunch",
+    "dinner",
+    "hotel",
+    "accommodation",
+    "transport",
+    "transportation",
+    "transit",
+    "flight",
+    "train",
+}
+
+TIME_FORMAT = "%H:%M"
+
+
+def route_optimization_enabled() -> bool:
+    return os.getenv("ROUTE_OPTIMIZATION", "true").lower() in ("1", "true", "yes")
+
+
+def path_length(dist: np.ndarray, path: Sequence[int]) -> float:
+    path = np.asarray(path)
+    return float(dist[path[:-1], path[1:]].sum())
+
+
+def _nearest_neighbour(dist: np.ndarray, first: int, stops: List[int]) -> List[int]:
+    order = [first]
+    remaining = [s for s in stops if s != first]
+    while remaining:
+        nearest = int(np.argmin(dist[order[-1], remaining]))
+        order.append(remaining.pop(nearest))
+    return order
+
+
+def _two_opt(dist: np.ndarray, path: List[int]) -> List[int]:
+    """Improve a path with 2-opt moves, keeping both endpoints fixed."""
+    path = np.asarray(path)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(path) - 2):
+            # Gain of reversing path[i..k] for every k at once
+            a, b = path[i - 1], path[i]
+            c, d = path[i + 1 : -1], path[i + 2 :]
+            delta = dist[a, c] + dist[b, d] - dist[a, b] - dist[c, d]
+            j = int(np.argmin(delta))
+            if delta[j] < -1e-9:
+                path[i : i + j + 2] = path[i : i + j + 2][::-1].copy()
+                improved = True
+    return path.tolist()
+
+
+def _or_opt(dist: np.ndarray, path: List[int]) -> List[int]:
+    """Improve a path by moving runs of 1-3 stops elsewhere, keeping the endpoints.
+
+    Catches the moves 2-opt can't make, such as a stop that belongs at the
+    other end of the day.
+    """
+    path = list(path)
+    improved = True
+    while improved:
+        improved = False
+        for size in (1, 2, 3):
+            for i in range(1, len(path) - size):
+                seg = path[i : i + size]
+                a, b = path[i - 1], path[i + size]
+                removed = dist[a, seg[0]] + dist[seg[-1], b] - dist[a, b]
+                rest = path[:i] + path[i + size :]
+                # Insertion cost between every remaining pair, in both orientations
+                u, v = np.asarray(rest[:-1]), np.asarray(rest[1:])
+                forward = dist[u, seg[0]] + dist[seg[-1], v] - dist[u, v]
+                backward = dist[u, seg[-1]] + dist[seg[0], v] - dist[u, v]
+                k_fwd, k_bwd = int(np.argmin(forward)), int(np.argmin(backward))
+                if backward[k_bwd] < forward[k_fwd]:
+                    k, cost, seg = k_bwd, backward[k_bwd], seg[::-1]
+                else:
+                    k, cost = k_fwd, forward[k_fwd]
+                if cost < removed - 1e-9:
+                    path = rest[: k + 1] + seg + rest[k + 1 :]
+                    improved = True
+                    break
+            if improved:
+                break
+    return path
+
+
+def order_stops(
+    dist: np.ndarray,
+    stops: List[int],
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+) -> List[int]:
+    """Order stops into a short path between optional fixed endpoints.
+
+    Args:
+        dist: Distance matrix covering ``stops``, ``start`` and ``end``.
+        stops: Indices into ``dist`` to visit.
+        start: Index the path must start from, if any.
+        end: Index the path must end at, if any.
+
+    Returns:
+        ``stops`` in visiting order (endpoints excluded).
+    """
+    if len(stops) < 2:
+        return list(stops)
+
+    # A free endpoint is a virtual stop at zero distance from everything
+    free = dist.shape[0]
+    aug = np.zeros((free + 1, free + 1))
+    aug[:free, :free] = dist
+    head = free if start is None else start
+    tail = free if end is None else end
+
+    if start is None:
+        candidates = [_nearest_neighbour(aug, first, stops) for first in stops]
+    else:
+        candidates = [_nearest_neighbour(aug, start, stops)[1:]]
+    best = min(candidates, key=lambda order: path_length(aug, [head, *order, tail]))
+
+    path = [head, *best, tail]
+    while True:
+        length = path_length(aug, path)
+        path = _or_opt(aug, _two_opt(aug, path))
+        if path_length(aug, path) >= length - 1e-9:
+            return path[1:-1]
+
+
+def _is_movable(node: TripNodeSchema) -> bool:
+    return (
+        node.coordinates is not None
+        and (node.type or "").strip().lower() not in PINNED_NODE_TYPES
+    )
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.strptime(value or "", TIME_FORMAT)
+    except ValueError:
+        return None
+
+
+def _travel_minutes(km: float) -> int:
+    # Rounded up to 5 minutes, like a human-written schedule
+    return int(math.ceil(float(estimate_minutes(km)) / 5) * 5)
+
+
+def _retime(
+    nodes: List[TripNodeSchema],
+    dist: np.ndarray,
+    deadline: Optional[datetime] = None,
+    onward_km: float = 0.0,
+) -> Optional[List[TripNodeSchema]]:
+    """Re-time a reordered run of stops, keeping each stop's duration.
+
+    The run starts when its earliest stop used to start; each stop then begins
+    after the previous one ends plus the travel time between them. Runs with
+    missing or unparseable times are left untouched.
+
+    Args:
+        nodes: The run in its new order.
+        dist: Distances between the run's stops, in that order.
+        deadline: Start time of the fixed-time stop after the run, if any.
+        onward_km: Distance from the run's last stop to that stop.
+
+    Returns:
+        The re-timed stops, or None when the run would no longer reach the
+        next stop by its start time.
+    """
+    starts = [_parse_time(node.start_time) for node in nodes]
+    ends = [_parse_time(node.end_time) for node in nodes]
+    if any(t is None for t in starts + ends):
+        return nodes
+
+    cursor = min(starts)
+    retimed = []
+    for i, node in enumerate(nodes):
+        if i:
+            cursor += timedelta(minutes=_travel_minutes(dist[i - 1, i]))
+        end = cursor + max(ends[i] - starts[i], timedelta(0))
+        retimed.append(
+            node.model_copy(
+                update={
+                    "start_time": cursor.strftime(TIME_FORMAT),
+                    "end_time": end.strftime(TIME_FORMAT),
+                }
+            )
+        )
+        cursor = end
+    if onward_km:
+        cursor += timedelta(minutes=_travel_minutes(onward_km))
+    if deadline is not None and cursor > deadline:
+        return None
+    return retimed
+
+
+def _node_matrix(nodes: List[TripNodeSchema]) -> np.ndarray:
+    return haversine_matrix(
+        [n.coordinates.lat for n in nodes], [n.coordinates.lng for n in nodes]
+    )
+
+
+def _located_path_km(nodes: List[TripNodeSchema]) -> float:
+    located = [n for n in nodes if n.coordinates is not None]
+    if len(located) < 2:
+        return 0.0
+    return path_length(_node_matrix(located), range(len(located)))
+
+
+def optimize_day(
+    day: DailyItinerarySchema,
+) -> Tuple[DailyItinerarySchema, Dict[str, float]]:
+    """Reorder a day's movable stops to shorten the route.
+
+    Moved stops are re-timed with the travel-time model of the distance module.
+    A reorder is skipped when the re-timed stops would run into the start of
+    the next fixed stop.
+
+    Args:
+        day: The day to reorder.
+
+    Returns:
+        The reordered day (the same object if nothing changed) and its route
+        distance ``before_km``, ``after_km`` and ``saved_km``.
+    """
+    nodes = list(day.nodes)
+    changed = False
+
+    i = 0
+    while i < len(nodes):
+        if not _is_movable(nodes[i]):
+            i += 1
+            continue
+        run_end = i
+        while run_end < len(nodes) and _is_movable(nodes[run_end]):
+            run_end += 1
+        run = nodes[i:run_end]
+        before = nodes[i - 1] if i > 0 and nodes[i - 1].coordinates else None
+        after = (
+            nodes[run_end]
+            if run_end < len(nodes) and nodes[run_end].coordinates
+            else None
+        )
+
+        if len(run) >= 2:
+            points = run + [n for n in (before, after) if n is not None]
+            dist = _node_matrix(points)
+            start = len(run) if before is not None else None
+            end = len(run) + (before is not None) if after is not None else None
+            order = order_stops(dist, list(range(len(run))), start, end)
+
+            original = [start, *range(len(run)), end]
+            improved = [start, *order, end]
+            original_km = path_length(dist, [p for p in original if p is not None])
+            improved_km = path_length(dist, [p for p in improved if p is not None])
+            if improved_km < original_km - 1e-6:
+                # The next stop keeps its time (a meal, a check-in), so the
+                # reordered run has to get there before it starts
+                deadline = (
+                    _parse_time(nodes[run_end].start_time)
+                    if run_end < len(nodes)
+                    else None
+                )
+                onward_km = float(dist[order[-1], end]) if end is not None else 0.0
+                reordered = [run[k] for k in order]
+                retimed = _retime(
+                    reordered, dist[np.ix_(order, order)], deadline, onward_km
+                )
+                if retimed is not None:
+                    nodes[i:run_end] = retimed
+                    changed = True
+        i = run_end
+
+    before_km = _located_path_km(day.nodes)
+    after_km = _located_path_km(nodes) if changed else before_km
+    stats = {
+        "before_km": round(before_km, 3),
+        "after_km": round(after_km, 3),
+        "saved_km": round(before_km - after_km, 3),
+    }
+    if not changed:
+        return day, stats
+    return day.model_copy(update={"nodes": nodes}), stats
+
+
+def optimize_itinerary(
+    plan: TripSchema,
+) -> Tuple[TripSchema, Dict[int, Dict[str, float]]]:
+    """Reorder every day of a plan.
+
+    Args:
+        plan: The trip plan.
+
+    Returns:
+        The reordered plan (the same object if nothing changed) and the route
+        distances per day number.
+    """
+    days = []
+    savings = {}
+    for day in plan.itinerary:
+        optimized, savings[day.day] = optimize_day(day)
+        days.append(optimized)
+    if all(new is old for new, old in zip(days, plan.itinerary)):
+        return plan, savings
+    return plan.model_copy(update={"itinerary": days}), savings
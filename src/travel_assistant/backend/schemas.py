@@ -1,7 +1,8 @@
 """Schemas for the travel assistant."""
 
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
+from pydantic.json_schema import SkipJsonSchema
 
 
 class InputSchema(BaseModel):
@@ -30,7 +31,8 @@ class TripNodeSchema(BaseModel):
     description: str = Field(..., description="Description of the activity")
     start_time: Optional[str] = Field(None, description="Start time in HH:MM format")
     end_time: Optional[str] = Field(None, description="End time in HH:MM format")
-    coordinates: Optional[CoordinateSchema] = Field(None, description="Location coordinates")
+    # Set by geocoding only, so left out of the JSON schema the LLM is given
+    coordinates: SkipJsonSchema[Optional[CoordinateSchema]] = Field(None, description="Location coordinates")
     cost: Optional[str] = Field(None, description="Estimated cost or ticket price")
     type: Optional[str] = Field(None, description="Type of node, e.g., 'attraction', 'restaurant', 'transport'")
 
@@ -63,3 +65,35 @@ class TripSchema(BaseModel):
     
     itinerary: List[DailyItinerarySchema] = Field(default_factory=list, description="Daily itinerary details")
     notes: List[NoteSchema] = Field(default_factory=list, description="Important travel notes")
+
+
+class TripNodeUpdateSchema(BaseModel):
+    """Schema for a partial update of an itinerary node; only set fields change."""
+    
+    name: Optional[str] = Field(None, description="New name of the activity or place")
+    description: Optional[str] = Field(None, description="New description of the activity")
+    start_time: Optional[str] = Field(None, description="New start time in HH:MM format")
+    end_time: Optional[str] = Field(None, description="New end time in HH:MM format")
+    cost: Optional[str] = Field(None, description="New estimated cost or ticket price")
+    type: Optional[str] = Field(None, description="New type of node, e.g., 'attraction', 'restaurant'")
+    coordinates: SkipJsonSchema[Optional[CoordinateSchema]] = Field(None, description="Location coordinates")
+
+
+class PlanEditSchema(BaseModel):
+    """Schema for a single edit operation on an existing itinerary."""
+    
+    op: Literal["add", "remove", "replace", "update"] = Field(
+        ..., description="'add' inserts a node, 'remove' deletes one, 'replace' swaps one for a new node, 'update' changes some fields"
+    )
+    day: int = Field(..., description="Day number of the itinerary day to edit")
+    index: Optional[int] = Field(
+        None, description="0-based position of the node within the day; for 'add', where to insert (omit to append)"
+    )
+    node: Optional[TripNodeSchema] = Field(None, description="The new node, required for 'add' and 'replace'")
+    updates: Optional[TripNodeUpdateSchema] = Field(None, description="Fields to change, required for 'update'")
+
+
+class PlanPatchSchema(BaseModel):
+    """Schema for a compact list of edits applied to an existing trip plan."""
+    
+    edits: List[PlanEditSchema] = Field(default_factory=list, description="Edit operations, applied in order")
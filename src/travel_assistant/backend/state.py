@@ -12,19 +12,31 @@ class TravelState(TypedDict):
 
     Attributes:
         messages: The conversation messages, using LangGraph's add_messages reducer.
+        conversation_summary: Rolling summary of older turns for input extraction,
+            as {"text": ..., "turns": number of leading turns covered}.
         destination: The travel destination (if specified).
         travel_dates: The travel dates (if specified).
         preferences: User preferences for the trip.
+        discovery_info: Top attractions found for the destination before planning.
+        enrichment: Details found per itinerary node (cost, hours, coordinates),
+            keyed by destination and normalized node name.
+        geocodes: Coordinates resolved this turn, keyed like enrichment.
+        route_savings: Route distance before/after reordering, per day number.
     """
 
     messages: Annotated[list, add_messages]
+    conversation_summary: dict | None
     destination: str | None
     travel_dates: dict | None
     preferences: dict | None
     trip_plan: TripSchema | None
     attractions_info: str | None
+    discovery_info: str | None
     weather_info: str | None
     hotel_info: str | None
+    enrichment: dict | None
+    geocodes: dict | None
+    route_savings: dict | None
     budget: str | None
     budget_status: str | None
     planner_feedback: str | None
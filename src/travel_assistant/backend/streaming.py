@@ -0,0 +1,117 @@
+"""Helpers that turn a streamed graph run into UI events."""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Optional
+
+from travel_assistant.backend.metrics import metrics
+from travel_assistant.backend.schemas import DailyItinerarySchema
+from travel_assistant.backend.tracing import NodeTimer
+
+# Node that produces the user-facing answer; its tokens are streamed to the UI
+RESPONSE_NODE = "generate_response"
+
+# Human-readable progress message emitted when a node finishes
+NODE_PROGRESS_MESSAGES = {
+    "process_input": "Request understood",
+    "weather_query_agent": "Weather fetched",
+    "attraction_discovery_agent": "Top attractions discovered",
+    "plan_itinerary": "Plan drafted",
+    "attraction_search_agent": "Attraction details gathered",
+    "hotel_info_agent": "Hotel options gathered",
+    "geocode_itinerary": "Locations mapped",
+    "refine_itinerary": "Plan refined with live details",
+    "optimize_routes": "Routes optimized",
+    "validate_budget": "Budget checked",
+}
+
+
+@dataclass
+class StreamEvent:
+    """A single UI event from a streamed graph run.
+
+    Attributes:
+        kind: "progress" when a node finished, "day" when the planner
+              completed a day, "token" for answer text, "final" once the run
+              completed (carries the final state).
+        text: Progress message or token text.
+        node: The graph node the event came from.
+        day: The completed day (only for "day" events).
+        state: The final graph state (only for "final" events).
+        timing: Node timing report of the run (only for "final" events).
+    """
+
+    kind: str
+    text: str = ""
+    node: Optional[str] = None
+    day: Optional[DailyItinerarySchema] = None
+    state: Dict[str, Any] = field(default_factory=dict)
+    timing: Dict[str, Any] = field(default_factory=dict)
+
+
+async def stream_turn(
+    graph, inputs: Dict[str, Any], config: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[StreamEvent]:
+    """Run one conversation turn, yielding progress and answer tokens as they happen.
+
+    Records ``ttft_seconds`` (turn start to first answer token),
+    ``turn_seconds``, ``critical_path_seconds`` and ``turn_overhead_seconds``
+    (turn time with no LLM call in flight) in the metrics registry. The
+    turn's timing report, with every LLM and tool call, is the final event's
+    ``timing``; a copy is added to that event's ``state`` dict as
+    ``run_metrics``. It is not a TravelState field and is not checkpointed.
+
+    Args:
+        graph: A compiled travel graph.
+        inputs: Graph input for this turn.
+        config: Optional run config (e.g. the checkpointer thread_id).
+    """
+    start = time.perf_counter()
+    first_token_at = None
+    final_state: Dict[str, Any] = {}
+    timer = NodeTimer()
+    config = dict(config or {})
+    config["callbacks"] = list(config.get("callbacks") or []) + [timer]
+
+    async for mode, payload in graph.astream(
+        inputs, config=config, stream_mode=["updates", "messages", "custom", "values"]
+    ):
+        if mode == "updates":
+            for node in payload or {}:
+                message = NODE_PROGRESS_MESSAGES.get(node)
+                if message:
+                    yield StreamEvent(kind="progress", text=message, node=node)
+
+        elif mode == "messages":
+            chunk, metadata = payload
+            if metadata.get("langgraph_node") != RESPONSE_NODE:
+                continue
+            text = chunk.content if isinstance(chunk.content, str) else ""
+            if not text:
+                continue
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+                metrics.observe("ttft_seconds", first_token_at - start)
+            yield StreamEvent(kind="token", text=text, node=RESPONSE_NODE)
+
+        elif mode == "custom":
+            if isinstance(payload, dict) and "plan_day" in payload:
+                day = DailyItinerarySchema.model_validate(payload["plan_day"])
+                yield StreamEvent(
+                    kind="day", text=day.summary, node="plan_itinerary", day=day
+                )
+
+        elif mode == "values":
+            final_state = payload
+
+    timing = timer.report()
+    timing["turn_seconds"] = time.perf_counter() - start
+    timing["overhead_seconds"] = max(
+        timing["turn_seconds"] - timing["llm_seconds"], 0.0
+    )
+    metrics.observe("turn_seconds", timing["turn_seconds"])
+    metrics.observe("critical_path_seconds", timing["critical_path_seconds"])
+    metrics.observe("turn_overhead_seconds", timing["overhead_seconds"])
+    yield StreamEvent(
+        kind="final", state={**final_state, "run_metrics": timing}, timing=timing
+    )
@@ -1,9 +1,12 @@
 from typing import Any, Dict, List, Optional
+import asyncio
 import os
 import sys
 
 from langchain_core.tools import tool
 from travel_assistant.backend.mcp_client import MCPClientManager
+from travel_assistant.backend.memory.poi_store import get_poi_store
+from travel_assistant.backend.tools.cache import create_tool_cache
 
 # AMap Configuration
 AMAP_API_KEY = os.environ.get("AMAP_MAPS_API_KEY")
@@ -14,6 +17,10 @@ AMAP_API_KEY = os.environ.get("AMAP_MAPS_API_KEY")
 AMAP_CMD = os.environ.get("AMAP_MCP_CMD", sys.executable)
 AMAP_ARGS = os.environ.get("AMAP_MCP_ARGS", "-m amap_mcp_server").split()
 
+# Number of warm amap server processes kept open (0 = spawn one per call).
+AMAP_POOL_SIZE = int(os.environ.get("AMAP_MCP_POOL_SIZE", "2"))
+AMAP_CALL_TIMEOUT = float(os.environ.get("AMAP_MCP_CALL_TIMEOUT", "60"))
+
 amap_env = os.environ.copy()
 if AMAP_API_KEY:
     amap_env["AMAP_MAPS_API_KEY"] = AMAP_API_KEY
@@ -22,10 +29,66 @@ amap_manager = MCPClientManager(
     command=AMAP_CMD,
     args=AMAP_ARGS,
     env=amap_env,
-    server_name="amap_mcp_server"
+    server_name="amap_mcp_server",
+    pool_size=AMAP_POOL_SIZE,
+    call_timeout=AMAP_CALL_TIMEOUT,
 )
 
 
+# Shared result cache in front of the amap server (per-tool TTLs)
+amap_cache = create_tool_cache()
+
+# Around searches with at least this many matching stored POIs are answered locally
+POI_STORE_MIN_NEARBY = int(os.environ.get("POI_STORE_MIN_NEARBY", "5"))
+
+
+async def call_amap(tool_name: str, tool_args: Dict[str, Any]) -> str:
+    """Execute an amap MCP tool, serving repeated lookups from the shared cache.
+
+    Around searches are answered from the local POI store when it knows enough
+    nearby places, and search results fetched from the server (not from the
+    cache) are recorded into it. Store queries run in a worker thread so
+    SQLite doesn't block the event loop.
+
+    Args:
+        tool_name: The amap tool to call (e.g. "maps_weather").
+        tool_args: Arguments for the tool.
+
+    Returns:
+        The text output from the tool.
+    """
+    store = get_poi_store()
+    if store is not None and tool_name == "maps_around_search":
+        local = await asyncio.to_thread(
+            store.around_search, tool_args, min_results=POI_STORE_MIN_NEARBY
+        )
+        if local is not None:
+            return local
+
+    async def execute(name: str, args: Dict[str, Any]) -> str:
+        output = await amap_manager.execute_tool(name, args)
+        # Cache hits were recorded when they were first fetched
+        if store is not None and name in ("maps_text_search", "maps_search_detail"):
+            await asyncio.to_thread(store.record_tool_output, name, args, output)
+        return output
+
+    if amap_cache is None:
+        return await execute(tool_name, tool_args)
+    return await amap_cache.get_or_call(tool_name, tool_args, execute)
+
+
+async def warm_up_amap(timeout: Optional[float] = 30.0) -> int:
+    """Startup hook: pre-spawn the amap server pool on the running event loop.
+
+    Args:
+        timeout: Seconds to wait for the servers to finish their handshake.
+
+    Returns:
+        The number of ready sessions.
+    """
+    return await amap_manager.start(timeout=timeout)
+
+
 @tool
 async def search_destinations(query: str) -> str:
     """Search for travel destinations based on a query.
@@ -34,7 +97,7 @@ async def search_destinations(query: str) -> str:
         query: The search query for destinations.
     """
     # Mapping to AMap tool: maps_text_search
-    return await amap_manager.execute_tool(
+    return await call_amap(
         "maps_text_search", {"keywords": query, "citylimit": "false"}
     )
 
@@ -49,7 +112,7 @@ async def get_weather(location: str, city_adcode: str = "") -> str:
     """
     # Mapping to AMap tool: maps_weather
     # AMap 'maps_weather' takes 'city' arg (adcode or name)
-    return await amap_manager.execute_tool(
+    return await call_amap(
         "maps_weather", {"city": city_adcode if city_adcode else location}
     )
 
@@ -62,7 +125,7 @@ async def search_hotels(location: str, keyword: str = "hotel") -> str:
         location: City/Place name or adcode.
         keyword: Keyword to search (default: "hotel").
     """
-    return await amap_manager.execute_tool(
+    return await call_amap(
         "maps_text_search", {"keywords": keyword, "city": location}
     )
 
@@ -79,7 +142,7 @@ async def search_restaurants(location: str, cuisine: Optional[str] = None) -> st
         List of recommended restaurants.
     """
     query = f"{cuisine} restaurant" if cuisine else "restaurant"
-    return await amap_manager.execute_tool(
+    return await call_amap(
         "maps_text_search", {"keywords": query, "city": location}
     )
 
@@ -0,0 +1,228 @@
+"""Shared TTL cache for MCP tool results."""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from travel_assistant.backend.memory.cache import (
+    LRUTTLCache,
+    SqliteCacheStore,
+    data_path,
+)
+from travel_assistant.backend.metrics import metrics
+
+# Time-to-live (seconds) per MCP tool. Tools not listed use "default".
+# Override with AMAP_CACHE_TTL_<TOOL>, e.g. AMAP_CACHE_TTL_MAPS_WEATHER=600.
+DEFAULT_TOOL_TTLS = {
+    "maps_weather": 30 * 60,
+    "maps_text_search": 24 * 3600,
+    "maps_around_search": 24 * 3600,
+    "maps_search_detail": 24 * 3600,
+    "maps_geo": 30 * 24 * 3600,
+    "maps_regeocode": 30 * 24 * 3600,
+    "maps_distance": 7 * 24 * 3600,
+    "maps_direction_walking_by_coordinates": 7 * 24 * 3600,
+    "maps_direction_driving_by_coordinates": 7 * 24 * 3600,
+    "default": 3600,
+}
+
+
+def get_tool_ttl(tool_name: str) -> float:
+    """Return the TTL for a tool, honoring env overrides."""
+    default = DEFAULT_TOOL_TTLS.get(tool_name, DEFAULT_TOOL_TTLS["default"])
+    return float(os.getenv(f"AMAP_CACHE_TTL_{tool_name.upper()}", default))
+
+
+def normalize_args(tool_args: Dict[str, Any]) -> str:
+    """Build a canonical key for tool arguments.
+
+    Keys are sorted, string values are trimmed and case-folded, and empty
+    values are dropped, so "Hangzhou " and "hangzhou" share one entry.
+    """
+    normalized = {}
+    for key, value in tool_args.items():
+        if isinstance(value, str):
+            value = " ".join(value.split()).casefold()
+        if value in (None, ""):
+            continue
+        normalized[key] = value
+    return json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+
+
+def is_cacheable(output: str) -> bool:
+    """Error outputs are never cached so transient failures are retried."""
+    if not output or output.startswith("Error"):
+        return False
+    try:
+        parsed = json.loads(output)
+    except (json.JSONDecodeError, TypeError):
+        return True
+    return not (isinstance(parsed, dict) and "error" in parsed)
+
+
+class ToolResultCache:
+    """Size-bounded LRU of tool outputs with per-tool TTLs and optional persistence."""
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        path: Optional[str] = None,
+        disk_entries: int = 20000,
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Max entries kept in memory.
+            path: Optional SQLite file so cached results survive restarts.
+            disk_entries: Max entries per tool in the disk tier.
+        """
+        self.memory = LRUTTLCache(max_entries)
+        self.disk = SqliteCacheStore(path, disk_entries) if path else None
+        self._in_flight: Dict[tuple, asyncio.Future] = {}
+
+    @staticmethod
+    def _key(tool_args: Dict[str, Any]) -> str:
+        return hashlib.sha256(normalize_args(tool_args).encode("utf-8")).hexdigest()
+
+    def _memory_hit(self, tool_name: str, key: str) -> Optional[str]:
+        value = self.memory.get((tool_name, key))
+        if value is not None:
+            metrics.incr(
+                "tool_cache_requests_total", tool=tool_name, result="memory_hit"
+            )
+        return value
+
+    def _disk_hit(
+        self, tool_name: str, key: str, row: Optional[Tuple[bytes, float]]
+    ) -> Optional[str]:
+        """Promote a disk tier row to memory, counting the hit or miss."""
+        if row is None:
+            metrics.incr("tool_cache_requests_total", tool=tool_name, result="miss")
+            return None
+        value = row[0].decode("utf-8")
+        self.memory.set((tool_name, key), value, row[1] - time.time())
+        metrics.incr("tool_cache_requests_total", tool=tool_name, result="disk_hit")
+        return value
+
+    def get(self, tool_name: str, tool_args: Dict[str, Any]) -> Optional[str]:
+        key = self._key(tool_args)
+        value = self._memory_hit(tool_name, key)
+        if value is not None:
+            return value
+        row = self.disk.get(tool_name, key) if self.disk is not None else None
+        return self._disk_hit(tool_name, key, row)
+
+    async def aget(self, tool_name: str, tool_args: Dict[str, Any]) -> Optional[str]:
+        """Like ``get``, with the disk tier read in a worker thread."""
+        key = self._key(tool_args)
+        value = self._memory_hit(tool_name, key)
+        if value is not None:
+            return value
+        row = None
+        if self.disk is not None:
+            row = await asyncio.to_thread(self.disk.get, tool_name, key)
+        return self._disk_hit(tool_name, key, row)
+
+    def _set_memory(
+        self, tool_name: str, tool_args: Dict[str, Any], output: str
+    ) -> Optional[Tuple[str, float]]:
+        """Cache ``output`` in memory; returns its key and TTL, or None if skipped."""
+        if not is_cacheable(output):
+            return None
+        key = self._key(tool_args)
+        ttl = get_tool_ttl(tool_name)
+        self.memory.set((tool_name, key), output, ttl)
+        return key, ttl
+
+    def set(self, tool_name: str, tool_args: Dict[str, Any], output: str) -> None:
+        entry = self._set_memory(tool_name, tool_args, output)
+        if entry is not None and self.disk is not None:
+            self.disk.set(tool_name, entry[0], output.encode("utf-8"), entry[1])
+
+    async def aset(
+        self, tool_name: str, tool_args: Dict[str, Any], output: str
+    ) -> None:
+        """Like ``set``, with the disk tier written in a worker thread."""
+        entry = self._set_memory(tool_name, tool_args, output)
+        if entry is not None and self.disk is not None:
+            await asyncio.to_thread(
+                self.disk.set, tool_name, entry[0], output.encode("utf-8"), entry[1]
+            )
+
+    async def get_or_call(
+        self,
+        tool_name: str,
+        tool_args: Dict[str, Any],
+        call: Callable[[str, Dict[str, Any]], Awaitable[str]],
+    ) -> str:
+        """Return a cached result, or the output of ``call``.
+
+        Concurrent identical requests share a single in-flight call. The disk
+        tier, if any, is read and written in a worker thread.
+        """
+        cached = await self.aget(tool_name, tool_args)
+        if cached is not None:
+            return cached
+
+        flight_key = (tool_name, self._key(tool_args), id(asyncio.get_running_loop()))
+        pending = self._in_flight.get(flight_key)
+        if pending is not None:
+            metrics.incr(
+                "tool_cache_requests_total", tool=tool_name, result="coalesced"
+            )
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[flight_key] = future
+        try:
+            output = await call(tool_name, tool_args)
+            await self.aset(tool_name, tool_args, output)
+            future.set_result(output)
+            return output
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else is waiting
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(flight_key, None)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counts per tool plus tier sizes."""
+        stats: Dict[str, Any] = {"tools": {}}
+        for counter in metrics.snapshot()["counters"]:
+            if counter["name"] != "tool_cache_requests_total":
+                continue
+            tool = stats["tools"].setdefault(counter["labels"]["tool"], {})
+            result = counter["labels"]["result"]
+            tool[result] = tool.get(result, 0) + counter["value"]
+        stats["memory_entries"] = len(self.memory)
+        stats["memory_evictions"] = self.memory.evictions
+        stats["disk_entries"] = self.disk.count() if self.disk else 0
+        return stats
+
+
+def create_tool_cache() -> Optional[ToolResultCache]:
+    """Build the process-wide tool cache from environment settings.
+
+    AMAP_CACHE_ENABLED (default on) toggles caching, AMAP_CACHE_MAX_ENTRIES
+    bounds the LRU and AMAP_CACHE_PERSIST stores results in data/amap_cache.sqlite.
+    """
+    if os.getenv("AMAP_CACHE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    persist = os.getenv("AMAP_CACHE_PERSIST", "false").lower() in ("1", "true", "yes")
+    return ToolResultCache(
+        max_entries=int(os.getenv("AMAP_CACHE_MAX_ENTRIES", "2048")),
+        path=data_path("amap_cache.sqlite") if persist else None,
+    )
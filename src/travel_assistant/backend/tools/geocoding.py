@@ -0,0 +1,155 @@
+"""Deterministic geocoding of itinerary places through the AMap MCP tools."""
+
+import asyncio
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from travel_assistant.backend.enrichment import normalize_name
+from travel_assistant.backend.memory.poi_store import get_poi_store
+from travel_assistant.backend.schemas import CoordinateSchema
+
+# Max concurrent lookups; the amap pool and result cache sit underneath
+GEOCODE_CONCURRENCY = int(os.environ.get("GEOCODE_CONCURRENCY", "4"))
+
+# maps_geo levels precise enough to pin a single place. Coarser matches
+# (city, district, ...) would put the marker in the middle of town.
+PRECISE_GEO_LEVELS = {"兴趣点", "门牌号", "单元号", "楼栋", "道路交叉路口"}
+
+ToolCall = Callable[[str, Dict[str, Any]], Awaitable[str]]
+
+
+def _parse_output(output: str) -> Optional[Dict[str, Any]]:
+    try:
+        data = json.loads(output)
+    except (json.JSONDecodeError, TypeError):
+        return None
+    if not isinstance(data, dict) or "error" in data:
+        return None
+    return data
+
+
+def parse_location(location: Optional[str], address: Optional[str] = None) -> Optional[CoordinateSchema]:
+    """Parse an AMap "lng,lat" string."""
+    if not location or not isinstance(location, str) or "," not in location:
+        return None
+    try:
+        lng, lat = (float(part) for part in location.split(",")[:2])
+    except ValueError:
+        return None
+    return CoordinateSchema(lat=lat, lng=lng, address=address or None)
+
+
+async def geocode_place(name: str, city: Optional[str] = None, call: Optional[ToolCall] = None) -> Optional[CoordinateSchema]:
+    """Resolve a place name to coordinates.
+
+    Checks the local POI store first (off the event loop); a stored POI without
+    coordinates gets a ``maps_search_detail`` lookup. Otherwise, or if that
+    finds no location, tries ``maps_geo`` and accepts only place-level matches,
+    then falls back to ``maps_text_search`` plus ``maps_search_detail`` for the
+    location of the best POI. Resolved places are saved to the POI store.
+
+    Args:
+        name: Place name, e.g. "West Lake".
+        city: City to search in.
+        call: Tool executor; defaults to the cached amap client.
+
+    Returns:
+        The coordinates, or None if the place couldn't be resolved.
+    """
+    if call is None:
+        from travel_assistant.backend.tools import call_amap
+        call = call_amap
+
+    store = get_poi_store()
+    stored_id = None
+    if store is not None:
+        # SQLite calls block, so they run in a worker thread
+        poi = await asyncio.to_thread(store.lookup, name, city or "")
+        if poi and poi.located:
+            return CoordinateSchema(lat=poi.lat, lng=poi.lng, address=poi.address)
+        stored_id = poi.poi_id if poi else None
+
+    # A POI seen in an earlier search only needs its detail lookup
+    coordinates = await _detail_location(stored_id, call) if stored_id else None
+    poi_id = stored_id
+    if coordinates is None:
+        coordinates, poi_id = await _geo_or_search(name, city, call)
+        if coordinates is None and poi_id and poi_id != stored_id:
+            coordinates = await _detail_location(poi_id, call)
+        poi_id = poi_id or stored_id
+
+    if store is not None and coordinates is not None:
+        await asyncio.to_thread(
+            store.add, name, city or "", coordinates.lat, coordinates.lng,
+            coordinates.address, poi_id,
+        )
+    return coordinates
+
+
+async def _detail_location(poi_id: str, call: ToolCall) -> Optional[CoordinateSchema]:
+    """Location of a POI from ``maps_search_detail``, or None if it has none."""
+    detail = _parse_output(await call("maps_search_detail", {"id": poi_id}))
+    if not detail:
+        return None
+    return parse_location(detail.get("location"), detail.get("address"))
+
+
+async def _geo_or_search(name: str, city: Optional[str], call: ToolCall) -> Tuple[Optional[CoordinateSchema], Optional[str]]:
+    """Return precise ``maps_geo`` coordinates, or else the id of the best search POI."""
+    geo_args = {"address": name}
+    if city:
+        geo_args["city"] = city
+    geo = _parse_output(await call("maps_geo", geo_args))
+    for match in (geo or {}).get("return", []):
+        if match.get("level") in PRECISE_GEO_LEVELS:
+            coordinates = parse_location(match.get("location"))
+            if coordinates:
+                return coordinates, None
+
+    search_args = {"keywords": name, "citylimit": "true" if city else "false"}
+    if city:
+        search_args["city"] = city
+    search = _parse_output(await call("maps_text_search", search_args))
+    pois = (search or {}).get("pois") or []
+    if not pois or not pois[0].get("id"):
+        return None, None
+    return None, pois[0]["id"]
+
+
+async def geocode_places(
+    names: List[str],
+    city: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    call: Optional[ToolCall] = None,
+) -> Dict[str, Optional[CoordinateSchema]]:
+    """Geocode many place names concurrently.
+
+    Names that normalize to the same place are looked up once.
+
+    Args:
+        names: Place names; duplicates are allowed.
+        city: City to search in.
+        concurrency: Max lookups in flight (defaults to GEOCODE_CONCURRENCY).
+        call: Tool executor; defaults to the cached amap client.
+
+    Returns:
+        Coordinates (or None) for every input name.
+    """
+    semaphore = asyncio.Semaphore(concurrency or GEOCODE_CONCURRENCY)
+    unique: Dict[str, str] = {}
+    for name in names:
+        unique.setdefault(normalize_name(name), name)
+
+    async def resolve(name: str) -> Optional[CoordinateSchema]:
+        async with semaphore:
+            try:
+                return await geocode_place(name, city, call)
+            except Exception as e:
+                print(f"Error geocoding {name}: {e}")
+                return None
+
+    keys = list(unique)
+    resolved = await asyncio.gather(*(resolve(unique[key]) for key in keys))
+    by_key = dict(zip(keys, resolved))
+    return {name: by_key[normalize_name(name)] for name in names}
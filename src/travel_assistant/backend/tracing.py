@@ -0,0 +1,338 @@
+"""Per-node timing of graph runs, LLM and tool call records, and critical paths."""
+
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables.config import var_child_runnable_config
+
+from travel_assistant.backend.metrics import metrics
+
+
+def _current_run() -> Tuple[str, Optional["NodeTimer"]]:
+    """Graph node and NodeTimer of the runnable executing in this context, if any."""
+    config = var_child_runnable_config.get() or {}
+    node = (config.get("metadata") or {}).get("langgraph_node") or ""
+    callbacks = config.get("callbacks")
+    handlers = getattr(callbacks, "handlers", callbacks) or []
+    timer = next((h for h in handlers if isinstance(h, NodeTimer)), None)
+    return node, timer
+
+
+def _token_usage(response: Any) -> Tuple[int, int]:
+    """Prompt and completion tokens of an LLMResult.
+
+    Read from the messages' usage metadata, else from the provider's token_usage.
+    """
+    prompt = completion = 0
+    for generations in getattr(response, "generations", None) or []:
+        for generation in generations:
+            usage = (
+                getattr(getattr(generation, "message", None), "usage_metadata", None)
+                or {}
+            )
+            prompt += usage.get("input_tokens", 0)
+            completion += usage.get("output_tokens", 0)
+    if not (prompt or completion):
+        usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+        prompt, completion = (
+            usage.get("prompt_tokens", 0),
+            usage.get("completion_tokens", 0),
+        )
+    return prompt, completion
+
+
+def _llm_call_start(
+    metadata: Optional[Dict[str, Any]], params: Optional[Dict[str, Any]]
+) -> tuple:
+    """(node, start time, model) of an LLM call that is starting."""
+    metadata, params = metadata or {}, params or {}
+    model = (
+        metadata.get("ls_model_name")
+        or params.get("model")
+        or params.get("model_name")
+        or "unknown"
+    )
+    return metadata.get("langgraph_node") or "", time.perf_counter(), model
+
+
+def _llm_call_record(opened: tuple, response: Any, error: bool) -> Dict[str, Any]:
+    """Record of a finished LLM call started with ``_llm_call_start``."""
+    node, start, model = opened
+    prompt, completion = _token_usage(response)
+    return {
+        "node": node,
+        "model": model,
+        "start": start,
+        "end": time.perf_counter(),
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "error": error,
+    }
+
+
+class _LLMCallHandler(BaseCallbackHandler, ABC):
+    """Pairs LLM start and end callbacks; each finished call goes to ``_finish``."""
+
+    run_inline = True
+
+    def __init__(self):
+        self._llm_open: Dict[UUID, tuple] = {}
+
+    def on_chat_model_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        messages: Any,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._llm_open[run_id] = _llm_call_start(
+            metadata, kwargs.get("invocation_params")
+        )
+
+    def on_llm_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        prompts: Any,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._llm_open[run_id] = _llm_call_start(
+            metadata, kwargs.get("invocation_params")
+        )
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._close_llm(run_id, response)
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._close_llm(run_id, error=True)
+
+    def _close_llm(
+        self, run_id: UUID, response: Any = None, error: bool = False
+    ) -> None:
+        opened = self._llm_open.pop(run_id, None)
+        if opened is not None:
+            self._finish(_llm_call_record(opened, response, error))
+
+    @abstractmethod
+    def _finish(self, call: Dict[str, Any]) -> None:
+        """Handle one finished call, as built by ``_llm_call_record``."""
+
+
+class LLMMetrics(_LLMCallHandler):
+    """Callback handler that records every LLM call in the metrics registry.
+
+    ``config.get_llm`` attaches the shared ``llm_metrics`` instance to the
+    models it builds, so latency, call and token counts are recorded on every
+    call, whether or not the run has a NodeTimer.
+    """
+
+    def _finish(self, call: Dict[str, Any]) -> None:
+        labels = {"model": call["model"], "node": call["node"]}
+        metrics.observe("llm_call_seconds", call["end"] - call["start"], **labels)
+        metrics.incr(
+            "llm_calls_total", result="error" if call["error"] else "ok", **labels
+        )
+        metrics.incr("llm_prompt_tokens_total", call["prompt_tokens"], **labels)
+        metrics.incr("llm_completion_tokens_total", call["completion_tokens"], **labels)
+
+
+llm_metrics = LLMMetrics()
+
+
+def record_tool_call(
+    server: str, tool: str, seconds: float, payload_bytes: int, error: bool
+) -> None:
+    """Record one MCP tool call in the metrics registry and the current run.
+
+    Args:
+        server: MCP server name.
+        tool: Tool name.
+        seconds: Call latency.
+        payload_bytes: Size of the tool's text output.
+        error: Whether the call failed.
+    """
+    metrics.observe("mcp_tool_seconds", seconds, server=server, tool=tool)
+    metrics.observe("mcp_tool_payload_bytes", payload_bytes, server=server, tool=tool)
+    metrics.incr(
+        "mcp_tool_calls_total",
+        server=server,
+        tool=tool,
+        result="error" if error else "ok",
+    )
+    node, timer = _current_run()
+    if timer is not None:
+        timer.tool_calls.append(
+            {
+                "node": node,
+                "server": server,
+                "tool": tool,
+                "seconds": seconds,
+                "payload_bytes": payload_bytes,
+                "error": error,
+            }
+        )
+
+
+@dataclass
+class NodeSpan:
+    """Wall-clock interval of one node execution."""
+
+    node: str
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class NodeTimer(_LLMCallHandler):
+    """Callback handler that records a span for every graph node run.
+
+    Pass it in the run config (``{"callbacks": [timer]}``) and call
+    ``report()`` once the run finished. Node durations are also recorded as
+    ``node_seconds{node}`` in the metrics registry. LLM calls inside the
+    nodes are listed in the report too (model, latency, tokens), so it can
+    tell model time from overhead, and so are MCP tool calls made inside the
+    run (see ``record_tool_call``). Their metrics are recorded by
+    ``LLMMetrics`` and the MCP client, with or without a timer.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.spans: List[NodeSpan] = []
+        self.llm_spans: List[NodeSpan] = []
+        self.llm_calls: List[Dict[str, Any]] = []
+        self.tool_calls: List[Dict[str, Any]] = []
+        self._open: Dict[UUID, tuple] = {}
+
+    def on_chain_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        if not node or kwargs.get("name") != node:
+            return
+        parent = self._open.get(parent_run_id)
+        if parent is not None and parent[0] == node:
+            # Inner runnable of a node registered under the same name
+            return
+        self._open[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._close(run_id)
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._close(run_id, error=True)
+
+    def _finish(self, call: Dict[str, Any]) -> None:
+        span = NodeSpan(node=call["node"], start=call["start"], end=call["end"])
+        self.llm_spans.append(span)
+        self.llm_calls.append(
+            {
+                "node": call["node"],
+                "model": call["model"],
+                "seconds": span.duration,
+                "prompt_tokens": call["prompt_tokens"],
+                "completion_tokens": call["completion_tokens"],
+                "error": call["error"],
+            }
+        )
+
+    def llm_seconds(self) -> float:
+        """Wall time during which at least one LLM call was in flight."""
+        total, reach = 0.0, float("-inf")
+        for span in sorted(self.llm_spans, key=lambda s: s.start):
+            if span.end > reach:
+                total += span.end - max(span.start, reach)
+                reach = span.end
+        return total
+
+    def _close(self, run_id: UUID, error: bool = False) -> None:
+        opened = self._open.pop(run_id, None)
+        if opened is None:
+            return
+        node, start = opened
+        span = NodeSpan(node=node, start=start, end=time.perf_counter())
+        self.spans.append(span)
+        metrics.observe("node_seconds", span.duration, node=node)
+        if error:
+            metrics.incr("node_errors_total", node=node)
+
+    def critical_path(self) -> List[NodeSpan]:
+        """Return the chain of spans that determined the run's end time.
+
+        Starting from the span that finished last, repeatedly step back to the
+        latest-finishing span that ended before the current one started.
+        """
+        if not self.spans:
+            return []
+        remaining = sorted(self.spans, key=lambda s: s.end)
+        path = [remaining[-1]]
+        while True:
+            current = path[-1]
+            before = [
+                s
+                for s in remaining
+                if s.end <= current.start + 1e-6 and s is not current
+            ]
+            if not before:
+                break
+            path.append(max(before, key=lambda s: s.end))
+        path.reverse()
+        return path
+
+    def report(self) -> Dict[str, Any]:
+        """Summarize the run.
+
+        Covers wall time, critical path, per-node and LLM seconds, and every
+        LLM and tool call.
+        """
+        calls = {
+            "llm_calls": list(self.llm_calls),
+            "tool_calls": list(self.tool_calls),
+            "llm_tokens": {
+                "prompt": sum(c["prompt_tokens"] for c in self.llm_calls),
+                "completion": sum(c["completion_tokens"] for c in self.llm_calls),
+            },
+        }
+        if not self.spans:
+            return {
+                "wall_seconds": 0.0,
+                "critical_path": [],
+                "critical_path_seconds": 0.0,
+                "nodes": {},
+                "llm_seconds": 0.0,
+                **calls,
+            }
+        path = self.critical_path()
+        nodes: Dict[str, float] = {}
+        for span in self.spans:
+            nodes[span.node] = nodes.get(span.node, 0.0) + span.duration
+        return {
+            "wall_seconds": max(s.end for s in self.spans)
+            - min(s.start for s in self.spans),
+            "critical_path": [s.node for s in path],
+            "critical_path_seconds": sum(s.duration for s in path),
+            "nodes": nodes,
+            "llm_seconds": self.llm_seconds(),
+            **calls,
+        }
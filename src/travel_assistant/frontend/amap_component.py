@@ -1,5 +1,26 @@
-
+import hashlib
 import json
+from typing import Dict, List, Optional
+
+from travel_assistant.backend.memory.cache import LRUTTLCache
+from travel_assistant.backend.metrics import metrics
+from travel_assistant.backend.schemas import TripSchema
+from travel_assistant.frontend.polyline import (
+    DECODE_POLYLINE_JS,
+    ZOOM_LEVELS,
+    encode_polyline,
+    simplified_levels,
+)
+
+
+def _script_json(value) -> str:
+    """JSON for an inline <script>, with <, > and & escaped.
+
+    Place names come from the LLM and AMap; a name containing ``</script>``
+    must not close the script early.
+    """
+    text = json.dumps(value, ensure_ascii=False)
+    return text.replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")
 
 def render_amap_html(api_key: str, markers: list, path_coordinates: list, height: int = 600, security_code: str = "") -> str:
     """Generates the HTML content for embeding an Amap (Gaode Map) instance.
@@ -15,9 +36,10 @@ def render_amap_html(api_key: str, markers: list, path_coordinates: list, height
         HTML string.
     """
     
-    # Serialize data for JS injection
-    markers_json = json.dumps(markers)
-    path_json = json.dumps(path_coordinates)
+    # Serialize data for JS injection; the path is simplified and encoded
+    markers_json = _script_json(markers)
+    levels = simplified_levels(path_coordinates, zooms=ZOOM_LEVELS[-1:])
+    path_json = _script_json(levels[0]["path"] if levels else "")
     
     html = f"""
 <!doctype html>
@@ -66,6 +88,7 @@ def render_amap_html(api_key: str, markers: list, path_coordinates: list, height
 <body>
 <div id="container"></div>
 <script type="text/javascript">
+    {DECODE_POLYLINE_JS}
     // Wait for API to load
     window.onload = function() {{
         if (typeof AMap === 'undefined') {{
@@ -88,7 +111,7 @@ def render_amap_html(api_key: str, markers: list, path_coordinates: list, height
             // Listen for errors (if AMap exposes an error event, usually instantiation throws or logs to console)
 
             var markersData = {markers_json};
-            var pathData = {path_json};
+            var pathData = decodePolyline({path_json});
             
             // Add markers
             markersData.forEach(function(item) {{
@@ -135,3 +158,321 @@ def render_amap_html(api_key: str, markers: list, path_coordinates: list, height
 </html>
     """
     return html
+
+
+# Rendered trip maps by (plan hash, routes hash, key, height, security code)
+_map_cache = LRUTTLCache(max_entries=16)
+MAP_CACHE_TTL = 24 * 3600
+
+# Line colors cycled over the days of a trip
+DAY_COLORS = ["#3366FF", "#FF4B4B", "#28A745", "#FF9800", "#9C27B0", "#00BCD4", "#795548", "#E91E63"]
+
+
+def trip_map_layers(plan: TripSchema, routes: Optional[Dict[int, List[List[float]]]] = None) -> list:
+    """Per-day marker and path data of a plan, as embedded in the trip map.
+
+    Stop positions are one encoded polyline; the route is simplified for each
+    of ``ZOOM_LEVELS`` and encoded.
+
+    Args:
+        plan: The trip plan.
+        routes: Optional route geometry per day number ([lng, lat] pairs,
+            e.g. from direction calls); defaults to straight lines between stops.
+
+    Returns:
+        One dict per day with located nodes: {'day': 1, 'label': 'Day 1',
+        'color': '#3366FF', 'stops': '<encoded>', 'titles': [...],
+        'contents': [...], 'levels': [{'zoom': 10, 'path': '<encoded>', 'points': n}, ...]}.
+    """
+    layers = []
+    for i, day in enumerate(plan.itinerary):
+        located = [node for node in day.nodes if node.coordinates]
+        if not located:
+            continue
+        # Amap expects [lng, lat]
+        stops = [[node.coordinates.lng, node.coordinates.lat] for node in located]
+        path = (routes or {}).get(day.day) or stops
+        layers.append({
+            "day": day.day,
+            "label": f"Day {day.day}",
+            "color": DAY_COLORS[i % len(DAY_COLORS)],
+            "stops": encode_polyline(stops),
+            "titles": [node.name for node in located],
+            "contents": [f"{node.type}: {node.name}" for node in located],
+            "levels": simplified_levels(path) if len(path) > 1 else [],
+        })
+    return layers
+
+
+def raw_layer_bytes(plan: TripSchema, routes: Optional[Dict[int, List[List[float]]]] = None) -> Dict[int, int]:
+    """Size per day of the markers and path as plain JSON, as render_amap_html used to embed them."""
+    sizes = {}
+    for day in plan.itinerary:
+        located = [node for node in day.nodes if node.coordinates]
+        if not located:
+            continue
+        markers = [{"position": [n.coordinates.lng, n.coordinates.lat], "title": n.name,
+                    "content": f"{n.type}: {n.name}"} for n in located]
+        path = (routes or {}).get(day.day) or [m["position"] for m in markers]
+        sizes[day.day] = len(json.dumps(markers)) + len(json.dumps(path))
+    return sizes
+
+
+def map_payload_report(plan: TripSchema, routes: Optional[Dict[int, List[List[float]]]] = None) -> Dict[int, Dict[str, int]]:
+    """Embedded bytes per day, encoded vs plain JSON.
+
+    Returns:
+        {day: {'bytes': ..., 'raw_bytes': ..., 'points': route points, 'kept': points at the highest zoom}}.
+    """
+    raw = raw_layer_bytes(plan, routes)
+    report = {}
+    for layer in trip_map_layers(plan, routes):
+        path = (routes or {}).get(layer["day"])
+        report[layer["day"]] = {
+            "bytes": len(json.dumps(layer, ensure_ascii=False).encode("utf-8")),
+            "raw_bytes": raw[layer["day"]],
+            "points": len(path) if path else len(layer["titles"]),
+            "kept": layer["levels"][-1]["points"] if layer["levels"] else 0,
+        }
+    return report
+
+
+def plan_hash(plan: TripSchema) -> str:
+    """Content hash of a plan; equal plans render the same map."""
+    return hashlib.sha1(plan.model_dump_json().encode("utf-8")).hexdigest()
+
+
+def render_trip_map_html(
+    api_key: str,
+    plan: TripSchema,
+    height: int = 600,
+    security_code: str = "",
+    routes: Optional[Dict[int, List[List[float]]]] = None,
+) -> str:
+    """Generates the HTML for one Amap instance showing every day of a trip.
+
+    Each day is an overlay group (markers and route) that can be toggled from
+    a checkbox panel on the map, so the SDK is loaded once per trip instead of
+    once per day. Routes are embedded as encoded polylines simplified per zoom
+    level; the page decodes them and swaps levels when the zoom changes.
+
+    Args:
+        api_key: The Amap Web JS API Key.
+        plan: The trip plan.
+        height: Height of the map container in pixels.
+        security_code: The Amap Web JS Security Code (jscode), required for v2.0+.
+        routes: Optional route geometry per day number ([lng, lat] pairs).
+
+    Returns:
+        HTML string.
+    """
+    layers_json = _script_json(trip_map_layers(plan, routes))
+
+    html = f"""
+<!doctype html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <meta http-equiv="X-UA-Compatible" content="IE=edge">
+    <meta name="viewport" content="initial-scale=1.0, user-scalable=no, width=device-width">
+    <title>Amap Trip</title>
+    <style>
+        html, body, #container {{
+            width: 100%;
+            height: {height}px;
+            margin: 0;
+            padding: 0;
+        }}
+        .custom-marker {{
+            background-color: white;
+            padding: 5px 10px;
+            border-radius: 4px;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.3);
+            font-size: 12px;
+            font-weight: bold;
+            color: #333;
+            border: 1px solid #ccc;
+            white-space: nowrap;
+        }}
+        #layers {{
+            position: absolute;
+            top: 10px;
+            right: 10px;
+            z-index: 200;
+            background: white;
+            padding: 8px 12px;
+            border-radius: 6px;
+            box-shadow: 0 2px 6px rgba(0,0,0,0.3);
+            font: 13px sans-serif;
+            max-height: {max(height - 40, 100)}px;
+            overflow-y: auto;
+        }}
+        #layers label {{
+            display: block;
+            cursor: pointer;
+            margin: 2px 0;
+        }}
+        #layers .swatch {{
+            display: inline-block;
+            width: 12px;
+            height: 4px;
+            margin: 0 6px 2px 4px;
+            vertical-align: middle;
+        }}
+    </style>
+    <!-- Load Amap JS API -->
+    <script type="text/javascript">
+        window._AMapSecurityConfig = {{
+            securityJsCode: '{security_code}'
+        }};
+    </script>
+    <script type="text/javascript" src="https://webapi.amap.com/maps?v=2.0&key={api_key}"></script>
+    <script type="text/javascript">
+        // Global error handler for script loading
+        window.onerror = function(message, source, lineno, colno, error) {{
+            var container = document.getElementById("container");
+            if (container) {{
+                 container.innerHTML += '<div style="color:red; padding:10px;"><h3>Map Error</h3>' + message + '</div>';
+            }}
+        }};
+    </script>
+</head>
+<body>
+<div id="container"></div>
+<div id="layers"></div>
+<script type="text/javascript">
+    {DECODE_POLYLINE_JS}
+    window.onload = function() {{
+        if (typeof AMap === 'undefined') {{
+            document.getElementById("container").innerHTML = '<div style="color:red; padding:20px; text-align:center;"><h3>Amap JS API Failed to Load</h3><p>Possible reasons:</p><ul><li>Invalid API Key</li><li>Network blockage</li><li>Wrong Key Type (Must be "Web JS API")</li></ul></div>';
+            return;
+        }}
+
+        try {{
+            var map = new AMap.Map("container", {{
+                resizeEnable: true,
+                center: [116.397428, 39.90923], // Default center (Beijing)
+                zoom: 11
+            }});
+
+            var layersData = {layers_json};
+            var groups = [];
+            var routes = [];
+            var panel = document.getElementById("layers");
+
+            function fitVisible() {{
+                var visible = groups.filter(function(g) {{ return g.visible; }});
+                var overlays = [];
+                visible.forEach(function(g) {{ overlays = overlays.concat(g.group.getOverlays()); }});
+                if (overlays.length) {{
+                    map.setFitView(overlays);
+                }}
+            }}
+
+            layersData.forEach(function(layer) {{
+                var overlays = decodePolyline(layer.stops).map(function(position, i) {{
+                    return new AMap.Marker({{
+                        position: position,
+                        title: layer.titles[i],
+                        label: {{
+                            content: "<div class='custom-marker'>" + layer.contents[i] + "</div>",
+                            direction: 'top'
+                        }}
+                    }});
+                }});
+                if (layer.levels.length) {{
+                    var level = levelFor(layer.levels, map.getZoom());
+                    var route = new AMap.Polyline({{
+                        path: decodePolyline(level.path),
+                        isOutline: true,
+                        outlineColor: '#ffeeff',
+                        borderWeight: 3,
+                        strokeColor: layer.color,
+                        strokeOpacity: 1,
+                        strokeWeight: 6,
+                        strokeStyle: "solid",
+                        lineJoin: 'round',
+                        lineCap: 'round',
+                        zIndex: 50,
+                    }});
+                    routes.push({{polyline: route, levels: layer.levels, level: level, decoded: {{}}}});
+                    overlays.push(route);
+                }}
+                var group = new AMap.OverlayGroup(overlays);
+                map.add(group);
+                var entry = {{group: group, visible: true}};
+                groups.push(entry);
+
+                var label = document.createElement("label");
+                var box = document.createElement("input");
+                box.type = "checkbox";
+                box.checked = true;
+                box.onchange = function() {{
+                    entry.visible = box.checked;
+                    if (box.checked) {{ group.show(); }} else {{ group.hide(); }}
+                    fitVisible();
+                }};
+                var swatch = document.createElement("span");
+                swatch.className = "swatch";
+                swatch.style.background = layer.color;
+                label.appendChild(box);
+                label.appendChild(swatch);
+                label.appendChild(document.createTextNode(layer.label));
+                panel.appendChild(label);
+            }});
+
+            if (!layersData.length) {{
+                panel.style.display = "none";
+            }}
+
+            // Coarser routes when zoomed out, finer ones when zoomed in
+            map.on('zoomend', function() {{
+                var zoom = map.getZoom();
+                routes.forEach(function(route) {{
+                    var level = levelFor(route.levels, zoom);
+                    if (level === route.level) {{ return; }}
+                    route.level = level;
+                    if (!route.decoded[level.zoom]) {{
+                        route.decoded[level.zoom] = decodePolyline(level.path);
+                    }}
+                    route.polyline.setPath(route.decoded[level.zoom]);
+                }});
+            }});
+            fitVisible();
+
+        }} catch(e) {{
+             document.getElementById("container").innerHTML = '<div style="color:red; padding:20px;"><h3>Map Init Exception</h3>' + e.message + '</div>';
+        }}
+    }};
+</script>
+</body>
+</html>
+    """
+    return html
+
+
+def trip_map_html(
+    api_key: str,
+    plan: TripSchema,
+    height: int = 600,
+    security_code: str = "",
+    routes: Optional[Dict[int, List[List[float]]]] = None,
+) -> str:
+    """``render_trip_map_html`` memoized on the plan's content hash.
+
+    Streamlit reruns the script on every interaction; an unchanged plan gets
+    back the identical HTML string, so the map iframe isn't rebuilt. Each new
+    render records its size, and the embedded size per day, in the metrics
+    registry.
+    """
+    routes_key = hashlib.sha1(json.dumps(routes, sort_keys=True).encode("utf-8")).hexdigest() if routes else None
+    key = (plan_hash(plan), routes_key, api_key, height, security_code)
+    html = _map_cache.get(key)
+    if html is None:
+        html = render_trip_map_html(api_key, plan, height, security_code, routes)
+        _map_cache.set(key, html, ttl=MAP_CACHE_TTL)
+        metrics.observe("trip_map_html_bytes", len(html))
+        for stats in map_payload_report(plan, routes).values():
+            metrics.observe("trip_map_day_bytes", stats["bytes"])
+            metrics.observe("trip_map_day_raw_bytes", stats["raw_bytes"])
+    return html
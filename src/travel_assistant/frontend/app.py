@@ -5,8 +5,8 @@ from dotenv import load_dotenv
 load_dotenv()
 import pydeck as pdk
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from travel_assistant.backend.graph import graph
 from travel_assistant.backend.schemas import TripSchema
+from travel_assistant.frontend.runtime import ChatRuntime
 
 st.set_page_config(page_title="Smart Travel Assistant", layout="wide")
 
@@ -21,11 +21,26 @@ if not api_key:
         api_key_input = st.text_input("Enter OpenAI API Key", type="password")
         if api_key_input:
             os.environ["OPENAI_API_KEY"] = api_key_input
+            # Rebuild memoized LLM clients with the new key
+            from travel_assistant.backend.config import clear_llm_cache
+            clear_llm_cache()
             st.success("API Key set for this session!")
             st.rerun()
         else:
             st.stop()
 
+@st.cache_resource
+def get_runtime() -> ChatRuntime:
+    """One event loop, compiled graph and checkpointer for all sessions and reruns."""
+    import atexit
+    runtime = ChatRuntime()
+    runtime.start()
+    atexit.register(runtime.close)
+    return runtime
+
+
+runtime = get_runtime()
+
 # Initialize session state
 import uuid
 if "thread_id" not in st.session_state:
@@ -37,6 +52,9 @@ if "messages" not in st.session_state:
 if "trip_plan" not in st.session_state:
     st.session_state.trip_plan = None
 
+if "route_savings" not in st.session_state:
+    st.session_state.route_savings = {}
+
 # Tabs for Chat and Itinerary
 tab1, tab2 = st.tabs(["💬 Chat", "🗺️ Itinerary & Map"])
 
@@ -92,69 +110,59 @@ with tab2:
         </style>
         """, unsafe_allow_html=True)
         
-        # 2. Daily Itinerary & Map Loop
+        # 2. One map for the whole trip, each day a layer that can be toggled
         amap_api_key = os.getenv("AMAP_MAPS_JS_API_KEY") or os.getenv("AMAP_MAPS_API_KEY")
         security_code = os.getenv("AMAP_SECURITY_CODE", "")
         
+        from travel_assistant.backend.distance import plan_distances
+        from travel_assistant.frontend.amap_component import trip_map_html, trip_map_layers
+        import streamlit.components.v1 as components
+
         if not amap_api_key:
             st.error("AMAP API Key not found. Maps cannot be rendered.")
-        
-        from travel_assistant.frontend.amap_component import render_amap_html
-        import streamlit.components.v1 as components
+        elif trip_map_layers(plan):
+            # Memoized on the plan, so reruns send the same HTML and keep the map
+            components.html(trip_map_html(amap_api_key, plan, height=500, security_code=security_code), height=500)
+        else:
+            st.info("No location data for this trip.")
 
+        distances = plan_distances(plan)
+
+        # 3. Daily itinerary cards
         for day in plan.itinerary:
             st.markdown(f"### Day {day.day}: {day.summary}")
+            saved_km = st.session_state.route_savings.get(day.day, {}).get("saved_km", 0)
+            if saved_km >= 0.1:
+                st.caption(f"🧭 Route reordered: {saved_km:.1f} km shorter")
             
-            col_map, col_cards = st.columns([1.2, 1]) # Map gets slightly more width
-            
-            with col_map:
-                # Prepare data for this day
-                day_markers = []
-                day_path = []
-                
-                for node in day.nodes:
-                    if node.coordinates:
-                        # Amap expects [lng, lat]
-                        pos = [node.coordinates.lng, node.coordinates.lat]
-                        day_markers.append({
-                            "position": pos,
-                            "title": node.name,
-                            "content": f"{node.type}: {node.name}"
-                        })
-                        day_path.append(pos)
-                
-                if day_markers and amap_api_key:
-                    day_html = render_amap_html(
-                        api_key=amap_api_key,
-                        markers=day_markers,
-                        path_coordinates=day_path,
-                        height=400, # Per-day map height
-                        security_code=security_code
-                    )
-                    components.html(day_html, height=400)
-                elif not day_markers:
-                    st.info("No location data for this day.")
-                else:
-                     st.warning("Map unavailable")
-
-            with col_cards:
-                 for node in day.nodes:
-                    cost_html = f'<span class="itinerary-cost">{node.cost}</span>' if node.cost else ""
-                    start_time = node.start_time if node.start_time else ""
-                    end_time = f"- {node.end_time}" if node.end_time else ""
-                    time_str = f"{start_time} {end_time}"
+            legs = {leg.from_index: leg for leg in distances.legs.get(day.day, [])}
+            for index, node in enumerate(day.nodes):
+                cost_html = f'<span class="itinerary-cost">{node.cost}</span>' if node.cost else ""
+                start_time = node.start_time if node.start_time else ""
+                end_time = f"- {node.end_time}" if node.end_time else ""
+                time_str = f"{start_time} {end_time}"
                     
-                    st.markdown(f"""
-                    <div class="itinerary-card">
-                        {cost_html}
-                        <div class="itinerary-type">{node.type or 'Activity'}</div>
-                        <div class="itinerary-title">{node.name}</div>
-                        <div class="itinerary-time">{time_str}</div>
-                        <div style="margin-top: 10px; font-size: 0.9em;">{node.description}</div>
-                    </div>
-                    """, unsafe_allow_html=True)
+                st.markdown(f"""
+                <div class="itinerary-card">
+                    {cost_html}
+                    <div class="itinerary-type">{node.type or 'Activity'}</div>
+                    <div class="itinerary-title">{node.name}</div>
+                    <div class="itinerary-time">{time_str}</div>
+                    <div style="margin-top: 10px; font-size: 0.9em;">{node.description}</div>
+                </div>
+                """, unsafe_allow_html=True)
+                leg = legs.get(index)
+                if leg:
+                    icon = "🚶" if leg.mode == "walking" else "🚕"
+                    warning = " ⚠️ tight schedule" if leg.tight else ""
+                    st.caption(f"{icon} {leg.km:.1f} km · {leg.minutes:.0f} min to next stop{warning}")
             
             st.divider()
+    else:
+        st.info("Your itinerary will appear here once a trip is planned.")
+
+    # Days drafted by the planner show up here while the rest of the plan streams in
+    draft_container = st.container()
 
 # User input
 if prompt := st.chat_input("Where do you want to go?"):
@@ -164,43 +172,46 @@ if prompt := st.chat_input("Where do you want to go?"):
         st.markdown(prompt)
 
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            try:
-                # Invoke the graph using asyncio for async node support
-                import asyncio
-                from travel_assistant.backend.memory.checkpointer import get_async_checkpointer
-                from travel_assistant.backend.graph import builder
-                
-                async def run_chat():
-                    async with get_async_checkpointer() as checkpointer:
-                         # Compile graph with checkpointer at runtime
-                         graph_run = builder.compile(checkpointer=checkpointer)
-                         
-                         # Use persistent config
-                         config = {"configurable": {"thread_id": st.session_state.thread_id}}
-                         
-                         # Only pass the NEW message, let checkpointer handle history
-                         inputs = {"messages": [HumanMessage(content=prompt)]}
-                         
-                         return await graph_run.ainvoke(inputs, config=config)
-
-                response = asyncio.run(run_chat())
-                
-                # Get the returned messages
-                final_messages = response["messages"]
-                
-                if final_messages:
-                    last_msg = final_messages[-1]
-                    if isinstance(last_msg, AIMessage):
-                        st.session_state.messages.append(last_msg)
-                        st.markdown(last_msg.content)
+        # Progress of each graph node, then the answer streamed token by token
+        status = st.status("Thinking...", expanded=False)
+        answer_placeholder = st.empty()
+        try:
+            # The turn runs on the runtime's loop; its events are rendered here
+            tokens = []
+            response = {}
+            for event in runtime.stream(st.session_state.thread_id, prompt):
+                if event.kind == "progress":
+                    status.write(f"✅ {event.text}")
+                elif event.kind == "day":
+                    status.write(f"🗓️ Day {event.day.day} drafted")
+                    with draft_container:
+                        st.markdown(f"### Day {event.day.day}: {event.day.summary}")
+                        for node in event.day.nodes:
+                            times = " - ".join(t for t in (node.start_time, node.end_time) if t)
+                            st.markdown(f"- **{node.name}** {times}")
+                elif event.kind == "token":
+                    tokens.append(event.text)
+                    answer_placeholder.markdown("".join(tokens) + "▌")
+                elif event.kind == "final":
+                    response = event.state
+            status.update(label="Done", state="complete")
+            
+            # Get the returned messages
+            final_messages = response.get("messages", [])
+            
+            if final_messages:
+                last_msg = final_messages[-1]
+                if isinstance(last_msg, AIMessage):
+                    st.session_state.messages.append(last_msg)
+                    answer_placeholder.markdown(last_msg.content)
+            
+            # Update Trip Plan
+            if response.get("trip_plan"):
+                st.session_state.trip_plan = response["trip_plan"]
+                st.session_state.route_savings = response.get("route_savings") or {}
+                st.rerun()
                 
-                # Update Trip Plan
-                if response.get("trip_plan"):
-                    st.session_state.trip_plan = response["trip_plan"]
-                    st.rerun()
-                    
-            except Exception as e:
-                st.error(f"An error occurred: {e}")
-                import traceback
-                st.error(traceback.format_exc())
+        except Exception as e:
+            st.error(f"An error occurred: {e}")
+            import traceback
+            st.error(traceback.format_exc())
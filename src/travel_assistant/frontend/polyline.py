@@ -0,0 +1,186 @@
+"""Compact route geometry for the embedded maps.
+
+Map HTML is sent to the browser again on every Streamlit rerun, so route
+geometry is shrunk before it is embedded:
+
+- Douglas-Peucker simplification with a tolerance of about one screen pixel
+  at a given zoom, computed for a few zoom levels; the page swaps levels as
+  the user zooms.
+- The encoded polyline format (delta-encoded fixed-point coordinates as
+  printable characters, as used by Google and OSRM), decoded by
+  ``DECODE_POLYLINE_JS`` in the page.
+
+Coordinates are [lng, lat] pairs throughout, the order AMap uses.
+"""
+
+import math
+from typing import List, Sequence
+
+import numpy as np
+
+# Fixed-point precision of encoded coordinates (1e-5 degrees is about 1 m)
+PRECISION = 5
+
+# Zoom levels a simplified path is prepared for, and the tolerance in pixels
+ZOOM_LEVELS = (10, 13, 16)
+PIXEL_TOLERANCE = 1.0
+
+# Web Mercator ground resolution at zoom 0, in metres per pixel at the equator
+METRES_PER_PIXEL_Z0 = 156543.03392
+
+# Metres per degree of latitude
+METRES_PER_DEGREE = 111320.0
+
+
+def tolerance_for_zoom(
+    zoom: float, lat: float, pixels: float = PIXEL_TOLERANCE
+) -> float:
+    """Distance in metres spanned by ``pixels`` screen pixels at a zoom and latitude."""
+    return pixels * METRES_PER_PIXEL_Z0 * math.cos(math.radians(lat)) / (2**zoom)
+
+
+def douglas_peucker(
+    points: Sequence[Sequence[float]], tolerance_m: float
+) -> List[List[float]]:
+    """Simplify a path, keeping points further than ``tolerance_m`` from the new line.
+
+    Args:
+        points: [lng, lat] pairs.
+        tolerance_m: Max deviation in metres.
+
+    Returns:
+        The kept points, always including both ends.
+    """
+    pts = np.asarray(points, dtype=float).reshape(-1, 2)
+    if len(pts) < 3 or tolerance_m <= 0:
+        return pts.tolist()
+
+    # Local equirectangular projection to metres; fine at city scale
+    scale = np.array(
+        [
+            METRES_PER_DEGREE * math.cos(math.radians(pts[:, 1].mean())),
+            METRES_PER_DEGREE,
+        ]
+    )
+    xy = pts * scale
+    keep = np.zeros(len(pts), dtype=bool)
+    keep[0] = keep[-1] = True
+
+    stack = [(0, len(pts) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        a, b = xy[first], xy[last]
+        inner = xy[first + 1 : last]
+        ab = b - a
+        length = np.hypot(*ab)
+        if length == 0:
+            dist = np.hypot(*(inner - a).T)
+        else:
+            # Distance to the segment, clamping the projection to its ends
+            t = np.clip(((inner - a) @ ab) / length**2, 0.0, 1.0)
+            dist = np.hypot(*(inner - (a + t[:, None] * ab)).T)
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance_m:
+            split = first + 1 + i
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return pts[keep].tolist()
+
+
+def _encode_value(value: int) -> str:
+    value = ~(value << 1) if value < 0 else value << 1
+    chunks = []
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+    return "".join(chunks)
+
+
+def encode_polyline(
+    points: Sequence[Sequence[float]], precision: int = PRECISION
+) -> str:
+    """Encode [lng, lat] pairs as an encoded polyline string."""
+    factor = 10**precision
+    encoded = []
+    prev_lng = prev_lat = 0
+    for lng, lat in points:
+        lng_i, lat_i = int(round(lng * factor)), int(round(lat * factor))
+        encoded.append(_encode_value(lng_i - prev_lng))
+        encoded.append(_encode_value(lat_i - prev_lat))
+        prev_lng, prev_lat = lng_i, lat_i
+    return "".join(encoded)
+
+
+def decode_polyline(encoded: str, precision: int = PRECISION) -> List[List[float]]:
+    """Inverse of ``encode_polyline``."""
+    factor = 10**precision
+    values = []
+    value = shift = 0
+    for char in encoded:
+        byte = ord(char) - 63
+        value |= (byte & 0x1F) << shift
+        shift += 5
+        if byte < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+    points = []
+    lng = lat = 0
+    for i in range(0, len(values) - 1, 2):
+        lng += values[i]
+        lat += values[i + 1]
+        points.append([lng / factor, lat / factor])
+    return points
+
+
+def simplified_levels(
+    points: Sequence[Sequence[float]], zooms: Sequence[int] = ZOOM_LEVELS
+) -> List[dict]:
+    """A path simplified and encoded for each zoom level.
+
+    Returns:
+        [{'zoom': 10, 'path': '<encoded>', 'points': n}, ...], by increasing zoom.
+        A level is meant for its zoom and above, up to the next level.
+    """
+    if not len(points):
+        return []
+    lat = float(np.mean([p[1] for p in points]))
+    levels = []
+    for zoom in sorted(zooms):
+        kept = douglas_peucker(points, tolerance_for_zoom(zoom, lat))
+        levels.append(
+            {"zoom": zoom, "path": encode_polyline(kept), "points": len(kept)}
+        )
+    return levels
+
+
+# Decoder for the page; same algorithm as decode_polyline
+DECODE_POLYLINE_JS = f"""
+function decodePolyline(str) {{
+    var factor = Math.pow(10, {PRECISION});
+    var points = [], index = 0, lng = 0, lat = 0;
+    function next() {{
+        var result = 0, shift = 0, b;
+        do {{
+            b = str.charCodeAt(index++) - 63;
+            result |= (b & 0x1f) << shift;
+            shift += 5;
+        }} while (b >= 0x20);
+        return (result & 1) ? ~(result >> 1) : (result >> 1);
+    }}
+    while (index < str.length) {{
+        lng += next();
+        lat += next();
+        points.push([lng / factor, lat / factor]);
+    }}
+    return points;
+}}
+function levelFor(levels, zoom) {{
+    var chosen = levels[0];
+    levels.forEach(function(level) {{ if (zoom >= level.zoom) {{ chosen = level; }} }});
+    return chosen;
+}}
+"""
@@ -0,0 +1,200 @@
+"""Long-lived runtime for the Streamlit app.
+
+Streamlit reruns the whole script on every interaction, and the app used to
+call ``asyncio.run`` per message: a new event loop each time, the graph
+compiled again, the checkpointer reopened and the loop-bound amap server pool
+and httpx pools rebuilt. ``ChatRuntime`` keeps one event loop running in a
+background thread instead, with one compiled graph on the shared checkpointer
+and the amap pool warmed once. The app caches it with ``st.cache_resource``
+and submits chat turns to it as coroutines.
+
+Settings (environment):
+    METRICS_PORT: Serve Prometheus metrics at http://127.0.0.1:PORT/metrics.
+    METRICS_FILE: Write Prometheus metrics to this file after every turn.
+"""
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+from langchain_core.messages import HumanMessage
+from langgraph.graph import StateGraph
+
+from travel_assistant.backend.memory.checkpointer import (
+    close_checkpointer,
+    get_checkpointer,
+)
+from travel_assistant.backend.metrics import metrics, serve_prometheus, write_prometheus
+from travel_assistant.backend.streaming import StreamEvent, stream_turn
+
+# Marks the end of a streamed turn in the event queue
+_DONE = object()
+
+
+class ChatRuntime:
+    """A background event loop with a compiled graph and warm connection pools.
+
+    Attributes:
+        loop: The event loop all graph runs, checkpointer and pools live on.
+        compiles: Number of times the graph was compiled (1 once warm).
+        turns: Number of chat turns run.
+    """
+
+    def __init__(
+        self,
+        builder: Optional[StateGraph] = None,
+        checkpointer_factory: Optional[Callable[[], Awaitable[Any]]] = None,
+        warm_up: Optional[Callable[[], Awaitable[Any]]] = None,
+    ):
+        """Start the loop thread.
+
+        Args:
+            builder: Graph builder to compile (defaults to the travel graph).
+            checkpointer_factory: Coroutine function returning the checkpointer
+                (defaults to the process-wide one).
+            warm_up: Coroutine function run once in the background, e.g. to
+                pre-spawn MCP servers (defaults to ``warm_up_amap``).
+        """
+        if builder is None:
+            from travel_assistant.backend.graph import builder
+        if warm_up is None:
+            from travel_assistant.backend.tools import warm_up_amap as warm_up
+        self.builder = builder
+        self.checkpointer_factory = checkpointer_factory or get_checkpointer
+        self.warm_up = warm_up
+        self.compiles = 0
+        self.turns = 0
+        self._graph = None
+        self._checkpointer = None
+        self._graph_lock: Optional[asyncio.Lock] = None
+        self._warm_up_task: Optional[asyncio.Task] = None
+        self.metrics_file = os.getenv("METRICS_FILE")
+        port = os.getenv("METRICS_PORT")
+        self.metrics_server = serve_prometheus(int(port)) if port else None
+
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_loop, name="chat-runtime", daemon=True
+        )
+        self._thread.start()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Awaitable[Any]) -> Future:
+        """Schedule a coroutine on the runtime loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the runtime loop and wait for its result."""
+        return self.submit(coro).result(timeout)
+
+    async def graph(self):
+        """The compiled graph, built on first use and then reused."""
+        if self._graph_lock is None:
+            self._graph_lock = asyncio.Lock()
+        async with self._graph_lock:
+            if self._graph is None:
+                if self.warm_up is not None and self._warm_up_task is None:
+                    # Spawn the server pool while the checkpointer opens
+                    # and the first turn starts
+                    self._warm_up_task = asyncio.create_task(self.warm_up())
+                self._checkpointer = await self.checkpointer_factory()
+                self._graph = self.builder.compile(checkpointer=self._checkpointer)
+                self.compiles += 1
+        return self._graph
+
+    def start(self) -> Future:
+        """Compile the graph and start warming pools without waiting."""
+        return self.submit(self.graph())
+
+    def stream(
+        self, thread_id: str, prompt: str, timeout: Optional[float] = None
+    ) -> Iterator[StreamEvent]:
+        """Run one chat turn on the runtime loop, yielding events in the calling thread.
+
+        Streamlit elements can only be updated from the script thread, so
+        events cross over through a queue.
+
+        Args:
+            thread_id: Conversation thread for the checkpointer.
+            prompt: The user's message.
+            timeout: Max seconds to wait for the next event.
+
+        Yields:
+            StreamEvents as produced by ``stream_turn``.
+        """
+        events: "queue.Queue[Any]" = queue.Queue()
+        submitted = time.perf_counter()
+
+        async def produce():
+            metrics.observe("runtime_submit_seconds", time.perf_counter() - submitted)
+            try:
+                graph = await self.graph()
+                config = {"configurable": {"thread_id": thread_id}}
+                # Only pass the new message; the checkpointer holds the history
+                inputs = {"messages": [HumanMessage(content=prompt)]}
+                async for event in stream_turn(graph, inputs, config=config):
+                    events.put(event)
+            except BaseException as e:
+                events.put(e)
+            finally:
+                if self.metrics_file:
+                    write_prometheus(self.metrics_file)
+                events.put(_DONE)
+
+        future = self.submit(produce())
+        self.turns += 1
+        while True:
+            item = events.get(timeout=timeout)
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+        future.result()
+
+    def stats(self) -> Dict[str, Any]:
+        """Turns run, graph compiles and per-turn overhead percentiles."""
+        observations = {o["name"]: o for o in metrics.snapshot()["observations"]}
+        overhead = observations.get("turn_overhead_seconds", {})
+        submit = observations.get("runtime_submit_seconds", {})
+        return {
+            "turns": self.turns,
+            "compiles": self.compiles,
+            "overhead_p50_ms": overhead.get("p50", 0.0) * 1000,
+            "overhead_p95_ms": overhead.get("p95", 0.0) * 1000,
+            "submit_p95_ms": submit.get("p95", 0.0) * 1000,
+        }
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Close the checkpointer and server pool, then stop the loop thread."""
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+            self.metrics_server = None
+        if not self.loop.is_running():
+            return
+
+        async def shutdown():
+            if self._warm_up_task is not None:
+                self._warm_up_task.cancel()
+            if self.checkpointer_factory is get_checkpointer:
+                await close_checkpointer()
+            elif self._checkpointer is not None:
+                await self._checkpointer.close()
+            from travel_assistant.backend.tools import amap_manager
+
+            await amap_manager.close()
+
+        try:
+            self.run(shutdown(), timeout)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout)
+            if not self.loop.is_running():
+                self.loop.close()
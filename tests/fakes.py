@@ -0,0 +1,96 @@
+"""Fakes shared by several test modules."""
+
+import asyncio
+import json
+import math
+
+import numpy as np
+from langchain_core.messages import AIMessage
+
+from travel_assistant.backend.prompts import (
+    INPUT_EXTRACTION_SYSTEM_PROMPT,
+    PLANNER_SYSTEM_PROMPT,
+)
+from travel_assistant.backend.schemas import (
+    DailyItinerarySchema,
+    InputSchema,
+    PlanEditSchema,
+    PlanPatchSchema,
+    TripNodeSchema,
+    TripNodeUpdateSchema,
+    TripSchema,
+)
+
+
+def fake_llm_response(input_msgs):
+    system_prompt = input_msgs[0].content
+    if system_prompt == INPUT_EXTRACTION_SYSTEM_PROMPT:
+        return InputSchema(
+            destination="Paris", start_date="2024-06-01", end_date="2024-06-03"
+        )
+    if system_prompt == PLANNER_SYSTEM_PROMPT:
+        return TripSchema(
+            destination="Paris",
+            itinerary=[
+                DailyItinerarySchema(
+                    day=1,
+                    summary="Museums",
+                    nodes=[
+                        TripNodeSchema(
+                            name="Louvre", description="Art museum", type="attraction"
+                        ),
+                    ],
+                )
+            ],
+        )
+    if "You are a travel assistant editor" in system_prompt:
+        return PlanPatchSchema(
+            edits=[
+                PlanEditSchema(
+                    op="update",
+                    day=1,
+                    index=0,
+                    updates=TripNodeUpdateSchema(cost="22 EUR"),
+                ),
+            ]
+        )
+    return AIMessage(content="Enjoy Paris!")
+
+
+GEO = {
+    "West Lake": {"return": [{"location": "120.14,30.25", "level": "兴趣点"}]},
+    # Only resolves to the city centre, so the POI search is used instead
+    "Lingyin Temple": {"return": [{"location": "120.15,30.28", "level": "市"}]},
+}
+SEARCH = {"Lingyin Temple": {"pois": [{"id": "B001", "name": "Lingyin Temple"}]}}
+DETAIL = {"B001": {"id": "B001", "location": "120.10,30.24", "address": "1 Fayun Lane"}}
+
+
+class FakeAmap:
+    def __init__(self):
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, tool_name, tool_args):
+        self.calls.append((tool_name, tool_args))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.02)
+        self.in_flight -= 1
+        if tool_name == "maps_geo":
+            result = GEO.get(tool_args["address"], {"return": []})
+        elif tool_name == "maps_text_search":
+            result = SEARCH.get(tool_args["keywords"], {"pois": []})
+        else:
+            result = DETAIL.get(tool_args["id"], {"error": "No POI found"})
+        return json.dumps(result)
+
+
+def wiggly_route(n=1000):
+    """A road-like path: a smooth arc with metre-scale jitter."""
+    rng = np.random.default_rng(0)
+    t = np.linspace(0, 1, n)
+    lng = 120.10 + 0.08 * t + 1e-5 * rng.standard_normal(n)
+    lat = 30.20 + 0.02 * np.sin(t * math.pi) + 1e-5 * rng.standard_normal(n)
+    return np.column_stack([lng, lat]).tolist()
@@ -0,0 +1,101 @@
+import json
+import shutil
+import subprocess
+import unittest
+
+from tests.fakes import wiggly_route
+from travel_assistant.backend.schemas import (
+    CoordinateSchema,
+    DailyItinerarySchema,
+    TripNodeSchema,
+    TripSchema,
+)
+from travel_assistant.frontend.amap_component import (
+    map_payload_report,
+    render_trip_map_html,
+    trip_map_html,
+    trip_map_layers,
+)
+from travel_assistant.frontend.polyline import DECODE_POLYLINE_JS, decode_polyline
+
+
+def make_plan(days=10):
+    return TripSchema(destination="Beijing", itinerary=[
+        DailyItinerarySchema(day=d, summary=f"Day {d}", nodes=[
+            TripNodeSchema(name=f"Stop {d}-{i}", description="", type="attraction",
+                           coordinates=CoordinateSchema(lat=39.9 + d * 0.01, lng=116.4 + i * 0.01))
+            for i in range(3)
+        ] + [TripNodeSchema(name="Unknown place", description="")])
+        for d in range(1, days + 1)
+    ])
+
+
+class TestTripMap(unittest.TestCase):
+    def test_one_layer_per_located_day(self):
+        plan = make_plan(days=3)
+        plan.itinerary.append(DailyItinerarySchema(day=4, summary="Rest", nodes=[]))
+
+        layers = trip_map_layers(plan)
+
+        self.assertEqual([layer["day"] for layer in layers], [1, 2, 3])
+        self.assertEqual(layers[0]["titles"], ["Stop 1-0", "Stop 1-1", "Stop 1-2"])
+        self.assertEqual(decode_polyline(layers[0]["stops"])[0], [116.4, 39.91])
+        self.assertEqual(decode_polyline(layers[0]["levels"][-1]["path"])[0], [116.4, 39.91])
+        self.assertNotEqual(layers[0]["color"], layers[1]["color"])
+
+    def test_whole_trip_loads_the_sdk_once(self):
+        html = render_trip_map_html("key", make_plan(days=10), security_code="code")
+
+        self.assertEqual(html.count("webapi.amap.com/maps"), 1)
+        self.assertEqual(html.count("new AMap.Map("), 1)
+        self.assertIn("AMap.OverlayGroup", html)
+        self.assertIn('"label": "Day 10"', html)
+
+    def test_names_cannot_close_the_script(self):
+        plan = make_plan(days=1)
+        plan.itinerary[0].nodes[0].name = "</script><script>alert(1)</script> & co"
+
+        html = render_trip_map_html("key", plan)
+
+        self.assertNotIn("</script><script>alert", html)
+        payload = html.split("var layersData = ", 1)[1].split(";\n", 1)[0]
+        self.assertEqual(json.loads(payload)[0]["titles"][0], plan.itinerary[0].nodes[0].name)
+
+    def test_rendering_is_memoized_on_the_plan(self):
+        plan = make_plan(days=2)
+
+        first = trip_map_html("key", plan)
+        again = trip_map_html("key", make_plan(days=2))
+        changed = trip_map_html("key", make_plan(days=3))
+
+        self.assertIs(again, first)
+        self.assertIsNot(changed, first)
+        self.assertIn('"label": "Day 3"', changed)
+
+
+class TestMapPayload(unittest.TestCase):
+    def test_route_geometry_is_simplified_and_encoded(self):
+        plan = make_plan(days=2)
+        routes = {1: wiggly_route(), 2: wiggly_route(500)}
+
+        report = map_payload_report(plan, routes)
+
+        self.assertEqual(report[1]["points"], 1000)
+        self.assertLess(report[1]["kept"], 1000)
+        self.assertLess(report[1]["bytes"], report[1]["raw_bytes"] / 4)
+        html = render_trip_map_html("key", plan, routes=routes)
+        self.assertLess(len(html), sum(r["raw_bytes"] for r in report.values()))
+
+    @unittest.skipUnless(shutil.which("node"), "node is not installed")
+    def test_page_decoder_matches_python(self):
+        layer = trip_map_layers(make_plan(days=1), {1: wiggly_route(100)})[0]
+        encoded = layer["levels"][-1]["path"]
+        script = DECODE_POLYLINE_JS + f"console.log(JSON.stringify(decodePolyline({json.dumps(encoded)})));"
+
+        output = subprocess.run(["node", "-e", script], capture_output=True, text=True, check=True).stdout
+
+        self.assertEqual(json.loads(output), decode_polyline(encoded))
+
+
+if __name__ == "__main__":
+    unittest.main()
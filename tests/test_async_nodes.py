@@ -0,0 +1,44 @@
+
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from langchain_core.messages import HumanMessage
+
+from tests.fakes import fake_llm_response
+from travel_assistant.backend.agents.nodes import aprocess_input, process_input
+from travel_assistant.backend.graph import graph
+
+
+class TestAsyncNodes(unittest.TestCase):
+    def test_graph_ainvoke_uses_async_llm_calls(self):
+        mock_llm = MagicMock()
+        mock_llm.ainvoke = AsyncMock(side_effect=lambda msgs, *a, **k: fake_llm_response(msgs))
+        mock_llm.invoke.side_effect = AssertionError("blocking invoke called from async graph")
+
+        with patch("travel_assistant.backend.agents.nodes.get_llm", return_value=mock_llm), \
+             patch("travel_assistant.backend.agents.nodes.run_simple_tool_agent", new=AsyncMock(return_value="info")), \
+             patch("travel_assistant.backend.agents.nodes.geocode_places", new=AsyncMock(return_value={})):
+            result = asyncio.run(graph.ainvoke({"messages": [HumanMessage(content="Paris please")]}))
+
+        self.assertEqual(result["destination"], "Paris")
+        self.assertEqual(result["trip_plan"].itinerary[0].nodes[0].cost, "22 EUR")
+        self.assertEqual(result["messages"][-1].content, "Enjoy Paris!")
+        self.assertEqual(mock_llm.ainvoke.call_count, 4)
+
+    def test_sync_and_async_variants_agree(self):
+        mock_llm = MagicMock()
+        mock_llm.invoke.side_effect = lambda msgs, *a, **k: fake_llm_response(msgs)
+        mock_llm.ainvoke = AsyncMock(side_effect=lambda msgs, *a, **k: fake_llm_response(msgs))
+        state = {"messages": [HumanMessage(content="Paris in June")]}
+
+        with patch("travel_assistant.backend.agents.nodes.get_llm", return_value=mock_llm):
+            sync_updates = process_input(state)
+            async_updates = asyncio.run(aprocess_input(state))
+
+        self.assertEqual(sync_updates, async_updates)
+        self.assertEqual(sync_updates["travel_dates"], {"start": "2024-06-01", "end": "2024-06-03"})
+
+
+if __name__ == "__main__":
+    unittest.main()
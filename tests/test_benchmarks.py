@@ -0,0 +1,123 @@
+import asyncio
+import json
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from travel_assistant.backend.mcp_client import MCPClientManager  # noqa: E402
+
+import e2e  # noqa: E402
+from e2e import compare, run_benchmark  # noqa: E402
+from loadtest import run_load_test  # noqa: E402
+from fakes import AmapFixtures, FakeAmapManager, FakeChatModel, Latency  # noqa: E402
+
+
+class TestFakeBackends(unittest.TestCase):
+    def test_fixtures_answer_like_amap(self):
+        fixtures = AmapFixtures()
+        pois = fixtures.respond("maps_text_search", {"keywords": "West Lake", "city": "Hangzhou"})["pois"]
+        self.assertTrue(pois)
+        detail = fixtures.respond("maps_search_detail", {"id": pois[0]["id"]})
+        self.assertIn(",", detail["location"])
+        geo = fixtures.respond("maps_geo", {"address": detail["name"], "city": "Hangzhou"})
+        self.assertEqual(geo["return"][0]["location"], detail["location"])
+        self.assertIn("error", fixtures.respond("maps_unknown", {}))
+
+    def test_latency_distributions(self):
+        self.assertEqual(Latency("fixed:0.5").sample(), 0.5)
+        self.assertTrue(0.1 <= Latency("uniform:0.1:0.2", seed=1).sample() <= 0.2)
+        self.assertGreater(Latency("lognormal:0.05:0.5", seed=1).sample(), 0)
+        with self.assertRaises(ValueError):
+            Latency("normal:1")
+
+
+SERVER_PATH = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "amap_stdio_server.py")
+
+
+class TestAmapStdioServer(unittest.TestCase):
+    def _call(self, tool_name, tool_args, *server_args, call_timeout=10.0):
+        manager = MCPClientManager(
+            command=sys.executable,
+            args=[SERVER_PATH, *server_args],
+            server_name="amap_fixtures",
+            pool_size=1,
+            call_timeout=call_timeout,
+        )
+
+        async def run():
+            try:
+                return await manager.execute_tool(tool_name, tool_args)
+            finally:
+                await manager.close()
+
+        return asyncio.run(run())
+
+    def test_serves_fixtures(self):
+        output = self._call("maps_weather", {"city": "Hangzhou"}, "--padding-bytes", "100")
+        data = json.loads(output)
+        self.assertEqual(data["city"], "Hangzhou")
+        self.assertEqual(len(data["padding"]), 100)
+
+    def test_injected_errors_and_hangs(self):
+        output = self._call("maps_weather", {"city": "Hangzhou"}, "--error-rate", "1")
+        self.assertTrue(output.startswith("Error"))
+        self.assertIn("Injected failure", output)
+
+        output = self._call("maps_weather", {"city": "Hangzhou"}, "--hang-rate", "1", call_timeout=0.5)
+        self.assertTrue(output.startswith("Error"))
+
+
+class TestE2EBenchmark(unittest.TestCase):
+    def test_runs_graph_end_to_end(self):
+        llm = FakeChatModel(ttft=0, tokens_per_second=1e6, days=2)
+        amap = FakeAmapManager(latency=Latency("fixed:0"))
+        results = asyncio.run(run_benchmark(runs=2, turns=2, llm=llm, amap=amap))
+
+        self.assertEqual(results["turn_seconds"]["count"], 4)
+        for node in ("process_input", "plan_itinerary", "geocode_itinerary", "generate_response"):
+            self.assertIn(node, results["nodes"])
+        self.assertTrue(results["critical_path"].startswith("process_input"))
+        self.assertGreater(amap.calls, 0)
+        self.assertEqual(compare(results, results), [])
+
+    def test_turn_without_final_event_fails_clearly(self):
+        async def no_final_event(*args, **kwargs):
+            return
+            yield
+
+        with patch.object(e2e, "stream_turn", new=no_final_event):
+            with self.assertRaisesRegex(RuntimeError, "without a final event"):
+                asyncio.run(run_benchmark(runs=1, turns=1, amap=FakeAmapManager(latency=Latency("fixed:0"))))
+
+    def test_compare_flags_slow_metrics_only(self):
+        base = {"turn_seconds": {"p50": 1.0, "p95": 1.2}, "critical_path_seconds": {"p50": 0.9, "p95": 1.0},
+                "nodes": {"plan_itinerary": {"p50": 0.5, "p95": 0.6}, "validate_budget": {"p50": 0.001, "p95": 0.001}}}
+        current = {"turn_seconds": {"p50": 1.05, "p95": 1.25}, "critical_path_seconds": {"p50": 0.9, "p95": 1.0},
+                   "nodes": {"plan_itinerary": {"p50": 0.8, "p95": 0.9}, "validate_budget": {"p50": 0.005, "p95": 0.005}}}
+        regressions = compare(current, base)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(r.startswith("node plan_itinerary") for r in regressions))
+
+
+class TestLoadTest(unittest.TestCase):
+    def test_concurrent_sessions_report(self):
+        llm = FakeChatModel(ttft=0.01, tokens_per_second=1e5, days=2)
+        amap = FakeAmapManager(latency=Latency("fixed:0"))
+        report = asyncio.run(run_load_test([1, 3], turns=2, llm=llm, amap=amap))
+
+        self.assertEqual([level["sessions"] for level in report["levels"]], [1, 3])
+        busy = report["levels"][1]
+        self.assertEqual(busy["errors"], 0)
+        self.assertEqual(busy["turns"], 6)
+        self.assertGreater(busy["turns_per_second"], 0)
+        self.assertEqual([turn["count"] for turn in busy["turn_latency_by_index"]], [3, 3])
+        self.assertGreater(busy["loop_lag"]["count"], 0)
+        self.assertGreater(busy["checkpointer"]["lock_acquisitions"], 0)
+        self.assertEqual(report["checkpointer"]["threads"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from typing import Annotated, TypedDict
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.graph import END, StateGraph
+from langgraph.graph.message import add_messages
+
+from travel_assistant.backend.memory.checkpointer import open_checkpointer
+from travel_assistant.backend.memory.serde import (
+    CompactSerializer,
+    join_channel_values,
+    split_channel_values,
+)
+from travel_assistant.backend.schemas import DailyItinerarySchema, TripNodeSchema, TripSchema
+
+
+class PlanState(TypedDict):
+    messages: Annotated[list, add_messages]
+    trip_plan: TripSchema | None
+    notes: str | None
+
+
+def make_plan(days=3, label="Visit"):
+    return TripSchema(
+        destination="Beijing",
+        interests=["history"],
+        itinerary=[
+            DailyItinerarySchema(day=d, summary=f"Day {d}", nodes=[
+                TripNodeSchema(name=f"{label} {d}-{i}", description="A long description " * 20, type="attraction")
+                for i in range(4)
+            ])
+            for d in range(1, days + 1)
+        ],
+    )
+
+
+def change_day_two(state):
+    plan = state["trip_plan"]
+    days = list(plan.itinerary)
+    days[1] = days[1].model_copy(update={"summary": "Changed"})
+    return {"trip_plan": plan.model_copy(update={"itinerary": days})}
+
+
+def build_graph(saver):
+    builder = StateGraph(PlanState)
+    builder.add_node("plan", lambda state: {"trip_plan": state.get("trip_plan") or make_plan()})
+    builder.add_node("refine", change_day_two)
+    builder.add_node("reply", lambda state: {"messages": [AIMessage(content="Here is your plan. " * 30)]})
+    builder.set_entry_point("plan")
+    builder.add_edge("plan", "refine")
+    builder.add_edge("refine", "reply")
+    builder.add_edge("reply", END)
+    return builder.compile(checkpointer=saver)
+
+
+def config(thread_id):
+    return {"configurable": {"thread_id": thread_id}}
+
+
+class TestCompactSerializer(unittest.TestCase):
+    def test_round_trip_compresses_large_values(self):
+        serde = CompactSerializer()
+        plan = make_plan()
+
+        type_, data = serde.dumps_typed(plan)
+
+        self.assertTrue(type_.endswith("+zstd"))
+        self.assertLess(len(data), len(serde.inner.dumps_typed(plan)[1]) / 2)
+        self.assertEqual(serde.loads_typed((type_, data)), plan)
+
+    def test_small_and_uncompressed_values_pass_through(self):
+        serde = CompactSerializer()
+        self.assertEqual(serde.dumps_typed("hi")[0], "msgpack")
+        legacy = serde.inner.dumps_typed({"count": 1})
+        self.assertEqual(serde.loads_typed(legacy), {"count": 1})
+        self.assertFalse(CompactSerializer(compress=False).dumps_typed(make_plan())[0].endswith("+zstd"))
+
+    def test_split_and_join_restore_channel_values(self):
+        serde = CompactSerializer()
+        values = {
+            "messages": [HumanMessage(content="hi", id="1"), AIMessage(content="hello", id="2")],
+            "trip_plan": make_plan(),
+            "destination": "Beijing",
+        }
+
+        stored, blobs = split_channel_values(values, serde)
+
+        self.assertEqual(len(blobs), 2 + 3)
+        self.assertEqual(stored["destination"], "Beijing")
+        self.assertNotIn("itinerary", stored["trip_plan"]["header"])
+        decoded = {key: serde.loads_typed(blob) for key, blob in blobs.items()}
+        self.assertEqual(join_channel_values(stored, decoded), values)
+
+
+class TestCompactCheckpoints(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "memory.sqlite")
+
+    def _run(self, scenario, compact=True):
+        async def main():
+            saver = await open_checkpointer(self.path, maintenance_interval=0)
+            if not compact:
+                saver.compact, saver.serde = False, CompactSerializer(compress=False)
+            try:
+                return await scenario(saver, build_graph(saver))
+            finally:
+                await saver.close()
+        return asyncio.run(main())
+
+    def test_state_round_trips_through_blobs(self):
+        async def scenario(saver, graph):
+            for text in ("plan a trip", "change day two"):
+                await graph.ainvoke({"messages": [HumanMessage(content=text)]}, config("a"))
+            state = await graph.aget_state(config("a"))
+            history = [s async for s in graph.aget_state_history(config("a"))]
+            return state.values, history, await saver.report()
+
+        values, history, report = self._run(scenario)
+
+        self.assertEqual(len(values["messages"]), 4)
+        self.assertEqual(values["trip_plan"].itinerary[1].summary, "Changed")
+        self.assertEqual(values["trip_plan"].itinerary[0], make_plan().itinerary[0])
+        self.assertTrue(all(isinstance(s.values.get("messages", []), list) for s in history))
+        # 4 messages, 3 original days and 1 changed day, each stored once
+        self.assertEqual(report["blobs"], 4 + 3 + 1)
+
+    def test_checkpoints_are_smaller_than_plain_ones(self):
+        async def scenario(saver, graph):
+            for i in range(3):
+                await graph.ainvoke({"messages": [HumanMessage(content=f"turn {i}")]}, config("a"))
+            async with saver.conn.execute(
+                "SELECT (SELECT SUM(LENGTH(checkpoint)) FROM checkpoints)"
+                " + COALESCE((SELECT SUM(LENGTH(data)) FROM checkpoint_blobs), 0)"
+            ) as cursor:
+                return (await cursor.fetchone())[0]
+
+        compact = self._run(scenario)
+        os.remove(self.path)
+        plain = self._run(scenario, compact=False)
+
+        self.assertLess(compact, plain / 5)
+
+    def test_unreferenced_blobs_are_collected(self):
+        async def scenario(saver, graph):
+            await graph.ainvoke({"messages": [HumanMessage(content="plan")]}, config("a"))
+            await graph.ainvoke({"messages": [HumanMessage(content="plan")]}, config("b"))
+            await saver.adelete_thread("a")
+            collected = await saver.collect_blobs()
+            state = await graph.aget_state(config("b"))
+            await saver.adelete_thread("b")
+            return collected, state.values, await saver.collect_blobs()
+
+        shared, values, rest = self._run(scenario)
+
+        # Only thread a's messages: the plan days are shared with thread b
+        self.assertEqual(shared, 2)
+        self.assertEqual(len(values["messages"]), 2)
+        self.assertEqual(rest, 2 + 3 + 1)
+
+    def test_collection_racing_a_write_keeps_its_blobs(self):
+        async def scenario(saver, graph):
+            await graph.ainvoke({"messages": [HumanMessage(content="plan")]}, config("a"))
+            saved = await saver.aget_tuple(config("a"))
+            # Thread a's blobs are now unreferenced on disk but still cached
+            await saver.adelete_thread("a")
+            target = {"configurable": {"thread_id": "b", "checkpoint_ns": ""}}
+            async with saver.lock:
+                # Collection queues for the lock first, then the write starts
+                collect = asyncio.create_task(saver.collect_blobs())
+                await asyncio.sleep(0)
+                put = asyncio.create_task(saver.aput(target, saved.checkpoint, saved.metadata, {}))
+                await asyncio.sleep(0)
+            await asyncio.gather(collect, put)
+            return saved.checkpoint, await saver.aget_tuple(config("b"))
+
+        written, loaded = self._run(scenario)
+
+        self.assertIsNotNone(loaded)
+        self.assertEqual(
+            [m.content for m in loaded.checkpoint["channel_values"]["messages"]],
+            [m.content for m in written["channel_values"]["messages"]],
+        )
+        self.assertEqual(loaded.checkpoint["channel_values"]["trip_plan"], written["channel_values"]["trip_plan"])
+
+    def test_blob_reads_wait_for_the_lock(self):
+        async def scenario(saver, graph):
+            await graph.ainvoke({"messages": [HumanMessage(content="plan")]}, config("a"))
+            saved = await AsyncSqliteSaver.aget_tuple(saver, config("a"))
+            saver._blob_cache.clear()
+            async with saver.lock:
+                inflate = asyncio.create_task(saver._inflate(saved))
+                await asyncio.sleep(0.05)
+                waited = not inflate.done()
+            inflated = await inflate
+            history = [s async for s in graph.aget_state_history(config("a"))]
+            return waited, inflated, history
+
+        waited, inflated, history = self._run(scenario)
+
+        self.assertTrue(waited)
+        self.assertEqual(len(inflated.checkpoint["channel_values"]["messages"]), 2)
+        self.assertTrue(history)
+
+
+if __name__ == "__main__":
+    unittest.main()
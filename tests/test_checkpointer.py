@@ -0,0 +1,137 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from typing import TypedDict
+from unittest.mock import patch
+
+from langgraph.graph import END, StateGraph
+
+from travel_assistant.backend.memory import checkpointer as checkpointer_module
+from travel_assistant.backend.memory.checkpointer import get_checkpointer, open_checkpointer
+
+
+class CounterState(TypedDict):
+    count: int
+    notes: str
+
+
+def build_graph(saver):
+    builder = StateGraph(CounterState)
+    # Random notes, so checkpoints stay large after compression
+    builder.add_node("step", lambda state: {"count": state["count"] + 1, "notes": os.urandom(10000).hex()})
+    builder.set_entry_point("step")
+    builder.add_edge("step", END)
+    return builder.compile(checkpointer=saver)
+
+
+def config(thread_id):
+    return {"configurable": {"thread_id": thread_id}}
+
+
+class TestTunedCheckpointer(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "memory.sqlite")
+
+    def _run(self, scenario, **settings):
+        async def main():
+            saver = await open_checkpointer(self.path, maintenance_interval=0)
+            for key, value in settings.items():
+                setattr(saver, key, value)
+            try:
+                return await scenario(saver, build_graph(saver))
+            finally:
+                await saver.close()
+        return asyncio.run(main())
+
+    def test_pragmas_and_wal(self):
+        async def scenario(saver, graph):
+            async with saver.conn.execute("PRAGMA journal_mode") as cursor:
+                journal = (await cursor.fetchone())[0]
+            async with saver.conn.execute("PRAGMA synchronous") as cursor:
+                synchronous = (await cursor.fetchone())[0]
+            return journal, synchronous
+
+        self.assertEqual(self._run(scenario), ("wal", 1))
+
+    def test_retention_keeps_last_checkpoints_and_latest_state(self):
+        async def scenario(saver, graph):
+            for i in range(12):
+                await graph.ainvoke({"count": i, "notes": ""}, config("a"))
+            await graph.ainvoke({"count": 0, "notes": ""}, config("b"))
+            before = await saver.report()
+            report = await saver.maintain()
+            state = await graph.aget_state(config("a"))
+            return before, report, state.values["count"]
+
+        before, report, count = self._run(scenario, keep_last=4)
+
+        self.assertEqual(before["checkpoints"], 12 * 3 + 3)
+        self.assertEqual(report["checkpoints"], 4 + 3)
+        self.assertEqual(report["pruned_checkpoints"], 32)
+        self.assertEqual(count, 12)
+        self.assertEqual(report["write_count"], 39)
+        self.assertGreater(report["write_p95_ms"], 0)
+
+    def test_idle_threads_are_dropped(self):
+        async def scenario(saver, graph):
+            await graph.ainvoke({"count": 0, "notes": ""}, config("old"))
+            saver.thread_ttl = -1
+            dropped = await saver.drop_idle_threads()
+            return dropped, await saver.report(), await graph.aget_state(config("old"))
+
+        dropped, report, state = self._run(scenario)
+
+        self.assertEqual(dropped, 1)
+        self.assertEqual((report["threads"], report["checkpoints"], report["writes"]), (0, 0, 0))
+        self.assertEqual(state.values, {})
+
+    def test_vacuum_shrinks_the_file_once_enough_is_free(self):
+        async def scenario(saver, graph):
+            for i in range(20):
+                await graph.ainvoke({"count": i, "notes": ""}, config("a"))
+            await saver.prune_thread("a")
+            skipped = await saver.vacuum_if_needed()
+            before = await saver.report()
+            saver.vacuum_min_free_mb = 0.1
+            vacuumed = await saver.vacuum_if_needed()
+            return skipped, vacuumed, before, await saver.report()
+
+        skipped, vacuumed, before, after = self._run(scenario, keep_last=2)
+
+        self.assertFalse(skipped)
+        self.assertTrue(vacuumed)
+        self.assertGreater(before["free_bytes"], 0)
+        self.assertLess(after["db_bytes"], before["db_bytes"] / 2)
+        self.assertEqual(after["vacuums"], 1)
+
+    def test_lock_contention_is_reported(self):
+        async def scenario(saver, graph):
+            await asyncio.gather(*[
+                graph.ainvoke({"count": 0, "notes": ""}, config(f"t{i}")) for i in range(8)
+            ])
+            return await saver.report()
+
+        report = self._run(scenario)
+        self.assertGreater(report["lock_acquisitions"], 0)
+        self.assertGreater(report["lock_contended"], 0)
+        self.assertGreaterEqual(report["lock_wait_p99_ms"], report["lock_wait_p50_ms"])
+
+    def test_process_wide_instance_per_event_loop(self):
+        async def twice():
+            return await get_checkpointer(), await get_checkpointer()
+
+        with patch.object(checkpointer_module, "data_path", return_value=self.path), \
+             patch.dict(os.environ, {"CHECKPOINT_MAINTENANCE_INTERVAL": "0"}):
+            first, again = asyncio.run(twice())
+            reopened, _ = asyncio.run(twice())
+            asyncio.run(checkpointer_module.close_checkpointer())
+
+        self.assertIs(first, again)
+        self.assertIsNot(reopened, first)
+
+
+if __name__ == "__main__":
+    unittest.main()
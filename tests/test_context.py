@@ -0,0 +1,125 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from travel_assistant.backend.agents.nodes import aprocess_input, process_input
+from travel_assistant.backend.context import ExtractionContext, split_turns
+from travel_assistant.backend.metrics import metrics
+from travel_assistant.backend.prompts import CONVERSATION_SUMMARY_SYSTEM_PROMPT
+from travel_assistant.backend.schemas import InputSchema
+
+
+def conversation(turns):
+    messages = []
+    for i in range(turns):
+        messages.append(HumanMessage(content=f"request {i}: " + "more museums please " * 20, id=f"h{i}"))
+        messages.append(AIMessage(content=f"itinerary {i}: " + "day by day plan " * 200, id=f"a{i}"))
+    return messages
+
+
+class FakeLLM:
+    """Extraction returns fixed fields; summarization echoes what it was given."""
+
+    def __init__(self):
+        self.extraction_prompts = []
+        self.summary_calls = 0
+        self.invoke = MagicMock(side_effect=self._respond)
+        self.ainvoke = AsyncMock(side_effect=self._respond)
+
+    def _respond(self, messages, *args, **kwargs):
+        if messages[0].content == CONVERSATION_SUMMARY_SYSTEM_PROMPT:
+            self.summary_calls += 1
+            return AIMessage(content=f"- summary #{self.summary_calls}")
+        self.extraction_prompts.append(messages[1].content)
+        return InputSchema(destination="Kyoto")
+
+
+class TestExtractionContext(unittest.TestCase):
+    def setUp(self):
+        self.llm = FakeLLM()
+        p = patch("travel_assistant.backend.agents.nodes.get_llm", return_value=self.llm)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def _converse(self, turns, run=process_input):
+        """Simulate a conversation, feeding each turn's updates into the next."""
+        state = {"messages": [], "destination": None}
+        tokens = []
+        messages = conversation(turns)
+        for i in range(turns):
+            state["messages"] = messages[:2 * i + 1]
+            metrics.reset()
+            state.update({k: v for k, v in run(state).items() if k != "messages"})
+            tokens.append(metrics.snapshot()["observations"][0]["sum"])
+        return state, tokens
+
+    def test_split_turns(self):
+        turns = split_turns(conversation(2) + [HumanMessage(content="and?")])
+
+        self.assertEqual([len(turn) for turn in turns], [2, 2, 1])
+
+    def test_prompt_tokens_level_off(self):
+        _, tokens = self._converse(12)
+
+        self.assertEqual(max(tokens[6:]) - min(tokens[6:]), 0)
+        full_history = count_tokens_approximately(conversation(12))
+        self.assertLess(tokens[-1], full_history / 2)
+
+    def test_only_recent_turns_are_verbatim(self):
+        state, _ = self._converse(8)
+
+        prompt = self.llm.extraction_prompts[-1]
+        self.assertNotIn("request 3:", prompt)
+        self.assertIn("request 4:", prompt)
+        self.assertIn("request 7:", prompt)
+        self.assertIn("Earlier Conversation Summary:\n- summary #", prompt)
+        self.assertIn("Known Trip Details (from earlier turns):\n- Destination: Kyoto", prompt)
+        # One summary call per turn that left the window, never re-summarizing
+        self.assertEqual(self.llm.summary_calls, 8 - 3)
+        self.assertEqual(state["conversation_summary"]["turns"], 5)
+
+    def test_summary_failure_falls_back_to_user_messages(self):
+        state = {"messages": conversation(5)[:-1]}
+
+        def respond(messages, *args, **kwargs):
+            if messages[0].content == CONVERSATION_SUMMARY_SYSTEM_PROMPT:
+                raise TimeoutError("slow")
+            return InputSchema()
+
+        self.llm.invoke.side_effect = respond
+        updates = process_input(state)
+
+        summary = updates["conversation_summary"]
+        self.assertEqual(summary["turns"], 2)
+        self.assertTrue(summary["text"].startswith("- user: request 0:"))
+        self.assertNotIn("itinerary", summary["text"])
+
+    def test_async_variant_matches(self):
+        sync_state, _ = self._converse(6)
+        async_state, _ = self._converse(6, run=lambda state: asyncio.run(aprocess_input(state)))
+
+        self.assertEqual(sync_state["conversation_summary"]["turns"], async_state["conversation_summary"]["turns"])
+
+    def test_known_dates_are_kept_when_not_repeated(self):
+        state = {
+            "messages": [HumanMessage(content="add a tea ceremony")],
+            "travel_dates": {"start": "2025-04-01", "end": "2025-04-05"},
+        }
+
+        updates = process_input(state)
+
+        self.assertNotIn("travel_dates", updates)
+        self.assertIn("- Dates: 2025-04-01 to 2025-04-05", self.llm.extraction_prompts[-1])
+
+    def test_window_size(self):
+        context = ExtractionContext({"messages": conversation(5)}, recent_turns=2)
+
+        self.assertEqual(len(context.unsummarized), 5)
+        self.assertEqual(len(context.to_summarize), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import unittest
+
+from travel_assistant.backend.distance import (
+    clear_distance_cache,
+    estimate_minutes,
+    haversine_matrix,
+    plan_distances,
+    upgrade_legs,
+)
+from travel_assistant.backend.schemas import (
+    CoordinateSchema,
+    DailyItinerarySchema,
+    TripNodeSchema,
+    TripSchema,
+)
+
+
+def stop(name, lng, start=None, end=None, lat=30.25):
+    return TripNodeSchema(name=name, description=name, type="attraction", start_time=start, end_time=end,
+                          coordinates=CoordinateSchema(lat=lat, lng=lng) if lng is not None else None)
+
+
+def make_plan():
+    return TripSchema(destination="Hangzhou", itinerary=[
+        DailyItinerarySchema(day=1, summary="Lake", nodes=[
+            stop("Hotel", 120.00, end="09:00"),
+            stop("Pagoda", 120.01, start="09:10", end="10:00"),
+            stop("Lunch", None, start="12:00", end="13:00"),
+            stop("Museum", 120.05, start="13:30", end="15:00"),
+        ]),
+        DailyItinerarySchema(day=2, summary="Hills", nodes=[
+            stop("Tea Fields", 120.04),
+            stop("Museum", 120.05),
+        ]),
+    ])
+
+
+class FakeDistanceApi:
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    async def __call__(self, tool_name, tool_args):
+        self.calls.append(tool_args)
+        if self.fail:
+            return json.dumps({"error": "Request failed"})
+        origins = tool_args["origins"].split("|")
+        return json.dumps({"results": [
+            {"origin_id": str(i + 1), "dest_id": "1", "distance": "2500", "duration": "900"}
+            for i in range(len(origins))
+        ]})
+
+
+class TestDistanceMatrix(unittest.TestCase):
+    def setUp(self):
+        clear_distance_cache()
+
+    def test_haversine_matrix(self):
+        dist = haversine_matrix([0, 0, 1], [0, 1, 0])
+
+        self.assertAlmostEqual(dist[0, 1], 111.195, places=2)
+        self.assertAlmostEqual(dist[1, 0], dist[0, 1])
+        self.assertEqual(dist[2, 2], 0)
+
+    def test_speed_model_walks_short_hops(self):
+        minutes = estimate_minutes([0.9, 10.0])
+
+        self.assertAlmostEqual(minutes[0], 12.0)
+        self.assertAlmostEqual(minutes[1], 30.0)
+
+    def test_legs_skip_unlocated_stops_and_flag_tight_gaps(self):
+        distances = plan_distances(make_plan())
+
+        self.assertEqual(distances.km.shape, (5, 5))
+        legs = distances.legs[1]
+        self.assertEqual([(leg.from_index, leg.to_index) for leg in legs], [(0, 1), (1, 3)])
+        self.assertEqual([leg.mode for leg in legs], ["walking", "driving"])
+        self.assertEqual(legs[1].gap_minutes, 210)
+        # ~0.96 km of walking doesn't fit in a 10 minute gap
+        self.assertEqual(distances.tight_legs(), [legs[0]])
+        self.assertAlmostEqual(distances.between((1, 3), (2, 1)), 0.0)
+
+    def test_matrices_are_cached_per_revision(self):
+        plan = make_plan()
+        first = plan_distances(plan)
+
+        self.assertIs(plan_distances(make_plan()), first)
+        plan.itinerary[1].nodes.reverse()
+        self.assertIsNot(plan_distances(plan), first)
+
+    def test_upgrade_batches_legs_by_destination(self):
+        plan = make_plan()
+        # Both days end their last leg at the museum by car
+        plan.itinerary[1].nodes[0] = stop("Tea Fields", 120.03)
+        api = FakeDistanceApi()
+        distances = plan_distances(plan)
+
+        upgraded = asyncio.run(upgrade_legs(distances, call=api))
+
+        self.assertEqual(upgraded, 3)
+        self.assertEqual(len(api.calls), 2)
+        museum = next(call for call in api.calls if call["destination"].startswith("120.050000"))
+        self.assertEqual(len(museum["origins"].split("|")), 2)
+        self.assertEqual(museum["type"], "1")
+        self.assertTrue(all(leg.source == "amap" and leg.minutes == 15 for legs in distances.legs.values() for leg in legs))
+        # Shared with later callers of the same revision
+        self.assertEqual(plan_distances(plan).day_km(1), 5.0)
+
+    def test_upgraded_legs_are_reused_across_revisions(self):
+        plan = make_plan()
+        api = FakeDistanceApi()
+        asyncio.run(upgrade_legs(plan_distances(plan), call=api))
+        calls = len(api.calls)
+
+        plan.itinerary[0].summary = "Renamed"
+        plan.itinerary[0].nodes[1].start_time = "09:30"
+        asyncio.run(upgrade_legs(plan_distances(plan), call=api))
+
+        self.assertEqual(len(api.calls), calls)
+
+    def test_offline_keeps_speed_model(self):
+        distances = plan_distances(make_plan())
+
+        upgraded = asyncio.run(upgrade_legs(distances, call=FakeDistanceApi(fail=True)))
+
+        self.assertEqual(upgraded, 0)
+        self.assertTrue(all(leg.source == "estimate" for legs in distances.legs.values() for leg in legs))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from travel_assistant.backend.agents.nodes import (
+    arefine_itinerary,
+    attraction_search_agent,
+    hotel_info_agent,
+)
+from travel_assistant.backend.enrichment import enrichment_key, pending_nodes
+from travel_assistant.backend.metrics import metrics
+from travel_assistant.backend.schemas import (
+    CoordinateSchema,
+    DailyItinerarySchema,
+    PlanEditSchema,
+    PlanPatchSchema,
+    TripNodeSchema,
+    TripNodeUpdateSchema,
+    TripSchema,
+)
+
+
+def make_plan(sight="Louvre"):
+    return TripSchema(destination="Paris", itinerary=[DailyItinerarySchema(day=1, summary="Day 1", nodes=[
+        TripNodeSchema(name="Hotel Lutetia", description="Stay", type="hotel"),
+        TripNodeSchema(name=sight, description="Visit", type="attraction"),
+        TripNodeSchema(name="Le Procope", description="Dinner", type="restaurant"),
+    ])])
+
+
+def update(index, **fields):
+    return PlanEditSchema(op="update", day=1, index=index, updates=TripNodeUpdateSchema(**fields))
+
+
+class TestIncrementalEnrichment(unittest.TestCase):
+    def setUp(self):
+        self.refine_llm = MagicMock()
+        self.refine_llm.ainvoke = AsyncMock()
+        self.tool_agent = AsyncMock(return_value="details")
+        patches = [
+            patch("travel_assistant.backend.agents.nodes.get_llm", return_value=self.refine_llm),
+            patch("travel_assistant.backend.agents.nodes.run_simple_tool_agent", new=self.tool_agent),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def _refine(self, state):
+        return asyncio.run(arefine_itinerary({"destination": "Paris", "attractions_info": "info", **state}))
+
+    def _first_turn(self):
+        self.refine_llm.ainvoke.return_value = PlanPatchSchema(edits=[
+            # Coordinates and times from the LLM are ignored; geocoding owns them
+            update(0, cost="300 EUR", start_time="07:00", coordinates=CoordinateSchema(lat=1, lng=1)),
+            update(1, cost="22 EUR"),
+            update(2, description="Historic cafe"),
+        ])
+        geocodes = {enrichment_key("Paris", "Hotel Lutetia"): {"lat": 48.85, "lng": 2.33, "address": None}}
+        return self._refine({"trip_plan": make_plan(), "geocodes": geocodes})
+
+    def test_first_turn_enriches_every_node(self):
+        result = self._first_turn()
+
+        nodes = result["trip_plan"].itinerary[0].nodes
+        self.assertEqual(nodes[1].cost, "22 EUR")
+        self.assertEqual(nodes[0].start_time, None)
+        self.assertEqual((nodes[0].coordinates.lat, nodes[0].coordinates.lng), (48.85, 2.33))
+        self.assertEqual(len(result["enrichment"]), 3)
+        self.assertEqual(result["enrichment"][enrichment_key("Paris", "Louvre")]["cost"], "22 EUR")
+
+    def test_renamed_node_is_the_only_lookup_and_refine_target(self):
+        enrichment = self._first_turn()["enrichment"]
+        state = {"destination": "Paris", "trip_plan": make_plan(sight="Musée d'Orsay"), "enrichment": enrichment}
+
+        attractions = asyncio.run(attraction_search_agent(state))
+        hotels = asyncio.run(hotel_info_agent(state))
+
+        self.assertEqual(self.tool_agent.await_count, 1)
+        self.assertIn("Musée d'Orsay", self.tool_agent.await_args.args[0])
+        self.assertNotIn("Louvre", self.tool_agent.await_args.args[0])
+        self.assertIsNone(hotels["hotel_info"])
+
+        self.refine_llm.ainvoke.reset_mock()
+        self.refine_llm.ainvoke.return_value = PlanPatchSchema(edits=[
+            update(1, cost="16 EUR"),
+            # Edits to already enriched nodes are ignored
+            update(0, cost="1 EUR"),
+        ])
+        result = self._refine({**state, **attractions})
+
+        prompt = self.refine_llm.ainvoke.await_args.args[0][1].content
+        self.assertIn("Musée d'Orsay", prompt)
+        self.assertNotIn("Hotel Lutetia", prompt)
+        nodes = result["trip_plan"].itinerary[0].nodes
+        self.assertEqual(nodes[0].cost, "300 EUR")
+        self.assertEqual(nodes[0].coordinates.lat, 48.85)
+        self.assertEqual(nodes[1].cost, "16 EUR")
+        self.assertEqual(len(result["enrichment"]), 4)
+
+    def test_empty_diff_skips_refine_and_restores_details(self):
+        enrichment = self._first_turn()["enrichment"]
+        self.refine_llm.ainvoke.reset_mock()
+
+        # A regenerated plan with the same stops but without costs
+        result = self._refine({"trip_plan": make_plan(), "enrichment": enrichment})
+
+        self.refine_llm.ainvoke.assert_not_called()
+        nodes = result["trip_plan"].itinerary[0].nodes
+        self.assertEqual([n.cost for n in nodes], ["300 EUR", "22 EUR", None])
+        self.assertEqual(nodes[0].coordinates.lng, 2.33)
+
+    def test_sights_past_the_lookup_limit_stay_pending(self):
+        sights = [f"Sight {i}" for i in range(7)]
+        plan = TripSchema(destination="Paris", itinerary=[DailyItinerarySchema(day=1, summary="Day 1", nodes=[
+            *[TripNodeSchema(name=name, description="Visit", type="attraction") for name in sights],
+            TripNodeSchema(name="Le Procope", description="Dinner", type="restaurant"),
+        ])])
+        state = {"destination": "Paris", "trip_plan": plan}
+        attractions = asyncio.run(attraction_search_agent(state))
+        self.assertNotIn("Sight 5", self.tool_agent.await_args.args[0])
+
+        self.refine_llm.ainvoke.return_value = PlanPatchSchema(edits=[update(0, cost="9 EUR")])
+        result = self._refine({**state, **attractions})
+
+        recorded = set(result["enrichment"])
+        self.assertEqual(recorded, {enrichment_key("Paris", name) for name in sights[:5] + ["Le Procope"]})
+        # The sights past the lookup limit are looked up and refined next turn
+        next_turn = {**state, "enrichment": result["enrichment"]}
+        asyncio.run(attraction_search_agent(next_turn))
+        self.assertIn("Sight 5", self.tool_agent.await_args.args[0])
+        self.assertEqual([node.name for _, _, node in pending_nodes(plan, "Paris", result["enrichment"])],
+                         ["Sight 5", "Sight 6"])
+
+    def test_unchanged_second_turn_makes_no_refine_call(self):
+        plan = TripSchema(destination="Hangzhou", itinerary=[DailyItinerarySchema(day=1, summary="Day 1", nodes=[
+            TripNodeSchema(name="West Lake", description="Walk", type="attraction"),
+            TripNodeSchema(name="Lou Wai Lou", description="Lunch", type="restaurant"),
+            TripNodeSchema(name="Taxi to hotel", description="Ride", type="transport"),
+        ])])
+        self.refine_llm.ainvoke.return_value = PlanPatchSchema(edits=[update(0, cost="Free")])
+        # Search results stay in the state across turns
+        state = {"destination": "Hangzhou", "trip_plan": plan, "weather_info": "Sunny"}
+
+        skipped = metrics.counter("refine_total", result="skipped")
+        first = self._refine(state)
+        second = self._refine({**state, **first})
+
+        self.assertEqual(self.refine_llm.ainvoke.await_count, 1)
+        self.assertEqual(len(first["enrichment"]), 3)
+        self.assertEqual(second, {})
+        self.assertEqual(metrics.counter("refine_total", result="skipped"), skipped + 1)
+
+    def test_replace_only_sets_costs_and_descriptions(self):
+        self.refine_llm.ainvoke.return_value = PlanPatchSchema(edits=[
+            PlanEditSchema(op="replace", day=1, index=1, node=TripNodeSchema(
+                name="Somewhere Indoors", description="Museum instead", cost="15 EUR", type="attraction",
+                start_time="06:00", coordinates=CoordinateSchema(lat=1, lng=1))),
+        ])
+        geocodes = {enrichment_key("Paris", "Louvre"): {"lat": 48.86, "lng": 2.34, "address": None}}
+        result = self._refine({"trip_plan": make_plan(), "geocodes": geocodes})
+
+        sight = result["trip_plan"].itinerary[0].nodes[1]
+        self.assertEqual((sight.name, sight.description, sight.cost), ("Louvre", "Museum instead", "15 EUR"))
+        self.assertIsNone(sight.start_time)
+        self.assertEqual(sight.coordinates.lat, 48.86)
+
+    def test_names_are_normalized(self):
+        enrichment = {enrichment_key("paris ", "The  Louvre!"): {"cost": "22 EUR"}}
+        plan = make_plan(sight="the louvre")
+
+        self.assertEqual([node.name for _, _, node in pending_nodes(plan, "Paris", enrichment)],
+                         ["Hotel Lutetia", "Le Procope"])
+
+
+if __name__ == "__main__":
+    unittest.main()
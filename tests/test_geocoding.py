@@ -0,0 +1,58 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from tests.fakes import FakeAmap
+from travel_assistant.backend.agents.nodes import geocode_itinerary
+from travel_assistant.backend.enrichment import enrichment_key
+from travel_assistant.backend.schemas import (
+    CoordinateSchema,
+    DailyItinerarySchema,
+    TripNodeSchema,
+    TripSchema,
+)
+from travel_assistant.backend.tools.geocoding import geocode_places
+
+
+class TestGeocoding(unittest.TestCase):
+    def setUp(self):
+        store = patch("travel_assistant.backend.tools.geocoding.get_poi_store", return_value=None)
+        store.start()
+        self.addCleanup(store.stop)
+
+    def test_batch_dedupes_and_falls_back_to_poi_search(self):
+        amap = FakeAmap()
+        names = ["West Lake", "west lake", "Lingyin Temple", "Nowhere Cafe"]
+
+        results = asyncio.run(geocode_places(names, city="Hangzhou", concurrency=2, call=amap))
+
+        self.assertEqual((results["West Lake"].lat, results["West Lake"].lng), (30.25, 120.14))
+        self.assertEqual(results["west lake"], results["West Lake"])
+        self.assertEqual(results["Lingyin Temple"].address, "1 Fayun Lane")
+        self.assertEqual(results["Lingyin Temple"].lng, 120.10)
+        self.assertIsNone(results["Nowhere Cafe"])
+        self.assertEqual(sum(1 for tool, args in amap.calls if tool == "maps_geo"), 3)
+        self.assertLessEqual(amap.max_in_flight, 2)
+
+    def test_node_only_geocodes_unlocated_places(self):
+        plan = TripSchema(destination="Hangzhou", itinerary=[DailyItinerarySchema(day=1, summary="Lake", nodes=[
+            TripNodeSchema(name="West Lake", description="Walk", type="attraction"),
+            TripNodeSchema(name="Lingyin Temple", description="Temple", type="attraction"),
+            TripNodeSchema(name="Hotel", description="Stay", type="hotel",
+                           coordinates=CoordinateSchema(lat=30.2, lng=120.1)),
+            TripNodeSchema(name="Train to Shanghai", description="Leave", type="transport"),
+        ])])
+        enrichment = {enrichment_key("Hangzhou", "Lingyin Temple"): {"coordinates": {"lat": 30.24, "lng": 120.1}}}
+        amap = FakeAmap()
+
+        with patch("travel_assistant.backend.tools.call_amap", new=amap):
+            result = asyncio.run(geocode_itinerary({"destination": "Hangzhou", "trip_plan": plan, "enrichment": enrichment}))
+
+        self.assertEqual([args["address"] for tool, args in amap.calls], ["West Lake"])
+        self.assertEqual(result["geocodes"], {
+            enrichment_key("Hangzhou", "West Lake"): {"lat": 30.25, "lng": 120.14, "address": None},
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+
+import asyncio
+import json
+import os
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from travel_assistant.backend.config import clear_llm_cache, get_llm, get_llm_stats
+from travel_assistant.backend.metrics import metrics
+from travel_assistant.backend.schemas import InputSchema
+
+
+class FakeCompletionsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "fake-model",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "hello"},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestLLMClientRegistry(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeCompletionsHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.env = patch.dict(os.environ, {
+            "OPENAI_API_KEY": "sk-test",
+            "OPENAI_API_BASE": f"http://127.0.0.1:{self.server.server_port}/v1",
+        })
+        self.env.start()
+        clear_llm_cache()
+        metrics.reset()
+
+    def tearDown(self):
+        self.env.stop()
+        clear_llm_cache()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_clients_are_memoized_per_schema(self):
+        plain = get_llm(model_name="fake-model")
+        structured = get_llm(structured_output=InputSchema, model_name="fake-model")
+
+        self.assertIs(get_llm(model_name="fake-model"), plain)
+        self.assertIs(get_llm(structured_output=InputSchema, model_name="fake-model"), structured)
+        self.assertIsNot(plain, structured)
+
+        stats = get_llm_stats()
+        self.assertEqual(stats["client_cache_hits"], 2)
+        self.assertEqual(stats["client_cache_misses"], 2)
+
+        clear_llm_cache()
+        self.assertIsNot(get_llm(model_name="fake-model"), plain)
+
+    def test_requests_reuse_keepalive_connections(self):
+        for _ in range(3):
+            self.assertEqual(get_llm(model_name="fake-model").invoke("hi").content, "hello")
+
+        async def run_async():
+            for _ in range(3):
+                await get_llm(model_name="fake-model").ainvoke("hi")
+
+        asyncio.run(run_async())
+
+        stats = get_llm_stats()
+        self.assertEqual(stats["http_requests"], 6)
+        # One connection for the sync pool and one for the event loop's pool
+        self.assertEqual(stats["connections_opened"], 2)
+        self.assertEqual(stats["connections_reused"], 4)
+
+    def test_calls_are_recorded_in_metrics(self):
+        get_llm(model_name="fake-model").invoke("hi")
+
+        snapshot = metrics.snapshot()
+        seconds = [o for o in snapshot["observations"] if o["name"] == "llm_call_seconds"]
+        self.assertEqual([o["count"] for o in seconds], [1])
+        self.assertEqual(seconds[0]["labels"]["model"], "fake-model")
+        tokens = {c["name"]: c["value"] for c in snapshot["counters"] if c["name"].endswith("_tokens_total")}
+        self.assertEqual(tokens, {"llm_prompt_tokens_total": 1, "llm_completion_tokens_total": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from travel_assistant.backend import config
+from travel_assistant.backend.memory import llm_cache
+from travel_assistant.backend.memory.cache import LRUTTLCache, SqliteCacheStore
+from travel_assistant.backend.memory.llm_cache import LLMResponseCache
+from travel_assistant.backend.schemas import InputSchema
+
+
+class ExtractionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests_served = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        type(self).requests_served += 1
+        # ChatOpenAI.with_structured_output defaults to json_schema mode
+        arguments = json.dumps({"destination": "Tokyo", "interests": ["food"]})
+        body = json.dumps({
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "fake-model",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": arguments},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestLLMResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ExtractionHandler)
+        ExtractionHandler.requests_served = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.env = patch.dict(os.environ, {
+            "OPENAI_API_KEY": "sk-test",
+            "OPENAI_API_BASE": f"http://127.0.0.1:{self.server.server_port}/v1",
+            "LLM_CACHE_ENABLED": "true",
+        })
+        self.env.start()
+        self.cache_path = os.path.join(self.tmpdir.name, "llm_cache.sqlite")
+        llm_cache._response_cache = LLMResponseCache(path=self.cache_path)
+        config.clear_llm_cache()
+
+    def tearDown(self):
+        llm_cache._response_cache.disk.close()
+        llm_cache._response_cache = None
+        self.env.stop()
+        config.clear_llm_cache()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmpdir.cleanup()
+
+    def _extract(self):
+        llm = config.get_llm(structured_output=InputSchema, model_name="fake-model", cache_namespace="process_input")
+        return llm.invoke("Plan a 3-day trip to Tokyo")
+
+    def test_structured_output_served_from_memory_and_disk(self):
+        first = self._extract()
+        second = self._extract()
+
+        self.assertEqual(ExtractionHandler.requests_served, 1)
+        self.assertIsInstance(second, InputSchema)
+        self.assertEqual(second, first)
+
+        # A fresh process only has the disk tier
+        llm_cache._response_cache.disk.close()
+        llm_cache._response_cache = LLMResponseCache(path=self.cache_path)
+        config.clear_llm_cache()
+        third = self._extract()
+
+        self.assertEqual(ExtractionHandler.requests_served, 1)
+        self.assertIsInstance(third, InputSchema)
+        self.assertEqual(third.destination, "Tokyo")
+        stats = llm_cache._response_cache.stats()["namespaces"]["process_input"]
+        self.assertGreaterEqual(stats["disk_hit"], 1)
+
+    def test_cached_results_are_not_shared(self):
+        first = self._extract()
+        first.destination = "Osaka"
+        first.interests.append("temples")
+        second = self._extract()
+        second.interests.clear()
+        third = self._extract()
+
+        self.assertEqual(ExtractionHandler.requests_served, 1)
+        self.assertEqual(second.destination, "Tokyo")
+        self.assertEqual(third.destination, "Tokyo")
+        self.assertEqual(third.interests, ["food"])
+
+    def test_namespace_ttl_expiry(self):
+        with patch.dict(os.environ, {"LLM_CACHE_TTL_PROCESS_INPUT": "0.2"}):
+            config.clear_llm_cache()
+            self._extract()
+            time.sleep(0.3)
+            self._extract()
+
+        self.assertEqual(ExtractionHandler.requests_served, 2)
+
+
+class TestCacheTiers(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = LRUTTLCache(max_entries=2)
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        cache.get("a")
+        cache.set("c", 3, ttl=60)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.evictions, 1)
+
+    def test_sqlite_size_cap(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = SqliteCacheStore(os.path.join(tmpdir, "cache.sqlite"), max_entries=3)
+            for i in range(5):
+                store.set("ns", f"k{i}", b"v", ttl=60)
+            self.assertEqual(store.count("ns"), 3)
+            self.assertIsNone(store.get("ns", "k0"))
+            self.assertEqual(store.get("ns", "k4")[0], b"v")
+            store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+
+import asyncio
+import os
+import sys
+import tempfile
+import textwrap
+import time
+import unittest
+
+from travel_assistant.backend.mcp_client import MCPClientManager, MCPSessionPool
+from travel_assistant.backend.metrics import metrics
+
+ECHO_SERVER = textwrap.dedent('''
+    import os
+    from mcp.server.fastmcp import FastMCP
+
+    mcp = FastMCP("echo")
+
+    @mcp.tool()
+    def echo(text: str) -> str:
+        return f"{os.getpid()}:{text}"
+
+    @mcp.tool()
+    def crash() -> str:
+        os._exit(1)
+
+    if __name__ == "__main__":
+        mcp.run()
+''')
+
+
+class TestMCPSessionPool(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.server_path = os.path.join(self.tmpdir.name, "echo_server.py")
+        with open(self.server_path, "w") as f:
+            f.write(ECHO_SERVER)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _manager(self, **kwargs):
+        return MCPClientManager(
+            command=sys.executable,
+            args=[self.server_path],
+            server_name="echo_server",
+            **kwargs,
+        )
+
+    def test_pooled_calls_reuse_warm_processes(self):
+        manager = self._manager(pool_size=2, call_timeout=10)
+
+        async def run():
+            ready = await manager.start(timeout=20)
+            outputs = await asyncio.gather(
+                *[manager.execute_tool("echo", {"text": str(i)}) for i in range(6)]
+            )
+            stats = manager.pool_stats()
+            await manager.close()
+            return ready, outputs, stats
+
+        ready, outputs, stats = asyncio.run(run())
+
+        self.assertEqual(ready, 2)
+        self.assertEqual([o.split(":")[1] for o in outputs], [str(i) for i in range(6)])
+        # Six calls were multiplexed over the two warm processes
+        self.assertEqual(len({o.split(":")[0] for o in outputs}), 2)
+        self.assertEqual(stats["spawns"], 2)
+
+    def test_crashed_session_is_respawned(self):
+        manager = self._manager(pool_size=1, call_timeout=5, health_interval=0.2)
+
+        async def run():
+            await manager.start(timeout=20)
+            first = await manager.execute_tool("echo", {"text": "a"})
+            crashed = await manager.execute_tool("crash", {})
+            await asyncio.sleep(0.5)
+            await manager.start(timeout=20)
+            second = await manager.execute_tool("echo", {"text": "b"})
+            stats = manager.pool_stats()
+            await manager.close()
+            return first, crashed, second, stats
+
+        first, crashed, second, stats = asyncio.run(run())
+
+        self.assertTrue(crashed.startswith("Error"))
+        self.assertTrue(second.endswith(":b"))
+        self.assertNotEqual(first.split(":")[0], second.split(":")[0])
+        self.assertEqual(stats["spawns"], 2)
+
+    def test_tool_calls_are_recorded(self):
+        metrics.reset()
+        manager = self._manager(pool_size=1, call_timeout=5, health_interval=0.2)
+
+        async def run():
+            try:
+                await manager.execute_tool("echo", {"text": "hello"})
+                await manager.execute_tool("crash", {})
+            finally:
+                await manager.close()
+
+        asyncio.run(run())
+        counters = {c["labels"]["tool"] + ":" + c["labels"]["result"]: c["value"]
+                    for c in metrics.snapshot()["counters"] if c["name"] == "mcp_tool_calls_total"}
+        payload = {o["labels"]["tool"]: o for o in metrics.snapshot()["observations"]
+                   if o["name"] == "mcp_tool_payload_bytes"}
+
+        self.assertEqual(counters, {"echo:ok": 1, "crash:error": 1})
+        self.assertGreater(payload["echo"]["sum"], len("hello"))
+
+    def test_server_that_cannot_start_fails_fast(self):
+        manager = MCPClientManager(
+            command=os.path.join(self.tmpdir.name, "missing-server"),
+            args=[],
+            server_name="missing",
+            pool_size=2,
+            call_timeout=30,
+        )
+
+        async def run():
+            started = time.perf_counter()
+            ready = await manager.start(timeout=30)
+            outputs = [await manager.execute_tool("echo", {"text": "a"}) for _ in range(2)]
+            elapsed = time.perf_counter() - started
+            await manager.close()
+            return ready, outputs, elapsed
+
+        ready, outputs, elapsed = asyncio.run(run())
+
+        self.assertEqual(ready, 0)
+        self.assertTrue(all(o.startswith("Error calling missing tool echo") for o in outputs))
+        self.assertIn("failed to start", outputs[0])
+        self.assertLess(elapsed, 5)
+
+    def test_supervisor_gives_up_after_repeated_failed_starts(self):
+        attempts = []
+
+        def params():
+            attempts.append(1)
+            return self._manager()._server_params().model_copy(
+                update={"command": os.path.join(self.tmpdir.name, "missing-server")}
+            )
+
+        async def run():
+            pool = MCPSessionPool(params, size=1, server_name="missing", respawn_backoff=0.01,
+                                  max_spawn_failures=3)
+            await asyncio.wait_for(pool.slots[0].task, timeout=5)
+            stats = pool.stats()
+            with self.assertRaises(ConnectionError):
+                await pool.call_tool("echo", {"text": "a"})
+            await pool.close()
+            return stats
+
+        stats = asyncio.run(run())
+
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(stats["spawn_failures"], 3)
+        self.assertTrue(stats["failed"])
+
+    def test_unpooled_mode_spawns_per_call(self):
+        manager = self._manager(pool_size=0)
+
+        output = asyncio.run(manager.execute_tool("echo", {"text": "x"}))
+
+        self.assertTrue(output.endswith(":x"))
+        self.assertEqual(manager.pool_stats(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
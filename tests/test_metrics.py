@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+import urllib.request
+
+from travel_assistant.backend.metrics import MetricsRegistry, serve_prometheus, write_prometheus
+
+
+class TestPrometheusExport(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.registry.incr("mcp_tool_calls_total", tool="maps_geo", result="ok")
+        self.registry.incr("mcp_tool_calls_total", tool='say "hi"', result="ok")
+        for seconds in (0.02, 0.3, 4.0):
+            self.registry.observe("llm_call_seconds", seconds, model="gpt-4o")
+        self.registry.observe("plan_patch_ratio", 0.5)
+
+    def test_text_format(self):
+        text = self.registry.to_prometheus()
+        lines = text.splitlines()
+
+        self.assertIn("# TYPE travel_mcp_tool_calls_total counter", lines)
+        self.assertIn('travel_mcp_tool_calls_total{result="ok",tool="say \\"hi\\""} 1', lines)
+        # Observations ending in _seconds are cumulative histograms
+        self.assertIn("# TYPE travel_llm_call_seconds histogram", lines)
+        self.assertIn('travel_llm_call_seconds_bucket{model="gpt-4o",le="0.025"} 1', lines)
+        self.assertIn('travel_llm_call_seconds_bucket{model="gpt-4o",le="0.5"} 2', lines)
+        self.assertIn('travel_llm_call_seconds_bucket{model="gpt-4o",le="+Inf"} 3', lines)
+        self.assertIn('travel_llm_call_seconds_count{model="gpt-4o"} 3', lines)
+        # Anything else is a summary
+        self.assertIn("# TYPE travel_plan_patch_ratio summary", lines)
+        self.assertIn('travel_plan_patch_ratio{quantile="0.5"} 0.5', lines)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_file_and_http_export(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "travel.prom")
+            write_prometheus(path, self.registry)
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), self.registry.to_prometheus())
+            self.assertEqual(os.listdir(tmp), ["travel.prom"])
+
+        server = serve_prometheus(0, registry=self.registry)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url) as response:
+                self.assertIn("text/plain", response.headers["Content-Type"])
+                self.assertEqual(response.read().decode("utf-8"), self.registry.to_prometheus())
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from langchain_core.messages import HumanMessage
+
+from tests.fakes import fake_llm_response
+from travel_assistant.backend.graph import create_builder
+from travel_assistant.backend.prompts import PLANNER_SYSTEM_PROMPT
+from travel_assistant.backend.tracing import NodeTimer
+
+TOOL_LATENCY = 0.2
+
+
+class TestParallelGraph(unittest.TestCase):
+    def _run(self, speculative):
+        prompts = []
+
+        async def fake_llm(msgs, *args, **kwargs):
+            prompts.append(msgs)
+            await asyncio.sleep(0.05)
+            return fake_llm_response(msgs)
+
+        started = []
+        overlapping = asyncio.Event()
+
+        async def fake_tool_agent(prompt, *args, **kwargs):
+            # Wait for a second lookup to start, so lookups that run in
+            # parallel overlap however slow the machine is; lone ones time out
+            started.append(prompt)
+            if len(started) == 2:
+                overlapping.set()
+            try:
+                await asyncio.wait_for(overlapping.wait(), TOOL_LATENCY)
+            except asyncio.TimeoutError:
+                pass
+            return f"info for: {prompt}"
+
+        mock_llm = MagicMock()
+        mock_llm.ainvoke = AsyncMock(side_effect=fake_llm)
+        timer = NodeTimer()
+        graph = create_builder(speculative=speculative).compile()
+
+        with (
+            patch(
+                "travel_assistant.backend.agents.nodes.get_llm", return_value=mock_llm
+            ),
+            patch(
+                "travel_assistant.backend.agents.nodes.run_simple_tool_agent",
+                new=fake_tool_agent,
+            ),
+            patch(
+                "travel_assistant.backend.agents.nodes.geocode_places",
+                new=AsyncMock(return_value={}),
+            ),
+        ):
+            result = asyncio.run(
+                graph.ainvoke(
+                    {"messages": [HumanMessage(content="Paris please")]},
+                    config={"callbacks": [timer]},
+                )
+            )
+        return result, timer, prompts
+
+    def _span(self, timer, node):
+        return next(span for span in timer.spans if span.node == node)
+
+    def test_weather_and_discovery_run_in_parallel(self):
+        result, timer, prompts = self._run(speculative=False)
+
+        weather = self._span(timer, "weather_query_agent")
+        discovery = self._span(timer, "attraction_discovery_agent")
+        plan = self._span(timer, "plan_itinerary")
+
+        self.assertLess(
+            max(weather.start, discovery.start), min(weather.end, discovery.end)
+        )
+        self.assertGreaterEqual(plan.start, max(weather.end, discovery.end))
+        planner_prompt = next(
+            p[1].content for p in prompts if p[0].content == PLANNER_SYSTEM_PROMPT
+        )
+        self.assertIn("Top Attractions: info for: Find top attractions", planner_prompt)
+        self.assertIn("Weather Forecast:", planner_prompt)
+        self.assertEqual(result["messages"][-1].content, "Enjoy Paris!")
+
+    def test_speculative_planning_folds_weather_into_refine(self):
+        result, timer, prompts = self._run(speculative=True)
+
+        weather = self._span(timer, "weather_query_agent")
+        plan = self._span(timer, "plan_itinerary")
+
+        self.assertLess(plan.start, weather.end)
+        self.assertEqual([s.node for s in timer.spans].count("refine_itinerary"), 1)
+        refine_prompt = next(
+            p[1].content for p in prompts if "travel assistant editor" in p[0].content
+        )
+        self.assertIn("Weather Info: info for: Check the weather", refine_prompt)
+        self.assertNotIn("attraction_discovery_agent", [s.node for s in timer.spans])
+        self.assertEqual(result["trip_plan"].itinerary[0].nodes[0].cost, "22 EUR")
+
+    def test_critical_path_shorter_than_serial_chain(self):
+        _, timer, _ = self._run(speculative=False)
+        report = timer.report()
+
+        self.assertEqual(report["critical_path"][0], "process_input")
+        self.assertEqual(report["critical_path"][-1], "generate_response")
+        # Only one of the two pre-plan lookups sits on the critical path
+        self.assertEqual(
+            len(
+                {"weather_query_agent", "attraction_discovery_agent"}
+                & set(report["critical_path"])
+            ),
+            1,
+        )
+        self.assertLess(report["critical_path_seconds"], sum(report["nodes"].values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
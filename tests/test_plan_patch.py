@@ -0,0 +1,144 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from langchain_core.messages import HumanMessage
+
+from travel_assistant.backend.agents.nodes import aplan_itinerary
+from travel_assistant.backend.plan_patch import PlanPatchError, apply_plan_patch
+from travel_assistant.backend.prompts import get_plan_patch_user_prompt
+from travel_assistant.backend.schemas import (
+    CoordinateSchema,
+    DailyItinerarySchema,
+    PlanEditSchema,
+    PlanPatchSchema,
+    TripNodeSchema,
+    TripNodeUpdateSchema,
+    TripSchema,
+)
+
+
+def make_plan():
+    return TripSchema(destination="Rome", itinerary=[
+        DailyItinerarySchema(day=n, summary=f"Day {n}", nodes=[
+            TripNodeSchema(name=f"Breakfast {n}", description="Cafe", start_time="08:00", type="restaurant"),
+            TripNodeSchema(name=f"Sight {n}", description="Walk", start_time="10:00", type="attraction"),
+            TripNodeSchema(name=f"Lunch {n}", description="Trattoria", start_time="13:00", type="restaurant"),
+        ])
+        for n in (1, 2, 3)
+    ])
+
+
+def node(name):
+    return TripNodeSchema(name=name, description="New", type="restaurant")
+
+
+class TestApplyPlanPatch(unittest.TestCase):
+    def test_ops_applied_in_order(self):
+        plan = make_plan()
+        patched = apply_plan_patch(plan, PlanPatchSchema(edits=[
+            PlanEditSchema(op="replace", day=2, index=2, node=node("Pizzeria")),
+            PlanEditSchema(op="remove", day=1, index=0),
+            PlanEditSchema(op="add", day=1, index=0, node=node("Brunch")),
+            PlanEditSchema(op="add", day=3, node=node("Gelato")),
+            PlanEditSchema(op="update", day=3, index=1, updates=TripNodeUpdateSchema(start_time="11:00", cost="20 EUR")),
+        ]))
+
+        self.assertEqual(patched.itinerary[1].nodes[2].name, "Pizzeria")
+        self.assertEqual([n.name for n in patched.itinerary[0].nodes], ["Brunch", "Sight 1", "Lunch 1"])
+        self.assertEqual(patched.itinerary[2].nodes[-1].name, "Gelato")
+        self.assertEqual(patched.itinerary[2].nodes[1].start_time, "11:00")
+        self.assertEqual(patched.itinerary[2].nodes[1].name, "Sight 3")
+        # The original plan is untouched
+        self.assertEqual(plan.itinerary[1].nodes[2].name, "Lunch 2")
+
+    def test_invalid_edits_rejected(self):
+        plan = make_plan()
+        invalid = [
+            PlanEditSchema(op="remove", day=4, index=0),
+            PlanEditSchema(op="remove", day=1, index=3),
+            PlanEditSchema(op="replace", day=1, index=0),
+            PlanEditSchema(op="update", day=1, index=0, updates=TripNodeUpdateSchema()),
+            PlanEditSchema(op="add", day=1, index=5, node=node("Late")),
+        ]
+        for edit in invalid:
+            with self.subTest(edit=edit):
+                with self.assertRaises(PlanPatchError):
+                    apply_plan_patch(plan, PlanPatchSchema(edits=[edit]))
+        with self.assertRaises(PlanPatchError):
+            apply_plan_patch(plan, PlanPatchSchema(edits=[]))
+
+    def test_prompt_outline_has_indices(self):
+        prompt = get_plan_patch_user_prompt(make_plan(), "Swap lunch on day 2")
+
+        self.assertIn("Day 2: Day 2\n  [0] 08:00 restaurant: Breakfast 2", prompt)
+        self.assertIn("[2] 13:00 restaurant: Lunch 2", prompt)
+
+
+class TestPatchModificationNode(unittest.TestCase):
+    def _run(self, patch_result):
+        patch_llm = MagicMock()
+        patch_llm.ainvoke = AsyncMock(return_value=patch_result)
+        full_llm = MagicMock()
+        full_llm.ainvoke = AsyncMock(return_value=TripSchema(destination="Rome (regenerated)"))
+
+        def fake_get_llm(structured_output=None, **kwargs):
+            return patch_llm if structured_output is PlanPatchSchema else full_llm
+
+        state = {
+            "messages": [HumanMessage(content="Swap lunch on day 2 for pizza")],
+            "destination": "Rome",
+            "trip_plan": make_plan(),
+            "user_feedback": "Swap lunch on day 2 for pizza",
+        }
+        with patch("travel_assistant.backend.agents.nodes.get_llm", side_effect=fake_get_llm):
+            result = asyncio.run(aplan_itinerary(state))
+        return result, full_llm
+
+    def test_valid_patch_skips_regeneration(self):
+        result, full_llm = self._run(PlanPatchSchema(edits=[
+            PlanEditSchema(op="replace", day=2, index=2, node=node("Pizzeria")),
+        ]))
+
+        full_llm.ainvoke.assert_not_called()
+        self.assertEqual(result["trip_plan"].itinerary[1].nodes[2].name, "Pizzeria")
+        self.assertIsNone(result["user_feedback"])
+
+    def test_invalid_patch_falls_back_to_full_plan(self):
+        result, full_llm = self._run(PlanPatchSchema(edits=[
+            PlanEditSchema(op="replace", day=9, index=0, node=node("Pizzeria")),
+        ]))
+
+        full_llm.ainvoke.assert_called_once()
+        self.assertEqual(result["trip_plan"].destination, "Rome (regenerated)")
+
+    def test_model_coordinates_are_dropped(self):
+        llm_node = node("Pizzeria").model_copy(update={"coordinates": CoordinateSchema(lat=1, lng=1)})
+        result, _ = self._run(PlanPatchSchema(edits=[
+            PlanEditSchema(op="replace", day=2, index=2, node=llm_node),
+            PlanEditSchema(op="update", day=1, index=1,
+                           updates=TripNodeUpdateSchema(cost="5 EUR", coordinates=CoordinateSchema(lat=2, lng=2))),
+        ]))
+
+        days = result["trip_plan"].itinerary
+        self.assertIsNone(days[1].nodes[2].coordinates)
+        self.assertEqual(days[0].nodes[1].cost, "5 EUR")
+        self.assertIsNone(days[0].nodes[1].coordinates)
+
+    def test_renamed_node_loses_its_coordinates(self):
+        plan = make_plan()
+        plan.itinerary[0].nodes[1].coordinates = CoordinateSchema(lat=41.9, lng=12.5)
+        patched = apply_plan_patch(plan, PlanPatchSchema(edits=[
+            PlanEditSchema(op="update", day=1, index=1, updates=TripNodeUpdateSchema(name="Pantheon")),
+        ]))
+
+        self.assertIsNone(patched.itinerary[0].nodes[1].coordinates)
+        self.assertEqual(plan.itinerary[0].nodes[1].coordinates.lat, 41.9)
+
+    def test_llm_schemas_have_no_coordinates(self):
+        self.assertNotIn("coordinates", TripNodeSchema.model_json_schema()["properties"])
+        self.assertNotIn("coordinates", TripNodeUpdateSchema.model_json_schema()["properties"])
+
+
+if __name__ == "__main__":
+    unittest.main()
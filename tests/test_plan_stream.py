@@ -0,0 +1,118 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import END, START, StateGraph
+
+from travel_assistant.backend.agents.nodes import aplan_itinerary
+from travel_assistant.backend.plan_stream import IncrementalTripParser
+from travel_assistant.backend.schemas import TripSchema
+from travel_assistant.backend.state import TravelState
+
+
+def plan_json(days=3):
+    return json.dumps({
+        "destination": "Kyoto",
+        "budget": "3000",
+        "itinerary": [
+            {
+                "day": n,
+                "summary": f"Day {n} in Kyoto",
+                "nodes": [{"name": f"Temple {n}", "description": "Visit {temples}", "start_time": "09:00"}],
+            }
+            for n in range(1, days + 1)
+        ],
+        "notes": [{"category": "weather", "content": "Bring an umbrella"}],
+    }, indent=1)
+
+
+def fake_planner(text):
+    """A streaming chat model piped into the same parse step as structured output."""
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content=text)]))
+    return llm | RunnableLambda(lambda msg: TripSchema.model_validate_json(msg.content))
+
+
+class TestIncrementalTripParser(unittest.TestCase):
+    def test_days_emitted_as_soon_as_they_close(self):
+        text = plan_json()
+        parser = IncrementalTripParser()
+        emitted_at = []
+        for i, ch in enumerate(text):
+            for day in parser.feed(ch):
+                emitted_at.append((day.day, i))
+
+        self.assertEqual([day for day, _ in emitted_at], [1, 2, 3])
+        # Day 1 is available before day 2 has even started streaming
+        self.assertLess(emitted_at[0][1], text.index('"day": 2'))
+        self.assertEqual(parser.salvage().notes[0].content, "Bring an umbrella")
+
+    def test_malformed_tail_loses_only_unfinished_day(self):
+        text = plan_json()
+        truncated = text[:text.index('"Temple 3"')] + '"Temple 3", "descr'
+        parser = IncrementalTripParser()
+        parser.feed(truncated)
+
+        plan = parser.salvage()
+
+        self.assertEqual(plan.destination, "Kyoto")
+        self.assertEqual(plan.budget, "3000")
+        self.assertEqual([day.day for day in plan.itinerary], [1, 2])
+
+    def test_invalid_day_is_skipped(self):
+        text = plan_json().replace('"summary": "Day 2 in Kyoto"', '"summary": null')
+        parser = IncrementalTripParser()
+        parser.feed(text)
+
+        self.assertEqual([day.day for day in parser.days], [1, 3])
+        self.assertEqual(len(parser.errors), 1)
+
+    def test_preamble_and_fence_ignored(self):
+        parser = IncrementalTripParser()
+        parser.feed("```json\n" + plan_json(days=1) + "\n```")
+
+        self.assertEqual(len(parser.salvage().itinerary), 1)
+
+
+class TestStreamingPlanner(unittest.TestCase):
+    def _run(self, text):
+        builder = StateGraph(TravelState)
+        builder.add_node("plan_itinerary", aplan_itinerary)
+        builder.add_edge(START, "plan_itinerary")
+        builder.add_edge("plan_itinerary", END)
+        graph = builder.compile()
+
+        async def run():
+            days, final = [], None
+            async for mode, payload in graph.astream(
+                {"messages": [HumanMessage(content="Kyoto")], "destination": "Kyoto"},
+                stream_mode=["custom", "values"],
+            ):
+                if mode == "custom":
+                    days.append(payload["plan_day"]["day"])
+                else:
+                    final = payload
+            return days, final
+
+        with patch("travel_assistant.backend.agents.nodes.get_llm", return_value=fake_planner(text)):
+            return asyncio.run(run())
+
+    def test_days_streamed_through_graph(self):
+        days, final = self._run(plan_json())
+
+        self.assertEqual(days, [1, 2, 3])
+        self.assertEqual(len(final["trip_plan"].itinerary), 3)
+
+    def test_truncated_output_keeps_completed_days(self):
+        text = plan_json()
+        days, final = self._run(text[:text.index('"Temple 3"')])
+
+        self.assertEqual(days, [1, 2])
+        self.assertEqual([day.day for day in final["trip_plan"].itinerary], [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
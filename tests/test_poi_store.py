@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from tests.fakes import FakeAmap
+from travel_assistant.backend.memory.poi_store import POIStore, haversine_km
+from travel_assistant.backend.tools import call_amap
+from travel_assistant.backend.tools.cache import ToolResultCache
+from travel_assistant.backend.tools.geocoding import geocode_places
+
+# Around Hangzhou's West Lake
+WEST_LAKE = (30.2500, 120.1400)
+BROKEN_BRIDGE = (30.2590, 120.1520)
+LINGYIN = (30.2400, 120.1000)
+
+
+class TestPOIStore(unittest.TestCase):
+    def setUp(self):
+        self.store = POIStore()
+        self.addCleanup(self.store.close)
+
+    def test_lookup_is_normalized_and_counts_hits(self):
+        self.store.add("West Lake", "Hangzhou", *WEST_LAKE, address="Xihu")
+
+        poi = self.store.lookup("west  lake!", "hangzhou")
+        missing = self.store.lookup("West Lake", "Suzhou")
+
+        self.assertEqual((poi.lat, poi.lng, poi.address), (*WEST_LAKE, "Xihu"))
+        self.assertIsNone(missing)
+        stats = self.store.stats()
+        self.assertEqual(stats["name"], {"hit": 1, "miss": 1, "hit_rate": 0.5})
+        self.assertEqual(stats["spatial_index"], "rtree")
+
+    def test_within_filters_by_distance_and_keyword(self):
+        self.store.add("West Lake", "Hangzhou", *WEST_LAKE)
+        self.store.add("Broken Bridge", "Hangzhou", *BROKEN_BRIDGE)
+        self.store.add("Lingyin Temple", "Hangzhou", *LINGYIN)
+        self.store.add("Unlocated Cafe", "Hangzhou")
+
+        nearby = self.store.within(*WEST_LAKE, radius_km=2)
+        bridges = self.store.within(*WEST_LAKE, radius_km=5, keywords="bridge")
+
+        self.assertEqual([p.name for p in nearby], ["West Lake", "Broken Bridge"])
+        self.assertAlmostEqual(nearby[1].distance_km, haversine_km(*WEST_LAKE, *BROKEN_BRIDGE))
+        self.assertEqual([p.name for p in bridges], ["Broken Bridge"])
+        self.assertEqual(len(self.store.within(*WEST_LAKE, radius_km=5)), 3)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        store = POIStore(max_entries=10)
+        self.addCleanup(store.close)
+        for i in range(10):
+            store.add(f"Place {i}", "Hangzhou", 30 + i / 100, 120)
+        store.lookup("Place 0", "Hangzhou")
+
+        store.add("Place 10", "Hangzhou", 30.5, 120)
+
+        self.assertEqual(store.count(), 9)
+        self.assertIsNotNone(store.lookup("Place 0", "Hangzhou"))
+        self.assertIsNone(store.lookup("Place 1", "Hangzhou"))
+        # Evicted rows leave the spatial index too
+        self.assertEqual(len(store.within(30.05, 120, radius_km=100)), 9)
+
+    def test_expired_entries_are_ignored(self):
+        store = POIStore(ttl=0)
+        self.addCleanup(store.close)
+        store.add("West Lake", "Hangzhou", *WEST_LAKE)
+
+        self.assertIsNone(store.lookup("West Lake", "Hangzhou"))
+        self.assertEqual(store.within(*WEST_LAKE, radius_km=1), [])
+
+    def test_persists_across_instances(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "pois.sqlite")
+            store = POIStore(path)
+            store.add("West Lake", "Hangzhou", *WEST_LAKE)
+            store.close()
+
+            reopened = POIStore(path)
+            self.addCleanup(reopened.close)
+            self.assertTrue(reopened.lookup("West Lake", "Hangzhou").located)
+            self.assertEqual(len(reopened.within(*WEST_LAKE, radius_km=1)), 1)
+
+
+class TestPOIStoreIntegration(unittest.TestCase):
+    def setUp(self):
+        self.store = POIStore()
+        self.addCleanup(self.store.close)
+        for target in ("travel_assistant.backend.tools.geocoding.get_poi_store",
+                       "travel_assistant.backend.tools.get_poi_store"):
+            p = patch(target, return_value=self.store)
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_geocoding_is_answered_locally_on_repeat(self):
+        amap = FakeAmap()
+        first = asyncio.run(geocode_places(["West Lake", "Lingyin Temple"], city="Hangzhou", call=amap))
+        calls = len(amap.calls)
+
+        second = asyncio.run(geocode_places(["west lake", "Lingyin Temple"], city="Hangzhou", call=amap))
+
+        self.assertEqual(len(amap.calls), calls)
+        self.assertEqual(second["west lake"], first["West Lake"])
+        self.assertEqual(second["Lingyin Temple"].address, "1 Fayun Lane")
+        self.assertEqual(self.store.stats()["name"]["hit"], 2)
+
+    def test_store_is_queried_off_the_event_loop(self):
+        threads = []
+        for method in ("lookup", "add", "record_tool_output", "around_search"):
+            original = getattr(self.store, method)
+
+            def spy(*args, _original=original, **kwargs):
+                threads.append(threading.get_ident())
+                return _original(*args, **kwargs)
+
+            patcher = patch.object(self.store, method, new=spy)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        execute = AsyncMock(return_value=json.dumps({"pois": []}))
+
+        async def run():
+            await geocode_places(["West Lake"], city="Hangzhou", call=FakeAmap())
+            with patch("travel_assistant.backend.tools.amap_cache", new=None), \
+                 patch("travel_assistant.backend.tools.amap_manager.execute_tool", new=execute):
+                await call_amap("maps_text_search", {"keywords": "tea", "city": "Hangzhou"})
+                await call_amap("maps_around_search", {"location": "120.14,30.25", "radius": "500"})
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(run())
+
+        self.assertEqual(len(threads), 4)
+        self.assertNotIn(loop_thread, threads)
+
+    def test_search_results_skip_straight_to_detail(self):
+        search = json.dumps({"pois": [
+            {"id": "B001", "name": "Lingyin Temple", "address": [], "typecode": "110205"},
+            {"id": "B002", "name": "Feilai Peak", "address": "Lingyin Rd", "typecode": "110200"},
+        ]})
+        detail = json.dumps({"id": "B002", "name": "Feilai Peak", "location": "120.10,30.24", "address": "Lingyin Rd"})
+        execute = AsyncMock(side_effect=[search, detail])
+
+        with patch("travel_assistant.backend.tools.amap_cache", new=None), \
+             patch("travel_assistant.backend.tools.amap_manager.execute_tool", new=execute):
+            asyncio.run(call_amap("maps_text_search", {"keywords": "Lingyin", "city": "Hangzhou"}))
+            self.assertFalse(self.store.lookup("Feilai Peak", "Hangzhou").located)
+            amap = FakeAmap()
+            coords = asyncio.run(geocode_places(["Lingyin Temple"], city="Hangzhou", call=amap))
+
+            asyncio.run(call_amap("maps_search_detail", {"id": "B002"}))
+
+        self.assertEqual(amap.calls, [("maps_search_detail", {"id": "B001"})])
+        self.assertEqual(coords["Lingyin Temple"].lat, 30.24)
+        self.assertEqual(self.store.lookup("Feilai Peak", "Hangzhou").lng, 120.10)
+
+    def test_stored_poi_without_detail_location_falls_back_to_geo(self):
+        self.store.add("West Lake", "Hangzhou", poi_id="B404")
+        amap = FakeAmap()
+
+        coords = asyncio.run(geocode_places(["West Lake"], city="Hangzhou", call=amap))
+
+        self.assertEqual([tool for tool, _ in amap.calls], ["maps_search_detail", "maps_geo"])
+        self.assertEqual((coords["West Lake"].lat, coords["West Lake"].lng), (30.25, 120.14))
+        self.assertTrue(self.store.lookup("West Lake", "Hangzhou").located)
+
+    def test_around_search_answered_locally_when_enough_pois(self):
+        for i in range(5):
+            self.store.add(f"Tea House {i}", "Hangzhou", WEST_LAKE[0] + i / 1000, WEST_LAKE[1], poi_id=f"T{i}")
+        execute = AsyncMock(return_value=json.dumps({"pois": []}))
+        args = {"location": f"{WEST_LAKE[1]},{WEST_LAKE[0]}", "radius": "1000", "keywords": "tea"}
+
+        with patch("travel_assistant.backend.tools.amap_cache", new=None), \
+             patch("travel_assistant.backend.tools.amap_manager.execute_tool", new=execute):
+            local = json.loads(asyncio.run(call_amap("maps_around_search", args)))
+            asyncio.run(call_amap("maps_around_search", {**args, "keywords": "museum"}))
+
+        self.assertEqual([poi["id"] for poi in local["pois"]], ["T0", "T1", "T2", "T3", "T4"])
+        execute.assert_awaited_once()
+        self.assertEqual(self.store.stats()["nearby"], {"hit": 1, "miss": 1, "hit_rate": 0.5})
+
+    def test_cached_search_results_are_not_recorded_again(self):
+        execute = AsyncMock(return_value=json.dumps({"pois": [
+            {"id": "B001", "name": "Lingyin Temple", "location": "120.1000,30.2400"},
+        ]}))
+        args = {"keywords": "temple", "city": "Hangzhou"}
+
+        with patch("travel_assistant.backend.tools.amap_cache", new=ToolResultCache()), \
+             patch("travel_assistant.backend.tools.amap_manager.execute_tool", new=execute), \
+             patch.object(self.store, "record_tool_output", wraps=self.store.record_tool_output) as record:
+            for _ in range(3):
+                asyncio.run(call_amap("maps_text_search", args))
+
+        execute.assert_awaited_once()
+        record.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
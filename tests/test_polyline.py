@@ -0,0 +1,56 @@
+import json
+import unittest
+
+import numpy as np
+
+from tests.fakes import wiggly_route
+from travel_assistant.frontend.polyline import (
+    decode_polyline,
+    douglas_peucker,
+    encode_polyline,
+    simplified_levels,
+    tolerance_for_zoom,
+)
+
+
+class TestEncodedPolyline(unittest.TestCase):
+    def test_reference_vector(self):
+        # The example from the format's documentation, given as (lat, lng)
+        points = [[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]]
+        self.assertEqual(encode_polyline(points), "_p~iF~ps|U_ulLnnqC_mqNvxq`@")
+
+    def test_round_trip(self):
+        points = [[round(lng, 5), round(lat, 5)] for lng, lat in wiggly_route(200)]
+        decoded = decode_polyline(encode_polyline(points))
+        np.testing.assert_allclose(decoded, points, atol=1e-9)
+
+    def test_much_smaller_than_json(self):
+        points = wiggly_route()
+        self.assertLess(len(encode_polyline(points)), len(json.dumps(points)) / 4)
+
+
+class TestDouglasPeucker(unittest.TestCase):
+    def test_collinear_points_collapse_to_the_ends(self):
+        line = [[120.0 + i * 1e-3, 30.0 + i * 1e-3] for i in range(50)]
+        self.assertEqual(douglas_peucker(line, 1.0), [line[0], line[-1]])
+
+    def test_corners_are_kept(self):
+        path = [[120.0, 30.0], [120.005, 30.0], [120.01, 30.0], [120.01, 30.005], [120.01, 30.01]]
+        self.assertEqual(douglas_peucker(path, 5.0), [path[0], path[2], path[4]])
+
+    def test_kept_points_stay_within_tolerance(self):
+        points = wiggly_route()
+        kept = douglas_peucker(points, 20.0)
+        self.assertLess(len(kept), len(points) / 5)
+        self.assertEqual((kept[0], kept[-1]), (points[0], points[-1]))
+
+    def test_levels_get_finer_with_zoom(self):
+        levels = simplified_levels(wiggly_route())
+        counts = [level["points"] for level in levels]
+        self.assertEqual(counts, sorted(counts))
+        self.assertLess(counts[0], counts[-1])
+        self.assertGreater(tolerance_for_zoom(10, 30.2), tolerance_for_zoom(16, 30.2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import asyncio
+import random
+import time
+import unittest
+
+from travel_assistant.backend.agents.nodes import optimize_routes
+from travel_assistant.backend.distance import haversine_matrix
+from travel_assistant.backend.route_optimizer import (
+    optimize_day,
+    optimize_itinerary,
+    order_stops,
+    path_length,
+)
+from travel_assistant.backend.schemas import (
+    CoordinateSchema,
+    DailyItinerarySchema,
+    TripNodeSchema,
+    TripSchema,
+)
+
+
+def stop(name, lat, lng, type="attraction", start=None, end=None):
+    return TripNodeSchema(name=name, description=name, type=type, start_time=start, end_time=end,
+                          coordinates=CoordinateSchema(lat=lat, lng=lng) if lat is not None else None)
+
+
+def zigzag_day(day=1):
+    # Four sights on a west-east line, visited out of order around lunch
+    return DailyItinerarySchema(day=day, summary="Sights", nodes=[
+        stop("Hotel", 30.25, 120.00, type="hotel"),
+        stop("East", 30.25, 120.03, start="09:00", end="10:00"),
+        stop("West", 30.25, 120.01, start="10:30", end="12:00"),
+        stop("Lunch", 30.25, 120.02, type="restaurant", start="12:30", end="13:30"),
+        stop("Far", 30.25, 120.06, start="14:00", end="15:00"),
+        stop("Near", 30.25, 120.03, start="15:30", end="16:00"),
+        stop("Walk", None, None, start="16:30", end="17:00"),
+        stop("Mid", 30.25, 120.05, start="17:30", end="18:00"),
+    ])
+
+
+class TestRouteOptimizer(unittest.TestCase):
+    def test_reorders_runs_between_pinned_nodes(self):
+        optimized, stats = optimize_day(zigzag_day())
+
+        names = [node.name for node in optimized.nodes]
+        # Hotel, lunch and the unlocated walk keep their slots
+        self.assertEqual(names, ["Hotel", "West", "East", "Lunch", "Near", "Far", "Walk", "Mid"])
+        self.assertGreater(stats["saved_km"], 0)
+        self.assertAlmostEqual(stats["before_km"] - stats["after_km"], stats["saved_km"], places=3)
+
+    def test_moved_stops_are_retimed_keeping_durations(self):
+        optimized, _ = optimize_day(zigzag_day())
+        times = {node.name: (node.start_time, node.end_time) for node in optimized.nodes}
+
+        # West (1h30) now starts the morning, East (1h) follows after ~2 km of travel
+        self.assertEqual(times["West"], ("09:00", "10:30"))
+        self.assertEqual(times["East"], ("10:40", "11:40"))
+        self.assertEqual(times["Lunch"], ("12:30", "13:30"))
+        self.assertEqual(times["Near"], ("14:00", "14:30"))
+
+    def test_reorder_that_runs_into_a_pinned_time_is_skipped(self):
+        day = DailyItinerarySchema(day=1, summary="Tight morning", nodes=[
+            stop("Hotel", 30.25, 120.00, type="hotel"),
+            stop("East", 30.25, 120.03, start="09:00", end="10:00"),
+            stop("West", 30.25, 120.01, start="10:00", end="11:55"),
+            stop("Lunch", 30.25, 120.02, type="restaurant", start="12:00", end="13:00"),
+        ])
+
+        # West then East is shorter, but with the travel between them East would end at 12:05
+        optimized, stats = optimize_day(day)
+
+        self.assertIs(optimized, day)
+        self.assertEqual(stats["saved_km"], 0)
+
+        roomy = day.model_copy(deep=True)
+        roomy.nodes[3].start_time = "12:30"
+        optimized, _ = optimize_day(roomy)
+        self.assertEqual([node.name for node in optimized.nodes], ["Hotel", "West", "East", "Lunch"])
+
+    def test_optimal_day_is_returned_unchanged(self):
+        day = DailyItinerarySchema(day=1, summary="Line", nodes=[
+            stop("A", 30.25, 120.00), stop("B", 30.25, 120.01), stop("C", 30.25, 120.02),
+        ])
+
+        optimized, stats = optimize_day(day)
+
+        self.assertIs(optimized, day)
+        self.assertEqual(stats["saved_km"], 0)
+
+    def test_two_opt_matches_brute_force_on_small_instances(self):
+        from itertools import permutations
+
+        rng = random.Random(7)
+        for _ in range(20):
+            points = [(rng.uniform(30.1, 30.4), rng.uniform(120.0, 120.3)) for _ in range(7)]
+            dist = haversine_matrix(*zip(*points))
+            stops = list(range(1, 7))
+            best = min(path_length(dist, [0, *p]) for p in permutations(stops))
+
+            order = order_stops(dist, stops, start=0)
+
+            self.assertEqual(sorted(order), stops)
+            self.assertLessEqual(path_length(dist, [0, *order]), best * 1.1)
+
+    def test_long_itinerary_runs_in_milliseconds(self):
+        rng = random.Random(1)
+        days = [DailyItinerarySchema(day=d, summary="", nodes=[
+            stop(f"S{d}-{i}", rng.uniform(30.1, 30.4), rng.uniform(120.0, 120.3)) for i in range(12)
+        ]) for d in range(1, 31)]
+        plan = TripSchema(destination="Hangzhou", itinerary=days)
+
+        started = time.perf_counter()
+        optimized, savings = optimize_itinerary(plan)
+        elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(sorted(savings), list(range(1, 31)))
+        self.assertTrue(all(s["saved_km"] >= 0 for s in savings.values()))
+        self.assertEqual([len(d.nodes) for d in optimized.itinerary], [12] * 30)
+
+    def test_node_exposes_savings_per_day(self):
+        plan = TripSchema(destination="Hangzhou", itinerary=[zigzag_day(1), zigzag_day(2)])
+
+        result = asyncio.run(optimize_routes({"trip_plan": plan}))
+
+        self.assertEqual(set(result["route_savings"]), {1, 2})
+        self.assertEqual(result["trip_plan"].itinerary[1].nodes[1].name, "West")
+        self.assertEqual(asyncio.run(optimize_routes({"trip_plan": None})), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.graph import END, START, StateGraph
+
+from travel_assistant.backend.agents.nodes import agenerate_response
+from travel_assistant.backend.memory.checkpointer import open_checkpointer
+from travel_assistant.backend.schemas import TripSchema
+from travel_assistant.backend.state import TravelState
+from travel_assistant.frontend.runtime import ChatRuntime
+
+
+def fail_on_boom(state):
+    if state["messages"][-1].content == "boom":
+        raise ValueError("boom")
+    return {"destination": "Paris", "trip_plan": TripSchema(destination="Paris")}
+
+
+def create_builder():
+    builder = StateGraph(TravelState)
+    builder.add_node("process_input", fail_on_boom)
+    builder.add_node("generate_response", agenerate_response)
+    builder.add_edge(START, "process_input")
+    builder.add_edge("process_input", "generate_response")
+    builder.add_edge("generate_response", END)
+    return builder
+
+
+class TestChatRuntime(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "memory.sqlite")
+        self.warm_up = AsyncMock(return_value=2)
+        self.runtime = ChatRuntime(
+            builder=create_builder(),
+            checkpointer_factory=lambda: open_checkpointer(path, maintenance_interval=0),
+            warm_up=self.warm_up,
+        )
+        self.addCleanup(self.runtime.close)
+        llm = GenericFakeChatModel(messages=iter([AIMessage(content="First answer"), AIMessage(content="Second answer")]))
+        patcher = patch("travel_assistant.backend.agents.nodes.get_llm", return_value=llm)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_turns_share_one_loop_graph_and_checkpointer(self):
+        first = list(self.runtime.stream("t1", "Paris please"))
+        second = list(self.runtime.stream("t1", "Make it longer"))
+
+        self.assertEqual("".join(e.text for e in first if e.kind == "token"), "First answer")
+        final = second[-1]
+        self.assertEqual(final.kind, "final")
+        # The second turn sees the first one's history through the checkpointer
+        self.assertEqual([m.content for m in final.state["messages"]],
+                         ["Paris please", "First answer", "Make it longer", "Second answer"])
+        self.assertGreaterEqual(final.timing["overhead_seconds"], 0)
+
+        stats = self.runtime.stats()
+        self.assertEqual((stats["turns"], stats["compiles"]), (2, 1))
+        self.warm_up.assert_awaited_once()
+
+    def test_errors_surface_in_the_calling_thread(self):
+        with self.assertRaises(ValueError):
+            list(self.runtime.stream("t2", "boom"))
+        # The runtime keeps working after a failed turn
+        events = list(self.runtime.stream("t2", "Paris please"))
+        self.assertEqual(events[-1].kind, "final")
+
+    def test_close_stops_the_loop_thread(self):
+        self.runtime.start().result(5)
+        self.runtime.close()
+        self.assertFalse(self.runtime._thread.is_alive())
+        self.assertTrue(self.runtime.loop.is_closed())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, START, StateGraph
+
+from travel_assistant.backend.agents.nodes import agenerate_response
+from travel_assistant.backend.metrics import metrics
+from travel_assistant.backend.schemas import TripSchema
+from travel_assistant.backend.state import TravelState
+from travel_assistant.backend.streaming import stream_turn
+from travel_assistant.backend.tracing import llm_metrics, record_tool_call
+
+
+async def fake_weather(state):
+    record_tool_call("amap", "maps_weather", 0.05, 120, False)
+    return {"weather_info": "Sunny", "trip_plan": TripSchema(destination="Paris")}
+
+
+def build_graph():
+    builder = StateGraph(TravelState)
+    builder.add_node("weather_query_agent", fake_weather)
+    builder.add_node("generate_response", agenerate_response)
+    builder.add_edge(START, "weather_query_agent")
+    builder.add_edge("weather_query_agent", "generate_response")
+    builder.add_edge("generate_response", END)
+    return builder.compile()
+
+
+class TestStreamTurn(unittest.TestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def _fake_llm(self):
+        # Like the models config.get_llm builds
+        return GenericFakeChatModel(messages=iter([AIMessage(content="Enjoy your trip to Paris!")]),
+                                    callbacks=[llm_metrics])
+
+    def test_tokens_and_progress_are_streamed(self):
+        llm = self._fake_llm()
+
+        async def run():
+            return [event async for event in stream_turn(build_graph(), {"messages": [HumanMessage(content="Paris")]})]
+
+        with patch("travel_assistant.backend.agents.nodes.get_llm", return_value=llm):
+            events = asyncio.run(run())
+
+        kinds = [event.kind for event in events]
+        tokens = [event.text for event in events if event.kind == "token"]
+
+        self.assertEqual(kinds[0], "progress")
+        self.assertEqual(events[0].text, "Weather fetched")
+        # The answer arrives in several chunks rather than as one final message
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual("".join(tokens), "Enjoy your trip to Paris!")
+        self.assertEqual(kinds[-1], "final")
+        self.assertEqual(events[-1].state["messages"][-1].content, "Enjoy your trip to Paris!")
+
+        observations = {o["name"]: o for o in metrics.snapshot()["observations"]}
+        self.assertEqual(observations["ttft_seconds"]["count"], 1)
+        self.assertLessEqual(observations["ttft_seconds"]["max"], observations["turn_seconds"]["max"])
+
+        timing = events[-1].timing
+        self.assertGreater(timing["llm_seconds"], 0)
+        self.assertAlmostEqual(timing["overhead_seconds"], timing["turn_seconds"] - timing["llm_seconds"])
+        self.assertEqual(observations["turn_overhead_seconds"]["count"], 1)
+
+        # Every LLM and tool call of the turn is attached to the final state
+        run_metrics = events[-1].state["run_metrics"]
+        self.assertEqual([c["node"] for c in run_metrics["llm_calls"]], ["generate_response"])
+        self.assertFalse(run_metrics["llm_calls"][0]["error"])
+        self.assertEqual(run_metrics["tool_calls"], [{
+            "node": "weather_query_agent", "server": "amap", "tool": "maps_weather",
+            "seconds": 0.05, "payload_bytes": 120, "error": False,
+        }])
+        self.assertEqual(observations["llm_call_seconds"]["labels"]["node"], "generate_response")
+        self.assertEqual(observations["mcp_tool_payload_bytes"]["sum"], 120)
+
+    def test_llm_and_tool_metrics_without_stream_turn(self):
+        with patch("travel_assistant.backend.agents.nodes.get_llm", return_value=self._fake_llm()):
+            asyncio.run(build_graph().ainvoke({"messages": [HumanMessage(content="Paris")]}))
+
+        snapshot = metrics.snapshot()
+        observations = {o["name"]: o for o in snapshot["observations"]}
+        self.assertEqual(observations["llm_call_seconds"]["count"], 1)
+        self.assertEqual(observations["llm_call_seconds"]["labels"]["node"], "generate_response")
+        self.assertEqual(observations["mcp_tool_seconds"]["count"], 1)
+        calls = [c for c in snapshot["counters"] if c["name"] == "llm_calls_total"]
+        self.assertEqual([c["value"] for c in calls], [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
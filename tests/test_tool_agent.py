@@ -0,0 +1,152 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import tool
+
+from travel_assistant.backend.agents.tools import run_simple_tool_agent
+
+# ("start" | "end", query) for every tool call, in the order they happened
+EVENTS = []
+
+
+@tool
+async def slow_search(query: str, delay: float = 0.2) -> str:
+    """Search with an artificial delay.
+
+    Args:
+        query: Search query.
+        delay: Seconds to sleep before answering.
+    """
+    EVENTS.append(("start", query))
+    await asyncio.sleep(delay)
+    EVENTS.append(("end", query))
+    return f"result for {query}"
+
+
+@tool
+def sync_lookup(query: str) -> str:
+    """Look something up synchronously.
+
+    Args:
+        query: Search query.
+    """
+    EVENTS.append(("start", query))
+    time.sleep(0.2)
+    EVENTS.append(("end", query))
+    return f"synced {query}"
+
+
+class TestRunSimpleToolAgent(unittest.TestCase):
+    def setUp(self):
+        EVENTS.clear()
+
+    def assertOverlapping(self, count):
+        """Every one of ``count`` calls started before the first one finished."""
+        kinds = [kind for kind, _ in EVENTS]
+        self.assertEqual(kinds[:count], ["start"] * count)
+
+    def _llm(self, tool_calls):
+        bound = MagicMock()
+        bound.ainvoke = AsyncMock(
+            side_effect=[
+                AIMessage(content="", tool_calls=tool_calls),
+                AIMessage(content="summary"),
+            ]
+        )
+        llm = MagicMock()
+        llm.bind_tools.return_value = bound
+        return llm, bound
+
+    def test_tool_calls_run_concurrently_in_order(self):
+        tool_calls = [
+            {
+                "name": "slow_search",
+                "args": {"query": f"q{i}", "delay": 0.3 - i * 0.05},
+                "id": f"call_{i}",
+            }
+            for i in range(5)
+        ]
+        llm, bound = self._llm(tool_calls)
+
+        result = asyncio.run(
+            run_simple_tool_agent("find", [slow_search], llm, max_concurrency=5)
+        )
+
+        self.assertEqual(result, "summary")
+        self.assertOverlapping(5)
+        # The shortest call finishes first, yet results keep the call order
+        self.assertEqual(EVENTS[5], ("end", "q4"))
+
+        summary_messages = bound.ainvoke.call_args_list[1].args[0]
+        tool_messages = [m for m in summary_messages if isinstance(m, ToolMessage)]
+        self.assertEqual(
+            [m.tool_call_id for m in tool_messages], [f"call_{i}" for i in range(5)]
+        )
+        self.assertEqual(tool_messages[3].content, "result for q3")
+
+    def test_tool_call_timeout(self):
+        tool_calls = [
+            {
+                "name": "slow_search",
+                "args": {"query": "slow", "delay": 5},
+                "id": "call_slow",
+            },
+            {
+                "name": "slow_search",
+                "args": {"query": "fast", "delay": 0},
+                "id": "call_fast",
+            },
+        ]
+        llm, bound = self._llm(tool_calls)
+
+        asyncio.run(run_simple_tool_agent("find", [slow_search], llm, call_timeout=0.1))
+
+        summary_messages = bound.ainvoke.call_args_list[1].args[0]
+        tool_messages = [m for m in summary_messages if isinstance(m, ToolMessage)]
+        self.assertIn("timed out", tool_messages[0].content)
+        self.assertEqual(tool_messages[1].content, "result for fast")
+
+    def test_zero_timeout_is_not_the_default(self):
+        llm, bound = self._llm(
+            [
+                {
+                    "name": "slow_search",
+                    "args": {"query": "q", "delay": 0.05},
+                    "id": "call_0",
+                }
+            ]
+        )
+
+        asyncio.run(run_simple_tool_agent("find", [slow_search], llm, call_timeout=0))
+
+        tool_message = bound.ainvoke.call_args_list[1].args[0][-1]
+        self.assertIn("timed out", tool_message.content)
+
+    def test_sync_tools_run_off_the_event_loop(self):
+        tool_calls = [
+            {"name": "sync_lookup", "args": {"query": f"q{i}"}, "id": f"call_{i}"}
+            for i in range(3)
+        ]
+        llm, bound = self._llm(tool_calls)
+
+        asyncio.run(
+            run_simple_tool_agent("find", [sync_lookup], llm, max_concurrency=3)
+        )
+
+        tool_messages = [
+            m
+            for m in bound.ainvoke.call_args_list[1].args[0]
+            if isinstance(m, ToolMessage)
+        ]
+        self.assertEqual(
+            [m.content for m in tool_messages], ["synced q0", "synced q1", "synced q2"]
+        )
+        # The calls overlap instead of blocking the loop one after another
+        self.assertOverlapping(3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from travel_assistant.backend.metrics import metrics
+from travel_assistant.backend.tools.cache import ToolResultCache, normalize_args
+
+
+class TestToolResultCache(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        metrics.reset()
+
+    async def fake_execute(self, tool_name, tool_args):
+        self.calls.append((tool_name, tool_args))
+        await asyncio.sleep(0.05)
+        if tool_args.get("city") == "nowhere":
+            return '{"error": "Get weather failed: INVALID_PARAMS"}'
+        return f'{{"city": "{tool_args.get("city")}", "forecasts": []}}'
+
+    def test_normalized_keys(self):
+        self.assertEqual(
+            normalize_args({"city": " Hangzhou ", "keywords": "hotel", "citylimit": ""}),
+            normalize_args({"keywords": "HOTEL", "city": "hangzhou"}),
+        )
+
+    def test_repeated_and_concurrent_calls_hit_server_once(self):
+        cache = ToolResultCache()
+
+        async def run():
+            first = await asyncio.gather(*[
+                cache.get_or_call("maps_weather", {"city": "Hangzhou"}, self.fake_execute)
+                for _ in range(3)
+            ])
+            second = await cache.get_or_call("maps_weather", {"city": "hangzhou "}, self.fake_execute)
+            return first, second
+
+        first, second = asyncio.run(run())
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(len(set(first)), 1)
+        self.assertEqual(second, first[0])
+
+    def test_errors_are_not_cached(self):
+        cache = ToolResultCache()
+
+        for _ in range(2):
+            asyncio.run(cache.get_or_call("maps_weather", {"city": "nowhere"}, self.fake_execute))
+
+        self.assertEqual(len(self.calls), 2)
+
+    def test_per_tool_ttl(self):
+        cache = ToolResultCache()
+
+        with patch.dict(os.environ, {"AMAP_CACHE_TTL_MAPS_WEATHER": "0.1"}):
+            asyncio.run(cache.get_or_call("maps_weather", {"city": "Hangzhou"}, self.fake_execute))
+            asyncio.run(cache.get_or_call("maps_text_search", {"city": "Hangzhou"}, self.fake_execute))
+            time.sleep(0.2)
+            asyncio.run(cache.get_or_call("maps_weather", {"city": "Hangzhou"}, self.fake_execute))
+            asyncio.run(cache.get_or_call("maps_text_search", {"city": "Hangzhou"}, self.fake_execute))
+
+        self.assertEqual([name for name, _ in self.calls], ["maps_weather", "maps_text_search", "maps_weather"])
+
+    def test_persisted_results_survive_restart(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "amap_cache.sqlite")
+            cache = ToolResultCache(path=path)
+            asyncio.run(cache.get_or_call("maps_text_search", {"keywords": "hotel", "city": "Hangzhou"}, self.fake_execute))
+            cache.disk.close()
+
+            restarted = ToolResultCache(path=path)
+            asyncio.run(restarted.get_or_call("maps_text_search", {"keywords": "hotel", "city": "Hangzhou"}, self.fake_execute))
+            stats = restarted.stats()
+            restarted.disk.close()
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(stats["tools"]["maps_text_search"]["disk_hit"], 1)
+
+    def test_disk_tier_runs_off_the_event_loop(self):
+        threads = []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ToolResultCache(path=os.path.join(tmpdir, "amap_cache.sqlite"))
+            for method in ("get", "set"):
+                original = getattr(cache.disk, method)
+
+                def spy(*args, _original=original):
+                    threads.append(threading.get_ident())
+                    return _original(*args)
+
+                setattr(cache.disk, method, spy)
+
+            async def run():
+                args = {"keywords": "hotel", "city": "Hangzhou"}
+                await cache.get_or_call("maps_text_search", args, self.fake_execute)
+                cache.memory.clear()
+                await cache.get_or_call("maps_text_search", args, self.fake_execute)
+                return threading.get_ident()
+
+            loop_thread = asyncio.run(run())
+            cache.disk.close()
+
+        self.assertEqual(len(self.calls), 1)
+        # Miss, write, then a disk hit
+        self.assertEqual(len(threads), 3)
+        self.assertNotIn(loop_thread, threads)
+
+
+if __name__ == "__main__":
+    unittest.main()